@@ -0,0 +1 @@
+# Maintenance commands (run with python -m app.commands.<name>)
@@ -0,0 +1,88 @@
+"""
+Rebuild the analytics rollup tables from code_analyses and analysis_errors.
+
+Usage:
+    python -m app.commands.backfill_rollups              # all users
+    python -m app.commands.backfill_rollups --user <id>  # a single user
+
+Existing rollup rows for the selected users are replaced in a single
+transaction, so the command is safe to re-run. Run it once after deploying
+the rollup tables (and migrations/001, which creates analysis_errors), and
+whenever the rollups need to be repaired.
+"""
+
+import argparse
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.database import Base, SessionLocal, engine
+from app.models import UserDailyStats, UserDailyErrorCount, UserStatsTotals
+
+
+USER_FILTER = "WHERE (CAST(:user_id AS VARCHAR) IS NULL OR user_id = :user_id)"
+
+DELETE_STATEMENTS = [
+    f"DELETE FROM user_daily_error_counts {USER_FILTER}",
+    f"DELETE FROM user_daily_stats {USER_FILTER}",
+    f"DELETE FROM user_stats_totals {USER_FILTER}",
+]
+
+INSERT_STATEMENTS = [
+    f"""
+    INSERT INTO user_daily_stats (user_id, day, analysis_count, error_count)
+    SELECT user_id, CAST(created_at AS DATE), COUNT(*), COALESCE(SUM(total_errors), 0)
+    FROM code_analyses
+    {USER_FILTER}
+    GROUP BY user_id, CAST(created_at AS DATE)
+    """,
+    f"""
+    INSERT INTO user_daily_error_counts (user_id, day, error_type, count)
+    SELECT user_id, CAST(created_at AS DATE), error_type, COUNT(*)
+    FROM analysis_errors
+    {USER_FILTER}
+    GROUP BY user_id, CAST(created_at AS DATE), error_type
+    """,
+    f"""
+    INSERT INTO user_stats_totals (
+        user_id, total_analyses, total_errors, min_errors, first_analysis_at, last_analysis_at
+    )
+    SELECT user_id, COUNT(*), COALESCE(SUM(total_errors), 0), MIN(total_errors), MIN(created_at), MAX(created_at)
+    FROM code_analyses
+    {USER_FILTER}
+    GROUP BY user_id
+    """,
+]
+
+
+def backfill(user_id: Optional[str] = None) -> None:
+    """
+    Recompute rollups for one user or for everyone.
+
+    Args:
+        user_id: Restrict the rebuild to this user (None rebuilds all users)
+    """
+    # Make sure the rollup tables exist on databases created before they were added
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[UserDailyStats.__table__, UserDailyErrorCount.__table__, UserStatsTotals.__table__]
+    )
+
+    params = {"user_id": user_id}
+    with SessionLocal() as db:
+        for statement in DELETE_STATEMENTS + INSERT_STATEMENTS:
+            db.execute(text(statement), params)
+        db.commit()
+
+    print(f"✓ Rollups rebuilt for {'user ' + user_id if user_id else 'all users'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollup tables")
+    parser.add_argument("--user", dest="user_id", default=None, help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+    backfill(args.user_id)
+
+
+if __name__ == "__main__":
+    main()
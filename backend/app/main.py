@@ -1,20 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
-from app.database import engine, Base
+from app.database import engine, Base, get_pool_status
 from app.routes import analysis, auth, ai, chatbot
+from app.services.ai_service import get_ai_service
+from app.services.cache_service import get_analysis_cache
+from app.services.job_service import get_job_queue
+from app.utils.metrics import metrics
 
 load_dotenv()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers for async-mode analyses
+    job_queue = get_job_queue()
+    job_queue.start()
+    yield
+    await job_queue.stop()
+
+
 app = FastAPI(
     title="Code Analysis API",
     description="API for AI-powered code analysis and learning progress tracking",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - Allow VSCode webview origins
@@ -28,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Location"],
 )
 
 # Include routers
@@ -47,3 +64,18 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics")
+def get_metrics():
+    """In-process counters, gauges and timing summaries"""
+    snapshot = {
+        **metrics.snapshot(),
+        "analysis_cache": get_analysis_cache().stats(),
+        "db_pool": get_pool_status()
+    }
+
+    ai_service = get_ai_service()
+    if hasattr(ai_service, "stats"):
+        snapshot["ai_router"] = ai_service.stats()
+
+    return snapshot
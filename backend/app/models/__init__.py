@@ -1,3 +1,8 @@
 from .user import User
 from .code_analysis import CodeAnalysis
 from .conversation import Conversation
+from .analysis_cache import AnalysisCacheEntry
+from .analytics_rollup import UserDailyStats, UserDailyErrorCount, UserStatsTotals
+from .analysis_error import AnalysisError
+from .conversation_summary import ConversationSummary
+from .analysis_job import AnalysisJob
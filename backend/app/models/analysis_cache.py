@@ -0,0 +1,30 @@
+"""
+Persistent tier of the analysis result cache.
+"""
+
+from sqlalchemy import Column, String, Text, DateTime, Integer, JSON
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class AnalysisCacheEntry(Base):
+    """AI analysis result keyed by a hash of normalized code, language and model version"""
+
+    __tablename__ = "analysis_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    language = Column(String(50), nullable=False)
+    model_version = Column(String, nullable=False)
+
+    # Cached AI output
+    ai_response = Column(Text, nullable=True)
+    structured_result = Column(JSON, nullable=True)
+
+    # Bookkeeping for TTL and size-bounded eviction
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_hit_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<AnalysisCacheEntry {self.cache_key[:12]} - {self.language}>"
@@ -0,0 +1,28 @@
+"""
+Error occurrence model.
+
+One row per error reported in an analysis, normalized out of
+code_analyses.errors at insert time so per-type queries use an index
+instead of expanding every JSON array.
+"""
+
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class AnalysisError(Base):
+    """A single error found by an analysis"""
+
+    __tablename__ = "analysis_errors"
+    __table_args__ = (
+        Index("idx_analysis_errors_user_type", "user_id", "error_type"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    analysis_id = Column(String, ForeignKey("code_analyses.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    error_type = Column(String, nullable=False)
+    line = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,60 @@
+"""
+Analysis job model.
+
+Durable queue entry for an analysis requested in async mode. Workers claim
+queued rows with FOR UPDATE SKIP LOCKED and hold them under a lease, so a job
+whose worker died is picked up again once its lease expires.
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+from app.models.code_analysis import DOCUMENT_ID_LENGTH
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class AnalysisJob(Base):
+    """A queued, running or finished async code analysis"""
+
+    __tablename__ = "analysis_jobs"
+    # created_at is read back right after the insert (RETURNING, no extra query)
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Claim order and queue depth/age only ever look at unfinished jobs
+        Index(
+            "idx_analysis_jobs_pending",
+            "created_at",
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Request
+    code = Column(Text, nullable=False)
+    language = Column(String(50), nullable=False)
+    document_id = Column(String(DOCUMENT_ID_LENGTH), nullable=True)
+
+    # Progress
+    status = Column(String(16), nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Outcome
+    analysis_id = Column(String, ForeignKey("code_analyses.id", ondelete="SET NULL"), nullable=True)
+    result = Column(JSONB, nullable=True)  # Same shape as the /api/analyze response
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,46 @@
+"""
+Per-user analytics rollups.
+
+Maintained incrementally in the same transaction as every analysis insert
+(see RollupService) so dashboard queries read a handful of pre-aggregated
+rows instead of rescanning code_analyses.
+"""
+
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
+
+from app.database import Base
+
+
+class UserDailyStats(Base):
+    """Analyses and errors per user per day"""
+
+    __tablename__ = "user_daily_stats"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    analysis_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+
+
+class UserDailyErrorCount(Base):
+    """Occurrences of each error type per user per day"""
+
+    __tablename__ = "user_daily_error_counts"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    error_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserStatsTotals(Base):
+    """Lifetime totals per user"""
+
+    __tablename__ = "user_stats_totals"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_analyses = Column(Integer, nullable=False, default=0)
+    total_errors = Column(Integer, nullable=False, default=0)
+    min_errors = Column(Integer, nullable=True)
+    first_analysis_at = Column(DateTime(timezone=True), nullable=True)
+    last_analysis_at = Column(DateTime(timezone=True), nullable=True)
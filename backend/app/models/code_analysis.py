@@ -1,9 +1,23 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 import uuid
 
+PREVIEW_LENGTH = 30
+DOCUMENT_ID_LENGTH = 128
+
+
+def make_code_preview(code: str) -> str:
+    """Short preview of submitted code shown in history lists"""
+    return (code or "")[:PREVIEW_LENGTH] + "..."
+
+
+def _default_code_preview(context) -> str:
+    return make_code_preview(context.get_current_parameters().get("code_content"))
+
+
 class CodeAnalysis(Base):
     __tablename__ = "code_analyses"
 
@@ -12,12 +26,14 @@ class CodeAnalysis(Base):
 
     # Input data
     code_content = Column(Text, nullable=False)
+    code_preview = Column(String(PREVIEW_LENGTH + 3), nullable=True, default=_default_code_preview)
     language = Column(String(50), nullable=False)
+    document_id = Column(String(DOCUMENT_ID_LENGTH), nullable=True)  # Client-supplied id of the submitted file
 
     # AI response data
     ai_raw_response = Column(Text, nullable=True)
     corrected_code = Column(Text, nullable=True)
-    errors = Column(JSON, nullable=True)  # Dynamic list of errors
+    errors = Column(JSONB, nullable=True)  # Dynamic list of errors
     explanations = Column(JSON, nullable=True)  # List of explanations
     recommendations = Column(Text, nullable=True)
 
@@ -38,3 +54,21 @@ class CodeAnalysis(Base):
 
     # Relationship to user
     user = relationship("User", back_populates="analyses")
+
+
+# History pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+Index(
+    "idx_code_analyses_user_created",
+    CodeAnalysis.user_id,
+    CodeAnalysis.created_at.desc(),
+    CodeAnalysis.id.desc()
+)
+
+# Earlier analyses of a resubmitted file: WHERE user_id = ? AND document_id = ? ORDER BY created_at DESC
+Index(
+    "idx_code_analyses_user_document",
+    CodeAnalysis.user_id,
+    CodeAnalysis.document_id,
+    CodeAnalysis.created_at.desc(),
+    postgresql_where=text("document_id IS NOT NULL")
+)
@@ -2,7 +2,7 @@
 Conversation database model for chatbot.
 """
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -11,15 +11,24 @@ from app.database import Base
 
 
 class Conversation(Base):
-    """Conversation model for chatbot message history"""
+    """One chatbot exchange: a user message and the assistant's response"""
 
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Recent-history and paginated history reads per user
+        Index("idx_conversations_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    message = Column(Text, nullable=False)
-    response = Column(Text, nullable=False)
-    role = Column(String, nullable=False)  # 'user' or 'assistant'
+    message = Column(Text, nullable=False)  # User message
+    response = Column(Text, nullable=False)  # Assistant response
+
+    # Estimated tokens of each side, used to budget chat context without recounting
+    message_tokens = Column(Integer, nullable=False, default=0)
+    response_tokens = Column(Integer, nullable=False, default=0)
+    model = Column(String, nullable=True)  # Model that produced the response
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationship to user
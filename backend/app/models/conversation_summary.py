@@ -0,0 +1,22 @@
+"""
+Rolling conversation summary model.
+"""
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ConversationSummary(Base):
+    """Compressed history of a user's chat messages older than the context window"""
+
+    __tablename__ = "conversation_summaries"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False, default=0)
+
+    # Messages created at or before this instant are folded into the summary
+    summarized_until = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -2,30 +2,51 @@
 AI code analysis routes.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
-
-from app.database import get_db
-from app.models.user import User
-from app.utils.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
+
+from app.database import get_async_db
+from app.models.code_analysis import DOCUMENT_ID_LENGTH
+from app.utils.dependencies import Principal, get_current_user
 from app.services.analysis_service import get_analysis_service
+from app.services.job_service import get_job_queue, format_job
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter(prefix="/api", tags=["ai-analysis"])
 
+# Upper bound on files accepted by /api/analyze/batch
+ANALYZE_BATCH_MAX_FILES = int(os.getenv("ANALYZE_BATCH_MAX_FILES", "100"))
+
 
 class AnalyzeRequest(BaseModel):
     """Request schema for code analysis"""
     code: str
     language: Optional[str] = "auto"
+    document_id: Optional[str] = Field(None, max_length=DOCUMENT_ID_LENGTH)
+
+
+class BatchFile(BaseModel):
+    """One file of a batch analysis request"""
+    path: str
+    code: str
+    language: Optional[str] = "auto"
+
+
+class BatchAnalyzeRequest(BaseModel):
+    """Request schema for batch code analysis"""
+    files: List[BatchFile]
 
 
 @router.post("/analyze")
 async def analyze_code(
     request: AnalyzeRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    prefer: Optional[str] = Header(None)
 ):
     """
     Analyze code with AI model.
@@ -41,11 +62,24 @@ async def analyze_code(
     4. Saves analysis to database with detected language
     5. Returns formatted response for frontend
 
+    Identical requests still in progress (double clicks, retries) share one
+    analysis and return the same result.
+
+    **Resubmissions**: when the same file was analyzed recently (same
+    `document_id`, or similar code without one), only the changed lines and
+    their context are re-analyzed; findings on unchanged lines are carried
+    forward with their line numbers updated.
+
+    **Async mode**: with a `Prefer: respond-async` header the analysis is
+    queued instead and the response is `202 Accepted` with the job (see
+    `POST /api/analyze/jobs`).
+
     **Request Body**:
     ```json
     {
         "code": "for i in range(10)\\n    print(i)",
-        "language": "python"  // Optional, will be auto-detected from AI response
+        "language": "python",  // Optional, will be auto-detected from AI response
+        "document_id": "hw1/main.py"  // Optional, stable id of the file across resubmissions
     }
     ```
 
@@ -55,6 +89,9 @@ async def analyze_code(
         "id": "uuid",
         "correctedCode": "corrected code here",
         "corrections": ["list", "of", "changes"],
+        "correctionRanges": [
+            {"line": 1, "col": 18, "endLine": 1, "endCol": 18, "length": 0, "replacement": ":"}
+        ],
         "errors": [
             {
                 "category": "Error Type",
@@ -69,9 +106,10 @@ async def analyze_code(
     ```
 
     Args:
-        request: Code and optional language hint
+        request: Code, optional language hint and optional document id
         current_user: Authenticated user from JWT token
-        db: Database session
+        db: Database session (used in async mode only)
+        prefer: Prefer request header
 
     Returns:
         Analysis result with corrected code, errors, and recommendations
@@ -83,6 +121,9 @@ async def analyze_code(
     if not request.code.strip():
         raise HTTPException(status_code=400, detail="Code cannot be empty")
 
+    if prefer and "respond-async" in prefer.lower():
+        return await _enqueue_job(request, current_user, db)
+
     try:
         # Use analysis service to handle the complete workflow
         # Language will be auto-detected from AI response
@@ -91,7 +132,7 @@ async def analyze_code(
             user_id=current_user.id,
             code=request.code,
             language=request.language or "auto",
-            db=db
+            document_id=request.document_id
         )
 
         return result
@@ -103,3 +144,260 @@ async def analyze_code(
             status_code=500,
             detail="Failed to analyze code. Please try again."
         )
+
+
+@router.post("/analyze/jobs", status_code=202)
+async def create_analysis_job(
+    request: AnalyzeRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a code analysis and return immediately.
+
+    The analysis runs in a background worker and is saved exactly like
+    `/api/analyze`. Fetch the outcome from `GET /api/analyze/jobs/{id}` or
+    subscribe to `GET /api/analyze/jobs/{id}/events`. Queued jobs survive
+    server restarts.
+
+    **Response** (`202 Accepted`, `Location` header points to the job):
+    ```json
+    {"id": "uuid", "status": "queued", "attempts": 0, "result": null, ...}
+    ```
+
+    Args:
+        request: Code, optional language hint and optional document id
+        current_user: Authenticated user from JWT token
+        db: Database session
+
+    Returns:
+        The queued job
+
+    Raises:
+        400: If code is empty
+    """
+    if not request.code.strip():
+        raise HTTPException(status_code=400, detail="Code cannot be empty")
+
+    return await _enqueue_job(request, current_user, db)
+
+
+@router.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get an analysis job.
+
+    `status` is one of `queued`, `running`, `done` or `failed`. When done,
+    `result` holds the `/api/analyze` response; when failed, `error` says why.
+
+    Args:
+        job_id: Job ID
+        current_user: Authenticated user from JWT token
+        db: Database session
+
+    Returns:
+        Job status and result
+
+    Raises:
+        404: If the job does not exist or belongs to another user
+    """
+    job = await get_job_queue().get_job(job_id, current_user.id, db)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return format_job(job)
+
+
+@router.get("/analyze/jobs/{job_id}/events")
+async def subscribe_analysis_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Follow an analysis job as Server-Sent Events.
+
+    Events:
+    - `status`: the job (same shape as `GET /api/analyze/jobs/{id}`) whenever its status changes
+    - `complete`: the `/api/analyze` response once the job is done
+    - `failed`: `{"detail": "..."}` if the job failed
+
+    Args:
+        job_id: Job ID
+        current_user: Authenticated user from JWT token
+        db: Database session
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        404: If the job does not exist or belongs to another user
+    """
+    queue = get_job_queue()
+    if await queue.get_job(job_id, current_user.id, db) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    user_id = current_user.id
+
+    async def event_stream():
+        try:
+            async for event, data in queue.subscribe(job_id, user_id):
+                yield sse_event(event, data)
+
+        except Exception as e:
+            print(f"Analysis job subscription error: {str(e)}")
+            yield sse_event("failed", {"detail": "Failed to follow the analysis. Please try again."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+async def _enqueue_job(request: AnalyzeRequest, current_user: Principal, db: AsyncSession) -> JSONResponse:
+    """Queue an analysis and build the 202 response"""
+    job = await get_job_queue().enqueue(
+        user_id=current_user.id,
+        code=request.code,
+        language=request.language or "auto",
+        db=db,
+        document_id=request.document_id
+    )
+
+    return JSONResponse(
+        status_code=202,
+        content=format_job(job),
+        headers={"Location": f"/api/analyze/jobs/{job.id}"}
+    )
+
+
+@router.post("/analyze/stream")
+async def analyze_code_stream(
+    request: AnalyzeRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Analyze code with AI model, streaming results as Server-Sent Events.
+
+    Same request body as `/api/analyze`. Events are sent as soon as the model
+    has produced them:
+
+    - `error_category`: one error category (same shape as items of `errors` in `/api/analyze`)
+    - `corrected_code`: the corrected code string
+    - `recommendations`: list of recommendation strings
+    - `complete`: the saved analysis, identical to the `/api/analyze` response
+    - `failed`: `{"detail": "..."}` if the analysis could not be completed
+
+    Args:
+        request: Code, optional language hint and optional document id
+        current_user: Authenticated user from JWT token
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        400: If code is empty
+    """
+    if not request.code.strip():
+        raise HTTPException(status_code=400, detail="Code cannot be empty")
+
+    user_id = current_user.id
+    analysis_service = get_analysis_service()
+
+    async def event_stream():
+        try:
+            async for event, data in analysis_service.analyze_stream(
+                user_id=user_id,
+                code=request.code,
+                language=request.language or "auto",
+                document_id=request.document_id
+            ):
+                yield sse_event(event, data)
+
+        except Exception as e:
+            print(f"Streaming analysis error: {str(e)}")
+            yield sse_event("failed", {"detail": "Failed to analyze code. Please try again."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.post("/analyze/batch")
+async def analyze_code_batch(
+    request: BatchAnalyzeRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Analyze many files in one request, streaming per-file results as Server-Sent Events.
+
+    Files are analyzed concurrently (bounded by `ANALYZE_BATCH_CONCURRENCY`) and all
+    analyses are saved in a single write once the batch finishes.
+
+    **Request Body**:
+    ```json
+    {
+        "files": [
+            {"path": "hw1/main.py", "code": "...", "language": "python"},
+            {"path": "hw1/utils.py", "code": "..."}
+        ]
+    }
+    ```
+
+    **Events**:
+    - `file_result`: `{"index", "path", "result"}` where `result` matches the `/api/analyze` response
+    - `file_failed`: `{"index", "path", "detail"}`
+    - `complete`: `{"analyzed", "failed", "ids"}` after all analyses are saved
+    - `failed`: `{"detail": "..."}` if the batch could not be completed
+
+    Args:
+        request: Files to analyze
+        current_user: Authenticated user from JWT token
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        400: If the batch is empty, too large, or contains empty files
+    """
+    if not request.files:
+        raise HTTPException(status_code=400, detail="No files to analyze")
+
+    if len(request.files) > ANALYZE_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files (maximum {ANALYZE_BATCH_MAX_FILES})"
+        )
+
+    empty = [f.path for f in request.files if not f.code.strip()]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Code cannot be empty: {', '.join(empty)}")
+
+    user_id = current_user.id
+    files = [
+        {"path": f.path, "code": f.code, "language": f.language or "auto"}
+        for f in request.files
+    ]
+    analysis_service = get_analysis_service()
+
+    async def event_stream():
+        try:
+            async for event, data in analysis_service.analyze_batch(user_id=user_id, files=files):
+                yield sse_event(event, data)
+
+        except Exception as e:
+            print(f"Batch analysis error: {str(e)}")
+            yield sse_event("failed", {"detail": "Failed to analyze files. Please try again."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -1,13 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from typing import List
-from datetime import datetime
-from collections import defaultdict
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from typing import List, Optional
+
+from app.database import get_async_db
 from app.models.code_analysis import CodeAnalysis
-from app.models.user import User
 from app.schemas.code_analysis import (
     CodeAnalysisCreate,
     CodeAnalysisResponse,
@@ -17,15 +14,18 @@ from app.schemas.code_analysis import (
     UserStats
 )
 from app.services.analytics_service import get_analytics_service
-from app.utils.dependencies import get_current_user
+from app.services.rollup_service import get_rollup_service
+from app.services.dashboard_service import get_dashboard_service
+from app.utils.dependencies import Principal, get_current_user
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
 @router.post("/", response_model=CodeAnalysisResponse)
-def create_analysis(
+async def create_analysis(
     analysis: CodeAnalysisCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new code analysis record"""
     # Ensure the analysis belongs to the authenticated user
@@ -33,52 +33,38 @@ def create_analysis(
     analysis_data['user_id'] = current_user.id
     db_analysis = CodeAnalysis(**analysis_data)
     db.add(db_analysis)
-    db.commit()
-    db.refresh(db_analysis)
+    await get_rollup_service().record_analyses([db_analysis], db)
+    await db.commit()
+    get_dashboard_service().invalidate(current_user.id)
+    await db.refresh(db_analysis)
     return db_analysis
 
 @router.get("/progress", response_model=List[ProgressData])
-def get_progress_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_progress_data(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get monthly progress data for the authenticated user"""
-    results = db.query(
-        func.date_trunc('month', CodeAnalysis.created_at).label('month'),
-        func.avg(CodeAnalysis.total_errors).label('avg_errors')
-    ).filter(
-        CodeAnalysis.user_id == current_user.id
-    ).group_by(
-        func.date_trunc('month', CodeAnalysis.created_at)
-    ).order_by(
-        func.date_trunc('month', CodeAnalysis.created_at)
-    ).all()
-
-    return [
-        ProgressData(
-            date=result.month.strftime('%Y-%m-%d'),
-            errors=int(result.avg_errors)
-        )
-        for result in results
-    ]
+    analytics_service = get_analytics_service()
+    return await analytics_service.get_monthly_average_errors(current_user.id, db)
 
 @router.get("/breakdown", response_model=List[MonthlyErrorBreakdown])
-def get_monthly_breakdown(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_monthly_breakdown(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get monthly error breakdown by category for the authenticated user.
     Now uses dynamic error types from AI instead of predefined categories.
     """
     analytics_service = get_analytics_service()
-    return analytics_service.get_error_breakdown_by_month(current_user.id, db)
+    return await analytics_service.get_error_breakdown_by_month(current_user.id, db)
 
 @router.get("/top-errors")
-def get_top_errors(
+async def get_top_errors(
     top_k: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get TOP K most frequent error types for the authenticated user.
@@ -90,68 +76,77 @@ def get_top_errors(
         List of top error types with counts and percentages
     """
     analytics_service = get_analytics_service()
-    return analytics_service.get_top_errors(current_user.id, top_k, db)
+    return await analytics_service.get_top_errors(current_user.id, top_k, db)
 
 @router.get("/history", response_model=List[HistoryItem])
-def get_analysis_history(
-    limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_analysis_history(
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get analysis history for the authenticated user"""
-    analyses = db.query(CodeAnalysis).filter(
-        CodeAnalysis.user_id == current_user.id
-    ).order_by(CodeAnalysis.created_at.desc()).limit(limit).all()
+    """
+    Get analysis history for the authenticated user, newest first.
+
+    Pages are keyset-paginated on (created_at, id): pass the X-Next-Cursor
+    header of a response as `cursor` to get the following page. The header
+    is absent on the last page. Only the listed columns are read, with the
+    preview stored at insert time.
+    """
+    query = select(
+        CodeAnalysis.id,
+        CodeAnalysis.created_at,
+        CodeAnalysis.language,
+        CodeAnalysis.total_errors,
+        CodeAnalysis.code_preview
+    ).where(CodeAnalysis.user_id == current_user.id)
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(CodeAnalysis.created_at, CodeAnalysis.id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    rows = (await db.execute(
+        query.order_by(CodeAnalysis.created_at.desc(), CodeAnalysis.id.desc()).limit(limit + 1)
+    )).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
 
     return [
         HistoryItem(
-            id=analysis.id,
-            date=analysis.created_at,
-            language=analysis.language,
-            total_errors=analysis.total_errors,
-            code_preview=analysis.code_content[:30] + "..."
+            id=row.id,
+            date=row.created_at,
+            language=row.language,
+            total_errors=row.total_errors,
+            code_preview=row.code_preview
         )
-        for analysis in analyses
+        for row in rows
     ]
 
 @router.get("/user-stats", response_model=UserStats)
-def get_user_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get user profile statistics for the authenticated user.
-    Now uses dynamic error counting and analytics service.
+
+    Served from the analytics rollups, so cost does not grow with history size.
     """
     analytics_service = get_analytics_service()
-
-    # Get all analyses for the user
-    analyses = db.query(CodeAnalysis).filter(
-        CodeAnalysis.user_id == current_user.id
-    ).order_by(CodeAnalysis.created_at).all()
-
-    # Calculate total analyses
-    total_analyses = len(analyses)
-
-    # Calculate total errors fixed from total_errors field
-    errors_fixed = sum(
-        analysis.total_errors
-        for analysis in analyses
-    )
-
-    # Calculate day streak using analytics service
-    day_streak = analytics_service.get_user_day_streak(current_user.id, db)
-
-    return UserStats(
-        total_analyses=total_analyses,
-        errors_fixed=errors_fixed,
-        day_streak=day_streak
-    )
+    return UserStats(**await analytics_service.get_user_stats(current_user.id, db))
 
 @router.get("/progress-metrics")
-def get_progress_metrics(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_progress_metrics(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get progress metrics for user dashboard.
@@ -164,16 +159,53 @@ def get_progress_metrics(
         }
     """
     analytics_service = get_analytics_service()
-    return analytics_service.get_progress_metrics(current_user.id, db)
+    return await analytics_service.get_progress_metrics(current_user.id, db)
+
+@router.get("/dashboard")
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    top_k: int = 10,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get every dashboard statistic in one response.
+
+    Combines /progress, /breakdown, /top-errors, /user-stats and /progress-metrics,
+    computed over a single database session. The response carries an ETag; send it
+    back in If-None-Match to get a 304 when nothing has changed.
+
+    Returns:
+        {
+            "progress": [...],          // same as /progress
+            "breakdown": [...],         // same as /breakdown
+            "top_errors": [...],        // same as /top-errors
+            "user_stats": {...},        // same as /user-stats
+            "progress_metrics": {...}   // same as /progress-metrics
+        }
+    """
+    dashboard_service = get_dashboard_service()
+    # Revalidation only needs the ETag; the payload is not built or loaded for a 304
+    etag = await dashboard_service.get_etag(current_user.id, top_k, db)
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    _, payload = await dashboard_service.get_dashboard(current_user.id, top_k, db, etag=etag)
+    response.headers.update(headers)
+    return payload
 
 @router.get("/{analysis_id}", response_model=CodeAnalysisResponse)
-def get_analysis(
+async def get_analysis(
     analysis_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific analysis by ID, verifying ownership"""
-    analysis = db.query(CodeAnalysis).filter(CodeAnalysis.id == analysis_id).first()
+    result = await db.execute(select(CodeAnalysis).where(CodeAnalysis.id == analysis_id))
+    analysis = result.scalar_one_or_none()
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
 
@@ -3,20 +3,34 @@ Authentication routes for user registration and login.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, release_connection
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.auth import LoginRequest, TokenResponse
-from app.utils.security import hash_password, verify_password, create_access_token
-from app.utils.dependencies import get_current_user
+from app.utils.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    hash_password_async,
+    verify_password_async
+)
+from app.utils.dependencies import Principal, get_current_user, get_current_user_model
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 
+def _hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
 
@@ -28,10 +42,11 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         Created user data (without password)
 
     Raises:
-        HTTPException: 400 if username or email already exists
+        HTTPException: 400 if username or email already exists, 503 if the hashing queue is full
     """
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    result = await db.execute(select(User).where(User.username == user_data.username))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,31 +54,37 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_email = result.scalar_one_or_none()
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Create new user
+    # Create new user (bcrypt runs on the dedicated hashing executor)
+    try:
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy_exception()
+
     new_user = User(
         username=user_data.username,
         email=user_data.email,
         full_name=user_data.full_name,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=hashed_password,
         is_active=True
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Login and get JWT access token.
 
@@ -75,13 +96,22 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
         JWT token and user data
 
     Raises:
-        HTTPException: 401 if credentials are invalid
+        HTTPException: 401 if credentials are invalid, 503 if the hashing queue is full
     """
     # Find user by username
-    user = db.query(User).filter(User.username == credentials.username).first()
+    result = await db.execute(select(User).where(User.username == credentials.username))
+    user = result.scalar_one_or_none()
 
     # Verify user exists and password is correct
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        await release_connection(db)
+        try:
+            verified, new_hash = await verify_password_async(credentials.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise _hasher_busy_exception()
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -95,6 +125,11 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
 
+    # Upgrade hashes created with old cost parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
 
@@ -106,7 +141,7 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_model)):
     """
     Get current authenticated user information.
 
@@ -120,7 +155,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
-async def logout(current_user: User = Depends(get_current_user)):
+async def logout(current_user: Principal = Depends(get_current_user)):
     """
     Logout the current user.
 
@@ -2,17 +2,19 @@
 Chatbot routes for AI programming assistance.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.conversation import Conversation
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import Principal, get_current_user
 from app.services.chatbot_service import get_chatbot_service
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter(prefix="/api/chat", tags=["chatbot"])
 
@@ -29,8 +31,9 @@ class ChatResponse(BaseModel):
 
 
 class ConversationMessage(BaseModel):
-    """Model for a conversation message in history"""
+    """Model for a conversation message in history (one side of an exchange)"""
     id: str
+    exchange_id: str
     message: str
     response: str
     role: str
@@ -43,8 +46,8 @@ class ConversationMessage(BaseModel):
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a message to the chatbot and get a response.
@@ -84,29 +87,129 @@ async def send_message(
         )
 
 
+@router.post("/message/stream")
+async def send_message_stream(
+    chat_request: ChatRequest,
+    request: Request,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Send a message to the chatbot, streaming the response as Server-Sent Events.
+
+    **Events**:
+    - `token`: `{"content": "..."}` for each chunk of the response as it is generated
+    - `complete`: `{"message", "response"}` once the full response is stored (same shape as `/api/chat/message`)
+    - `failed`: `{"detail": "..."}` if the response could not be completed
+
+    Both messages are stored only after the response completes. If the client
+    disconnects, the upstream generation is cancelled and nothing is stored.
+
+    Args:
+        chat_request: User's message
+        request: Incoming request (used to detect client disconnects)
+        current_user: Current authenticated user
+
+    Returns:
+        text/event-stream response
+    """
+    if not chat_request.message.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Message cannot be empty"
+        )
+
+    user_id = current_user.id
+    chatbot_service = get_chatbot_service()
+
+    async def event_stream():
+        stream = chatbot_service.chat_stream(user_id=user_id, message=chat_request.message)
+        try:
+            async for event, data in stream:
+                if await request.is_disconnected():
+                    print(f"⚠ Chat stream cancelled: client disconnected (user {user_id})")
+                    break
+                yield sse_event(event, data)
+
+        except Exception as e:
+            print(f"❌ Error in chat stream: {str(e)}")
+            yield sse_event("failed", {"detail": "Failed to process chat message"})
+
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.get("/history", response_model=List[ConversationMessage])
 async def get_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    before: Optional[str] = None,
+    limit: int = Query(25, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get conversation history for the current user.
 
+    Returns the `limit` most recent exchanges in chronological order, each as
+    a user message followed by the assistant response. Each message has its
+    own id ("<exchange id>:user" / "<exchange id>:assistant") and carries the
+    exchange it belongs to as `exchange_id`. To load older exchanges, pass the
+    `exchange_id` of the oldest message already shown as `before`.
+
     Args:
+        before: Only return exchanges older than this exchange id
+        limit: Maximum number of exchanges to return
         current_user: Current authenticated user
         db: Database session
 
     Returns:
         List of conversation messages
     """
+    query = select(
+        Conversation.id,
+        Conversation.message,
+        Conversation.response,
+        Conversation.created_at
+    ).where(Conversation.user_id == current_user.id)
+
+    if before:
+        anchor = (await db.execute(
+            select(Conversation.created_at, Conversation.id).where(
+                Conversation.id == before,
+                Conversation.user_id == current_user.id
+            )
+        )).first()
+        if anchor is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Message not found"
+            )
+        query = query.where(
+            tuple_(Conversation.created_at, Conversation.id) < tuple_(anchor.created_at, anchor.id)
+        )
+
     try:
-        conversations = db.query(Conversation).filter(
-            Conversation.user_id == current_user.id
-        ).order_by(
-            Conversation.created_at.asc()
-        ).all()
+        turns = (await db.execute(
+            query.order_by(
+                Conversation.created_at.desc(),
+                Conversation.id.desc()
+            ).limit(limit)
+        )).all()
 
-        return conversations
+        # Newest page was fetched first; return it oldest to newest
+        messages = []
+        for turn in reversed(turns):
+            if turn.message:
+                messages.append(ConversationMessage(
+                    id=f"{turn.id}:user", exchange_id=turn.id, message=turn.message, response="",
+                    role="user", created_at=turn.created_at
+                ))
+            if turn.response:
+                messages.append(ConversationMessage(
+                    id=f"{turn.id}:assistant", exchange_id=turn.id, message="", response=turn.response,
+                    role="assistant", created_at=turn.created_at
+                ))
+        return messages
 
     except Exception as e:
         print(f"❌ Error fetching history: {str(e)}")
@@ -118,8 +221,8 @@ async def get_history(
 
 @router.delete("/history", status_code=status.HTTP_200_OK)
 async def clear_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Clear conversation history for the current user.
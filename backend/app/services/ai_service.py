@@ -8,6 +8,8 @@ import asyncio
 import random
 from typing import Dict, Optional
 
+from app.services.analysis_result import AnalysisResult
+
 
 class AIService:
     """Service for interacting with AI code analysis model"""
@@ -16,30 +18,34 @@ class AIService:
         self.api_endpoint = api_endpoint
         self.api_key = api_key
         self.is_mock = api_endpoint is None
+        # Identifies the backend for the analysis result cache
+        self.model_version = "mock" if self.is_mock else f"remote:{api_endpoint}"
 
-    async def analyze_code(self, code: str, language: str) -> str:
+    async def analyze_code(self, code: str, language: str, hints: str = "") -> AnalysisResult:
         """
-        Analyze code and return AI-generated markdown response.
+        Analyze code with the AI model.
 
         Args:
             code: Source code to analyze
             language: Programming language (python, javascript, java, etc.)
+            hints: Static analysis findings to send along with the code (ignored by the mock)
 
         Returns:
-            Markdown-formatted string with errors, corrected code, and explanations
+            Result wrapping the markdown response with errors, corrected code, and explanations
         """
         if self.is_mock:
-            return await self._mock_analysis(code, language)
+            markdown = await self._mock_analysis(code, language)
         else:
-            return await self._real_analysis(code, language)
+            markdown = await self._real_analysis(code, language, hints)
+        return AnalysisResult(language, markdown=markdown)
 
-    async def _mock_analysis(self, code: str, language: str) -> str:
+    async def _mock_analysis(self, code: str, language: str, delay_seconds: Optional[float] = None) -> str:
         """
         Mock AI response for development and testing.
         Simulates realistic analysis with various error types.
         """
         # Simulate processing time
-        await asyncio.sleep(random.uniform(0.5, 1.5))
+        await asyncio.sleep(random.uniform(0.5, 1.5) if delay_seconds is None else delay_seconds)
 
         # Detect some common patterns for realistic mock
         has_indentation_issue = "    " not in code and "\t" not in code and "\n" in code
@@ -160,7 +166,7 @@ class AIService:
 
         return corrected.strip()
 
-    async def _real_analysis(self, code: str, language: str) -> str:
+    async def _real_analysis(self, code: str, language: str, hints: str = "") -> str:
         """
         Call actual AI model API.
         TODO: Implement when AI team provides endpoint.
@@ -168,6 +174,8 @@ class AIService:
         import aiohttp
 
         prompt = f"Explain the error in this {language} code snippet:\n\n{code}"
+        if hints:
+            prompt += f"\n\n{hints}"
 
         async with aiohttp.ClientSession() as session:
             async with session.post(
@@ -183,6 +191,47 @@ class AIService:
                 return result.get("response", "")
 
 
+class FakeAIService(AIService):
+    """
+    Offline stand-in for a model backend with configurable latency and failures.
+
+    Used to exercise the model router (latency ranking, circuit breaking and
+    hedging) without network access.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        failure_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        name: Optional[str] = None
+    ):
+        """
+        Args:
+            latency_ms: Typical response time (responses vary by +/-25%)
+            failure_rate: Probability (0-1) that a call raises
+            slow_rate: Probability (0-1) that a call takes 10x as long (tail latency)
+            name: Identifier used in cache keys
+        """
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.model_version = name or f"fake:{int(latency_ms)}"
+
+    async def analyze_code(self, code: str, language: str, hints: str = "") -> AnalysisResult:
+        latency = self.latency_ms * random.uniform(0.75, 1.25)
+        if random.random() < self.slow_rate:
+            latency *= 10
+
+        if random.random() < self.failure_rate:
+            await asyncio.sleep(latency / 2000)
+            raise Exception(f"Fake backend {self.model_version} failed")
+
+        markdown = await self._mock_analysis(code, language, delay_seconds=latency / 1000)
+        return AnalysisResult(language, markdown=markdown)
+
+
 # Global instance
 _ai_service_instance = None
 
@@ -193,6 +242,17 @@ def get_ai_service() -> AIService:
     global _ai_service_instance
 
     if _ai_service_instance is None:
+        # Several backends configured: route between them
+        if os.getenv("AI_BACKENDS", "").strip():
+            try:
+                from app.services.model_router import get_model_router
+                _ai_service_instance = get_model_router()
+                print(f"✓ Using AI model router: {', '.join(b.name for b in _ai_service_instance.backends)}")
+                return _ai_service_instance
+            except Exception as e:
+                print(f"⚠ Failed to initialize AI model router: {e}")
+                print("→ Falling back to single backend")
+
         # Check if Groq AI should be used
         use_groq = os.getenv("USE_GROQ_AI", "false").lower() == "true"
 
@@ -0,0 +1,184 @@
+"""
+Analysis result - the value returned by every AI service for one analysis.
+
+Structured backends (Groq) return the validated model output and markdown
+backends (mock, HTTP) return their markdown response. Either way the pipeline
+works from this object, so nothing is shared between concurrent calls, and the
+conversions between the two forms are done on first use only.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.services.parser_service import get_parser_service
+
+
+class ErrorDetail(BaseModel):
+    """Detailed information about a specific error instance"""
+    line: int = Field(description="Line number where error occurs")
+    message: str = Field(description="Brief description of the error")
+    codeSnippet: str = Field(description="The problematic code snippet")
+    suggestion: str = Field(description="Suggested fix for this error")
+
+
+class ErrorCategory(BaseModel):
+    """Category of errors with details"""
+    category: str = Field(description="Error type/category name (e.g., 'Syntax Error', 'Indentation Error')")
+    count: int = Field(description="Number of occurrences of this error type")
+    description: str = Field(description="General description of this error category")
+    icon: str = Field(description="Icon identifier (use 'X' for errors, '!' for warnings, '?' for suggestions)")
+    details: List[ErrorDetail] = Field(description="List of specific error instances with line numbers")
+
+
+class CodeAnalysisOutput(BaseModel):
+    """Structured output format for code analysis"""
+    errors: List[ErrorCategory] = Field(description="List of error categories found in the code")
+    corrected_code: str = Field(description="The corrected version of the code")
+    explanations: List[str] = Field(description="List of explanations for each error category")
+    recommendations: List[str] = Field(description="General recommendations to improve code quality")
+
+
+class AnalysisResult:
+    """Outcome of one AI analysis call"""
+
+    def __init__(
+        self,
+        language: str,
+        structured: Optional[CodeAnalysisOutput] = None,
+        markdown: Optional[str] = None,
+        cacheable: bool = True
+    ):
+        """
+        Args:
+            language: Language the code was analyzed as (request hint)
+            structured: Structured model output, if the backend produces one
+            markdown: Markdown response, if the backend produces one
+            cacheable: False for results that must not be reused for other
+                requests (fallback responses, results derived from a user's
+                earlier analysis, answers of a router's non-primary backend)
+        """
+        if structured is None and markdown is None:
+            raise ValueError("AnalysisResult needs a structured or markdown response")
+
+        self.language = language
+        self.structured = structured
+        self.cacheable = cacheable
+        self._markdown = markdown
+        self._parsed: Optional[Dict] = None
+
+    @classmethod
+    def from_cache(cls, cached: Dict, language: str) -> "AnalysisResult":
+        """
+        Rebuild a result from an analysis cache entry.
+
+        Args:
+            cached: {"ai_response": str | None, "structured_result": dict | None}
+            language: Language hint of the request
+        """
+        structured = cached.get("structured_result")
+        return cls(
+            language,
+            structured=CodeAnalysisOutput(**structured) if structured else None,
+            markdown=cached.get("ai_response")
+        )
+
+    @property
+    def markdown(self) -> str:
+        """Markdown form of the analysis (rendered from the structured output on first use)"""
+        if self._markdown is None:
+            self._markdown = to_markdown(self.structured, self.language)
+        return self._markdown
+
+    @property
+    def parsed(self) -> Dict:
+        """
+        Analysis in the parser service format: errors, corrected_code,
+        language, explanations and recommendations.
+
+        Structured output is mapped directly; markdown is parsed.
+        """
+        if self._parsed is None:
+            if self.structured is not None:
+                self._parsed = _parse_structured(self.structured, self.language)
+            else:
+                self._parsed = get_parser_service().parse_ai_response(self._markdown)
+        return self._parsed
+
+    @property
+    def raw_response(self) -> str:
+        """What the model returned: its JSON document or its markdown"""
+        if self.structured is not None:
+            return self.structured.model_dump_json()
+        return self._markdown
+
+    def cache_entry(self) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Returns:
+            (ai_response, structured_result) for the analysis cache; markdown is
+            only stored for results that have no structured form
+        """
+        if self.structured is not None:
+            return None, self.structured.model_dump()
+        return self._markdown, None
+
+
+def to_markdown(result: CodeAnalysisOutput, language: str) -> str:
+    """
+    Convert structured output to markdown format.
+    This maintains compatibility with the existing parser service.
+    """
+    # Build errors section
+    errors_section = "## Errors\n"
+    if result.errors:
+        for error_cat in result.errors:
+            errors_section += f"**{error_cat.category}**: {error_cat.description}\n"
+            if error_cat.details:
+                for detail in error_cat.details:
+                    errors_section += f"  - Line {detail.line}: {detail.message}\n"
+    else:
+        errors_section += "No errors found.\n"
+
+    # Build corrected code section
+    corrected_section = f"\n## Corrected Code\n```{language}\n{result.corrected_code}\n```\n"
+
+    # Build explanation section with error type prefixes
+    explanation_section = "\n## Explanation\n"
+    if result.errors:
+        for i, error_cat in enumerate(result.errors):
+            # Match explanations to error categories
+            if i < len(result.explanations):
+                explanation_section += f"**{error_cat.category}**: {result.explanations[i]}\n\n"
+    else:
+        for explanation in result.explanations:
+            explanation_section += f"{explanation}\n\n"
+
+    # Build recommendations section
+    recommendations_section = "\n## Recommendations\n"
+    for rec in result.recommendations:
+        recommendations_section += f"- {rec}\n"
+
+    # Combine all sections
+    markdown = f"{errors_section}{corrected_section}{explanation_section}{recommendations_section}"
+    return markdown
+
+
+def _parse_structured(result: CodeAnalysisOutput, language: str) -> Dict:
+    """Map structured output to the parser service format without a markdown round trip"""
+    return {
+        "errors": [
+            {
+                "type": error_cat.category,
+                "message": error_cat.description,
+                "line": error_cat.details[0].line if error_cat.details else None
+            }
+            for error_cat in result.errors
+        ],
+        "corrected_code": result.corrected_code.strip(),
+        "language": language or "unknown",
+        "explanations": [
+            {"error_type": error_cat.category, "explanation": explanation.strip()}
+            for error_cat, explanation in zip(result.errors, result.explanations)
+        ],
+        "recommendations": [rec.strip() for rec in result.recommendations]
+    }
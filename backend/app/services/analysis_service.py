@@ -2,13 +2,30 @@
 Analysis service - orchestrates AI analysis and data processing.
 """
 
+import asyncio
+import os
 import time
-from typing import Dict, List
-from sqlalchemy.orm import Session
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, release_connection
 
 from app.services.ai_service import get_ai_service
+from app.services.analysis_result import AnalysisResult
 from app.services.parser_service import get_parser_service
+from app.services.static_analyzer import StaticReport, get_static_analyzer
+from app.services.incremental_analyzer import IncrementalPlan, get_incremental_analyzer
+from app.services.cache_service import get_analysis_cache
+from app.services.rollup_service import get_rollup_service
+from app.services.dashboard_service import get_dashboard_service
 from app.models.code_analysis import CodeAnalysis
+from app.utils.diff import correction_ranges
+from app.utils.document import AnalysisDocument
+from app.utils.metrics import metrics
+
+# Maximum number of concurrent upstream AI calls per batch request
+ANALYZE_BATCH_CONCURRENCY = int(os.getenv("ANALYZE_BATCH_CONCURRENCY", "8"))
 
 
 class AnalysisService:
@@ -17,53 +34,465 @@ class AnalysisService:
     def __init__(self):
         self.ai_service = get_ai_service()
         self.parser = get_parser_service()
+        self.cache = get_analysis_cache()
+        self.rollups = get_rollup_service()
+        self.static_analyzer = get_static_analyzer()
+        self.incremental = get_incremental_analyzer()
+
+        # (user id, cache key) -> analysis in progress
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
 
     async def analyze_and_save(
         self,
         user_id: str,
         code: str,
         language: str,
-        db: Session
+        document_id: Optional[str] = None
     ) -> Dict:
         """
         Complete analysis workflow:
-        1. Call AI model with code
-        2. Parse AI markdown response
-        3. Save to database
-        4. Format response for frontend
+        1. Check the code locally (static analyzer); plain syntax errors it
+           repairs answer the request without the AI model in short_circuit mode
+        2. Reuse a cached AI result, or for a resubmitted file only send its
+           changed regions to the AI model (see incremental_analyzer), or call
+           AI model with the whole code (static findings go along as hints)
+        3. Read errors, corrected code and explanations from the result
+        4. Save to database
+        5. Format response for frontend
+
+        Identical concurrent requests from the same user (double clicks,
+        client retries) are coalesced: they await the same in-flight analysis
+        and share its saved result instead of calling the AI model again.
 
         Args:
             user_id: User performing the analysis
             code: Source code to analyze
             language: Programming language
+            document_id: Client-supplied id of the submitted file, if any
+
+        Returns:
+            Formatted response for frontend
+        """
+        model_version = self._model_version()
+        cache_key = self.cache.make_key(code, language, model_version)
+        flight_key = (user_id, cache_key)
+
+        flight = self._in_flight.get(flight_key)
+        if flight is None:
+            # Runs as its own task with its own session, so a cancelled leader
+            # request does not fail the requests waiting on it
+            flight = asyncio.create_task(
+                self._run_analysis(user_id, code, language, document_id, model_version, cache_key)
+            )
+            self._in_flight[flight_key] = flight
+            flight.add_done_callback(lambda task: self._end_flight(flight_key, task))
+            result, _ = await asyncio.shield(flight)
+            return result
+
+        metrics.inc("analyze_coalesced_requests")
+        result, called_upstream = await asyncio.shield(flight)
+        if called_upstream:
+            metrics.inc("analyze_upstream_calls_saved")
+        return result
+
+    def _end_flight(self, flight_key: Tuple[str, str], task: asyncio.Task) -> None:
+        self._in_flight.pop(flight_key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved; waiters re-raise it themselves, and a
+            # flight nobody awaits anymore should not be reported as unhandled
+            task.exception()
+
+    async def _run_analysis(
+        self,
+        user_id: str,
+        code: str,
+        language: str,
+        document_id: Optional[str],
+        model_version: str,
+        cache_key: str
+    ) -> Tuple[Dict, bool]:
+        """
+        Run one analysis with a dedicated database session.
+
+        Returns:
+            (formatted result, whether the AI model was called)
+        """
+        async with AsyncSessionLocal() as db:
+            start_time = time.time()
+            report = self.static_analyzer.analyze(code, language)
+            called_upstream = False
+
+            if report is not None and report.short_circuit:
+                metrics.inc("static_analysis_short_circuits")
+                analysis_result = report.to_result()
+            else:
+                # Get AI response (from cache when the same code was analyzed before)
+                cached = await self._cache_lookup(cache_key, db)
+
+                if cached:
+                    analysis_result = AnalysisResult.from_cache(cached, language)
+                else:
+                    plan = await self.incremental.find_plan(user_id, code, document_id, db)
+                    # Don't hold a pooled connection for the duration of the upstream call
+                    await release_connection(db)
+                    analysis_result = None
+                    if plan is not None:
+                        analysis_result = await self._analyze_changes(plan, language, report)
+                        # An unchanged resubmission is answered from the earlier analysis alone
+                        called_upstream = bool(plan.regions)
+                    if analysis_result is None:
+                        analysis_result = await self._call_ai(code, language, report)
+                        called_upstream = True
+                    await self._cache_result(cache_key, language, model_version, analysis_result, db)
+
+            processing_time_ms = int((time.time() - start_time) * 1000)
+
+            result = await self._save_and_format(
+                user_id, code, language, document_id, analysis_result, processing_time_ms, db
+            )
+            return result, called_upstream
+
+    async def analyze_stream(
+        self,
+        user_id: str,
+        code: str,
+        language: str,
+        document_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of analyze_and_save.
+
+        Yields ("error_category", category) for each error category as soon as
+        the model has finished writing it, then ("corrected_code", str) and
+        ("recommendations", List[str]). The analysis is saved once the model
+        output is complete and the formatted result is yielded as ("complete", dict).
+
+        Uses its own database session because the stream outlives the request's
+        dependency scope. Resubmissions analyzed incrementally are not streamed
+        live: their findings are only complete once merged with the earlier ones.
+
+        Args:
+            user_id: User performing the analysis
+            code: Source code to analyze
+            language: Programming language
+            document_id: Client-supplied id of the submitted file, if any
+        """
+        db = AsyncSessionLocal()
+        try:
+            start_time = time.time()
+            model_version = self._model_version()
+            cache_key = self.cache.make_key(code, language, model_version)
+            report = self.static_analyzer.analyze(code, language)
+            short_circuit = report is not None and report.short_circuit
+            cached = None if short_circuit else await self._cache_lookup(cache_key, db)
+            incremental = None
+            if not short_circuit and not cached:
+                plan = await self.incremental.find_plan(user_id, code, document_id, db)
+                if plan is not None:
+                    await release_connection(db)
+                    incremental = await self._analyze_changes(plan, language, report)
+            # Events already sent live; anything else is replayed from the saved result
+            streamed = set()
+
+            if short_circuit:
+                metrics.inc("static_analysis_short_circuits")
+                analysis_result = report.to_result()
+            elif cached:
+                analysis_result = AnalysisResult.from_cache(cached, language)
+            elif incremental is not None:
+                analysis_result = incremental
+            elif hasattr(self.ai_service, "stream_analysis"):
+                await release_connection(db)
+                analysis_result = None
+                # Live categories are checked against the submitted code only (no corrected code yet)
+                document = AnalysisDocument(code, None)
+                llm_start = time.perf_counter()
+
+                async for name, value in self.ai_service.stream_analysis(code, language, self._hints(report)):
+                    if name == "error_category":
+                        streamed.add(name)
+                        yield name, self._format_error_category(value, document)
+                    elif name in ("corrected_code", "recommendations"):
+                        streamed.add(name)
+                        yield name, value
+                    elif name == "result":
+                        analysis_result = value
+
+                metrics.observe("analysis_tier_latency_ms.llm", (time.perf_counter() - llm_start) * 1000)
+                await self._cache_result(cache_key, language, model_version, analysis_result, db)
+            else:
+                await release_connection(db)
+                analysis_result = await self._call_ai(code, language, report)
+                await self._cache_result(cache_key, language, model_version, analysis_result, db)
+
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            result = await self._save_and_format(
+                user_id, code, language, document_id, analysis_result, processing_time_ms, db
+            )
+
+            # Cached and non-streaming results arrive all at once; replay them in stream order
+            if "error_category" not in streamed:
+                for category in result["errors"]:
+                    yield "error_category", category
+            if "corrected_code" not in streamed:
+                yield "corrected_code", result["correctedCode"]
+            if "recommendations" not in streamed:
+                yield "recommendations", result["recommendations"]
+
+            yield "complete", result
+        finally:
+            await db.close()
+
+    async def analyze_batch(
+        self,
+        user_id: str,
+        files: List[Dict]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Analyze many files with bounded upstream concurrency.
+
+        Files are sent to the AI service at most ANALYZE_BATCH_CONCURRENCY at a
+        time. Each file's result is yielded as ("file_result", {...}) or
+        ("file_failed", {...}) as soon as it finishes, in completion order.
+        All analyses are inserted in a single commit at the end, followed by
+        ("complete", summary).
+
+        Args:
+            user_id: User performing the analysis
+            files: List of {"path": str, "code": str, "language": str}
+        """
+        db = AsyncSessionLocal()
+        tasks = []
+        try:
+            model_version = self._model_version()
+            semaphore = asyncio.Semaphore(ANALYZE_BATCH_CONCURRENCY)
+
+            # Static checks take milliseconds; files they answer skip the cache and the AI model
+            reports = [self.static_analyzer.analyze(f["code"], f["language"]) for f in files]
+
+            # Cache lookups share one session, so they run before the fan-out
+            keys = [self.cache.make_key(f["code"], f["language"], model_version) for f in files]
+            cached = [
+                None if report is not None and report.short_circuit else await self._cache_lookup(key, db)
+                for key, report in zip(keys, reports)
+            ]
+            await release_connection(db)
+
+            async def run(index: int) -> Tuple[int, Optional[AnalysisResult], int]:
+                start_time = time.time()
+                report = reports[index]
+                if report is not None and report.short_circuit:
+                    metrics.inc("static_analysis_short_circuits")
+                    return index, report.to_result(), int((time.time() - start_time) * 1000)
+                if cached[index]:
+                    return index, AnalysisResult.from_cache(cached[index], files[index]["language"]), 0
+
+                try:
+                    async with semaphore:
+                        analysis_result = await self._call_ai(
+                            files[index]["code"], files[index]["language"], report
+                        )
+                except Exception as e:
+                    print(f"❌ Batch analysis failed for {files[index]['path']}: {str(e)}")
+                    metrics.inc("analyze_batch_file_failures")
+                    return index, None, 0
+
+                return index, analysis_result, int((time.time() - start_time) * 1000)
+
+            tasks = [asyncio.create_task(run(i)) for i in range(len(files))]
+            analyses = []
+            fresh = []
+            failed = 0
+
+            for next_done in asyncio.as_completed(tasks):
+                index, analysis_result, processing_time_ms = await next_done
+                file = files[index]
+
+                if analysis_result is None:
+                    failed += 1
+                    yield "file_failed", {
+                        "index": index,
+                        "path": file["path"],
+                        "detail": "Failed to analyze code"
+                    }
+                    continue
+
+                if not cached[index]:
+                    fresh.append((index, analysis_result))
+
+                analysis = self._build_analysis(
+                    user_id, file["code"], file["language"], analysis_result, processing_time_ms
+                )
+                analyses.append(analysis)
+                result = self._format(analysis, analysis_result)
+
+                yield "file_result", {"index": index, "path": file["path"], "result": result}
+
+            # Single bulk write for the whole batch; the cache writes wait for it
+            # too, so no connection is held during the fan-out
+            for index, analysis_result in fresh:
+                await self._cache_result(keys[index], files[index]["language"], model_version, analysis_result, db)
+            db.add_all(analyses)
+            await self.rollups.record_analyses(analyses, db)
+            await db.commit()
+            get_dashboard_service().invalidate(user_id)
+
+            yield "complete", {
+                "analyzed": len(analyses),
+                "failed": failed,
+                "ids": [analysis.id for analysis in analyses]
+            }
+        finally:
+            # Stop outstanding upstream calls if the client went away mid-batch
+            for task in tasks:
+                task.cancel()
+            await db.close()
+
+    def _model_version(self) -> str:
+        """Identifier of the AI backend (and of the hints its prompts include) used in cache keys"""
+        base = getattr(self.ai_service, "model_version", type(self.ai_service).__name__)
+        return base + self.static_analyzer.version_tag
+
+    def _hints(self, report: Optional[StaticReport]) -> str:
+        """Prompt hints from a static report"""
+        hints = report.to_hints() if report is not None else ""
+        if hints:
+            metrics.inc("static_analysis_hinted_calls")
+        return hints
+
+    async def _cache_lookup(self, cache_key: str, db: AsyncSession) -> Optional[Dict]:
+        """Cache lookup, timed as the cache tier"""
+        start = time.perf_counter()
+        cached = await self.cache.get(cache_key, db)
+        metrics.observe("analysis_tier_latency_ms.cache", (time.perf_counter() - start) * 1000)
+        return cached
+
+    async def _call_ai(
+        self,
+        code: str,
+        language: str,
+        report: Optional[StaticReport],
+        context: str = ""
+    ) -> AnalysisResult:
+        """AI model call with the static findings (and any context note) as hints, timed as the LLM tier"""
+        hints = "\n\n".join(part for part in (self._hints(report), context) if part)
+        start = time.perf_counter()
+        analysis_result = await self.ai_service.analyze_code(code, language, hints=hints)
+        metrics.observe("analysis_tier_latency_ms.llm", (time.perf_counter() - start) * 1000)
+        return analysis_result
+
+    async def _analyze_changes(
+        self,
+        plan: IncrementalPlan,
+        language: str,
+        report: Optional[StaticReport]
+    ) -> Optional[AnalysisResult]:
+        """
+        Analyze a resubmitted file from the changed regions of an incremental plan.
+
+        Returns:
+            Result for the whole file (not cacheable), or None when it has to be
+            analyzed in full (the model failed or its corrections cannot be placed
+            in the file)
+        """
+        excerpt = None
+        if plan.regions:
+            excerpt_result = await self._call_ai(plan.excerpt, language, plan.static_report(report), plan.hints())
+            excerpt = excerpt_result.structured
+            if excerpt is None:
+                metrics.inc("incremental_fallbacks")
+                return None
+
+        merged = plan.merge(excerpt)
+        if merged is None:
+            metrics.inc("incremental_fallbacks")
+            return None
+
+        metrics.inc("incremental_analyses")
+        metrics.inc("incremental_lines_sent", len(plan.excerpt_lines))
+        metrics.inc("incremental_lines_total", plan.line_count)
+        # Built from this user's earlier analysis, so never shared through the cache
+        return AnalysisResult(language, structured=merged, cacheable=False)
+
+    async def _cache_result(
+        self,
+        cache_key: str,
+        language: str,
+        model_version: str,
+        analysis_result: AnalysisResult,
+        db: AsyncSession
+    ) -> None:
+        """Store a fresh AI result in the cache"""
+        # Fallback responses for failed upstream calls are never cached
+        if analysis_result.cacheable:
+            ai_response, structured_result = analysis_result.cache_entry()
+            await self.cache.put(cache_key, language, model_version, ai_response, structured_result, db)
+
+    async def _save_and_format(
+        self,
+        user_id: str,
+        code: str,
+        language: str,
+        document_id: Optional[str],
+        analysis_result: AnalysisResult,
+        processing_time_ms: int,
+        db: AsyncSession
+    ) -> Dict:
+        """
+        Save the analysis and format it for the frontend.
+
+        Args:
+            user_id: User performing the analysis
+            code: Source code that was analyzed
+            language: Language hint from the request
+            document_id: Client-supplied id of the submitted file, if any
+            analysis_result: Result from the AI service or the cache
+            processing_time_ms: Time spent obtaining the AI response
             db: Database session
 
         Returns:
             Formatted response for frontend
         """
-        # Step 1: Get AI response
-        start_time = time.time()
-        ai_response = await self.ai_service.analyze_code(code, language)
-        processing_time_ms = int((time.time() - start_time) * 1000)
+        analysis = self._build_analysis(
+            user_id, code, language, analysis_result, processing_time_ms, document_id
+        )
 
-        # Step 2: Check if we have structured output from Groq
-        structured_result = None
-        if hasattr(self.ai_service, 'get_last_structured_result'):
-            structured_result = self.ai_service.get_last_structured_result()
+        # Save to database (cache hits are saved too so history and analytics stay correct)
+        db.add(analysis)
+        await self.rollups.record_analyses([analysis], db)
+        await db.commit()
+        get_dashboard_service().invalidate(user_id)
 
-        # Step 2b: Parse response (fallback for non-Groq services)
-        parsed = self.parser.parse_ai_response(ai_response)
+        # Format for frontend
+        return self._format(analysis, analysis_result)
+
+    def _build_analysis(
+        self,
+        user_id: str,
+        code: str,
+        language: str,
+        analysis_result: AnalysisResult,
+        processing_time_ms: int,
+        document_id: Optional[str] = None
+    ) -> CodeAnalysis:
+        """
+        Build an unsaved CodeAnalysis row from an AI result.
+
+        The id is assigned up front so the row can be formatted before it is flushed.
+        """
+        parsed = analysis_result.parsed
 
         # Use detected language from AI if available, otherwise use provided language
         detected_language = parsed.get("language", "unknown")
         final_language = detected_language if detected_language != "unknown" else language
 
-        # Step 3: Save to database
         analysis = CodeAnalysis(
+            id=str(uuid.uuid4()),
             user_id=user_id,
             code_content=code,
             language=final_language,
-            ai_raw_response=ai_response,
+            document_id=document_id,
+            ai_raw_response=analysis_result.raw_response,
             corrected_code=parsed["corrected_code"],
             errors=parsed["errors"],  # Stored as JSON
             explanations=parsed["explanations"],
@@ -72,17 +501,24 @@ class AnalysisService:
             processing_time_ms=processing_time_ms
         )
 
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+        return analysis
 
-        # Step 4: Format for frontend
-        if structured_result:
-            return self._format_from_structured(analysis, structured_result, parsed)
-        else:
-            return self._format_for_frontend(analysis, parsed)
+    def _format(self, analysis: CodeAnalysis, analysis_result: AnalysisResult) -> Dict:
+        """
+        Format an analysis for the frontend from its structured output when there is one.
 
-    def _format_for_frontend(self, analysis: CodeAnalysis, parsed: Dict) -> Dict:
+        The submitted and corrected code are line-indexed once here and shared
+        by every per-error lookup.
+        """
+        if analysis_result.structured is not None:
+            structured = analysis_result.structured
+            document = AnalysisDocument(analysis.code_content, structured.corrected_code)
+            return self._format_from_structured(analysis, structured, document)
+
+        document = AnalysisDocument(analysis.code_content, analysis.corrected_code)
+        return self._format_for_frontend(analysis, analysis_result.parsed, document)
+
+    def _format_for_frontend(self, analysis: CodeAnalysis, parsed: Dict, document: AnalysisDocument) -> Dict:
         """
         Transform analysis data into frontend-expected format.
 
@@ -90,7 +526,10 @@ class AnalysisService:
         {
             id: string,
             correctedCode: string,
-            corrections: string[],  # For underlining
+            corrections: string[],  # Replacement texts, for underlining
+            correctionRanges: [     # Exact edits in the submitted code
+                {line, col, endLine, endCol, length, replacement}
+            ],
             errors: [
                 {
                     category: string,
@@ -105,6 +544,7 @@ class AnalysisService:
         """
         # Group errors by type (same error type may appear multiple times)
         error_groups = {}
+        explanations = self.parser.index_explanations(parsed["explanations"])
 
         for idx, error in enumerate(parsed["errors"]):
             error_type = error["type"]
@@ -121,76 +561,78 @@ class AnalysisService:
             # Increment count
             error_groups[error_type]["count"] += 1
 
-            # Extract line number if present
-            line_number = self.parser.extract_line_numbers(error["message"])
+            # Extract line number if present and it exists in the submitted code
+            line_number = document.validate_line(self.parser.extract_line_numbers(error["message"]))
 
             # Find explanation for this error
-            explanation = self.parser.find_explanation_for_error(
-                error_type,
-                parsed["explanations"]
-            )
+            explanation = self.parser.find_explanation_for_error(error_type, explanations)
 
             # Add detail entry
             error_groups[error_type]["details"].append({
                 "line": line_number or 0,
                 "message": error["message"],
-                "codeSnippet": self._extract_code_snippet(
-                    analysis.code_content,
-                    line_number
-                ),
-                "correction": self._extract_correction_snippet(
-                    analysis.corrected_code,
-                    line_number
-                ),
+                "codeSnippet": document.code_snippet(line_number),
+                "correction": document.correction_snippet(line_number),
                 "explanation": explanation
             })
 
         return {
             "id": analysis.id,
             "correctedCode": analysis.corrected_code or analysis.code_content,
-            "corrections": self._extract_corrections(
-                analysis.corrected_code or analysis.code_content,
-                analysis.code_content
-            ),
+            **self._extract_corrections(document),
             "errors": list(error_groups.values()),
             "recommendations": parsed.get("recommendations", [])
         }
 
-    def _format_from_structured(self, analysis: CodeAnalysis, structured_result, parsed: Dict) -> Dict:
+    def _format_from_structured(
+        self,
+        analysis: CodeAnalysis,
+        structured_result,
+        document: AnalysisDocument
+    ) -> Dict:
         """
         Format response using structured Groq output directly.
         This preserves all the detailed information from the AI.
         """
-        errors_formatted = []
-
-        for error_cat in structured_result.errors:
-            errors_formatted.append({
-                "category": error_cat.category,
-                "count": error_cat.count,
-                "description": error_cat.description,
-                "icon": error_cat.icon,
-                "details": [
-                    {
-                        "line": detail.line,
-                        "message": detail.message,
-                        "codeSnippet": detail.codeSnippet,
-                        "correction": detail.suggestion,  # Use suggestion as correction
-                        "explanation": detail.suggestion
-                    } for detail in error_cat.details
-                ]
-            })
+        errors_formatted = [
+            self._format_error_category(error_cat, document)
+            for error_cat in structured_result.errors
+        ]
 
         return {
             "id": analysis.id,
             "correctedCode": structured_result.corrected_code,
-            "corrections": self._extract_corrections(
-                structured_result.corrected_code,
-                analysis.code_content
-            ),
+            **self._extract_corrections(document),
             "errors": errors_formatted,
             "recommendations": structured_result.recommendations
         }
 
+    def _format_error_category(self, error_cat, document: AnalysisDocument) -> Dict:
+        """
+        Format a structured Groq error category for the frontend.
+
+        Line numbers outside the submitted code are reported as 0, and a
+        missing snippet is taken from the submitted line.
+        """
+        details = []
+        for detail in error_cat.details:
+            line_number = document.validate_line(detail.line)
+            details.append({
+                "line": line_number or 0,
+                "message": detail.message,
+                "codeSnippet": detail.codeSnippet or (document.code_snippet(line_number) if line_number else ""),
+                "correction": detail.suggestion,  # Use suggestion as correction
+                "explanation": detail.suggestion
+            })
+
+        return {
+            "category": error_cat.category,
+            "count": error_cat.count,
+            "description": error_cat.description,
+            "icon": error_cat.icon,
+            "details": details
+        }
+
     def _get_icon_for_error(self, error_type: str) -> str:
         """Map error type to icon"""
         error_lower = error_type.lower()
@@ -215,54 +657,28 @@ class AnalysisService:
 
         return "X"  # Default icon
 
-    def _extract_code_snippet(self, code: str, line_number: int = None) -> str:
-        """Extract relevant code snippet around error line"""
-        if not line_number or not code:
-            # Return first 50 characters as preview
-            return code[:50] + "..." if len(code) > 50 else code
-
-        lines = code.split('\n')
-        if line_number > len(lines):
-            return lines[0] if lines else ""
-
-        # Return the error line (1-indexed)
-        return lines[line_number - 1] if line_number <= len(lines) else ""
-
-    def _extract_correction_snippet(self, corrected_code: str, line_number: int = None) -> str:
-        """Extract corrected code snippet"""
-        if not corrected_code:
-            return ""
-
-        if not line_number:
-            return corrected_code[:50] + "..." if len(corrected_code) > 50 else corrected_code
-
-        lines = corrected_code.split('\n')
-        if line_number > len(lines):
-            return lines[0] if lines else ""
-
-        return lines[line_number - 1] if line_number <= len(lines) else ""
-
-    def _extract_corrections(self, corrected: str, original: str) -> List[str]:
+    def _extract_corrections(self, document: AnalysisDocument) -> Dict:
         """
-        Extract list of corrections made (for frontend underlining).
+        Diff the submitted code against the corrected code.
 
-        This is a simple word-level diff.
-        TODO: Implement more sophisticated diff algorithm.
+        Returns:
+            {"correctionRanges": exact edits (see app.utils.diff.correction_ranges),
+             "corrections": up to 10 distinct replacement texts, for clients that
+             underline by searching the corrected code}
         """
+        original, corrected = document.original.text, document.corrected.text
         if not corrected or corrected == original:
-            return []
+            return {"corrections": [], "correctionRanges": []}
 
-        # Simple approach: find words that appear in corrected but not in original
-        original_words = set(original.split())
-        corrected_words = corrected.split()
+        ranges = correction_ranges(original, corrected)
 
         corrections = []
-        for word in corrected_words:
-            if word not in original_words and len(word) > 2:  # Filter short words
-                corrections.append(word)
+        for edit in ranges:
+            text = edit["replacement"].strip()
+            if len(text) > 2 and text not in corrections:  # Filter short fragments
+                corrections.append(text)
 
-        # Limit to 10 corrections for performance
-        return corrections[:10]
+        return {"corrections": corrections[:10], "correctionRanges": ranges}
 
     def _generate_recommendations(self, errors: List[Dict]) -> List[str]:
         """
@@ -2,22 +2,23 @@
 Analytics service for computing user statistics and progress metrics.
 """
 
-from sqlalchemy import func, text
-from sqlalchemy.orm import Session
-from typing import List, Dict
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
 
-from app.models.code_analysis import CodeAnalysis
+from app.models.analytics_rollup import UserDailyStats, UserDailyErrorCount, UserStatsTotals
 
 
 class AnalyticsService:
     """Service for analytics and statistics computation"""
 
-    def get_top_errors(self, user_id: str, top_k: int, db: Session) -> List[Dict]:
+    async def get_top_errors(self, user_id: str, top_k: int, db: AsyncSession) -> List[Dict]:
         """
         Get TOP K most frequent error types for a user.
 
-        Uses PostgreSQL JSON functions to extract and count error types
-        from the dynamic errors JSON field.
+        Reads the per-day error type rollup, so the cost depends on the number
+        of distinct (day, error type) pairs rather than on the size of the
+        user's analysis history.
 
         Args:
             user_id: User ID to get stats for
@@ -27,24 +28,20 @@ class AnalyticsService:
         Returns:
             List of dictionaries with error_type, count, and percentage
         """
-        # Query to extract error types from JSON array and count them
-        query = text("""
-            SELECT
-                error->>'type' as error_type,
-                COUNT(*) as count
-            FROM
-                code_analyses,
-                json_array_elements(CAST(errors AS json)) as error
-            WHERE
-                user_id = :user_id
-                AND errors IS NOT NULL
-            GROUP BY error_type
-            ORDER BY count DESC
-            LIMIT :top_k
-        """)
-
-        result = db.execute(query, {"user_id": user_id, "top_k": top_k})
-        rows = result.fetchall()
+        total_count = func.sum(UserDailyErrorCount.count).label('count')
+        result = await db.execute(
+            select(
+                UserDailyErrorCount.error_type,
+                total_count
+            ).where(
+                UserDailyErrorCount.user_id == user_id
+            ).group_by(
+                UserDailyErrorCount.error_type
+            ).order_by(
+                total_count.desc()
+            ).limit(top_k)
+        )
+        rows = result.all()
 
         if not rows:
             return []
@@ -55,13 +52,13 @@ class AnalyticsService:
         return [
             {
                 "error_type": row[0],
-                "count": row[1],
+                "count": int(row[1]),
                 "percentage": round((row[1] / total) * 100, 1) if total > 0 else 0
             }
             for row in rows
         ]
 
-    def get_monthly_progress(self, user_id: str, db: Session) -> List[Dict]:
+    async def get_monthly_progress(self, user_id: str, db: AsyncSession) -> List[Dict]:
         """
         Get total errors per month for progress visualization.
 
@@ -72,19 +69,50 @@ class AnalyticsService:
         Returns:
             List of {"date": "YYYY-MM", "errors": count}
         """
-        result = db.query(
-            func.to_char(CodeAnalysis.created_at, 'YYYY-MM').label('month'),
-            func.sum(CodeAnalysis.total_errors).label('total')
-        ).filter(
-            CodeAnalysis.user_id == user_id
-        ).group_by('month').order_by('month').all()
+        result = (await db.execute(
+            select(
+                func.to_char(UserDailyStats.day, 'YYYY-MM').label('month'),
+                func.sum(UserDailyStats.error_count).label('total')
+            ).where(
+                UserDailyStats.user_id == user_id
+            ).group_by('month').order_by('month')
+        )).all()
 
         return [
             {"date": row.month, "errors": int(row.total) if row.total else 0}
             for row in result
         ]
 
-    def get_error_breakdown_by_month(self, user_id: str, db: Session) -> List[Dict]:
+    async def get_monthly_average_errors(self, user_id: str, db: AsyncSession) -> List[Dict]:
+        """
+        Get average errors per analysis for each month.
+
+        Args:
+            user_id: User ID
+            db: Database session
+
+        Returns:
+            List of {"date": "YYYY-MM-01", "errors": average}
+        """
+        result = (await db.execute(
+            select(
+                func.date_trunc('month', UserDailyStats.day).label('month'),
+                func.sum(UserDailyStats.error_count).label('errors'),
+                func.sum(UserDailyStats.analysis_count).label('analyses')
+            ).where(
+                UserDailyStats.user_id == user_id
+            ).group_by('month').order_by('month')
+        )).all()
+
+        return [
+            {
+                "date": row.month.strftime('%Y-%m-%d'),
+                "errors": int(row.errors / row.analyses) if row.analyses else 0
+            }
+            for row in result
+        ]
+
+    async def get_error_breakdown_by_month(self, user_id: str, db: AsyncSession) -> List[Dict]:
         """
         Get breakdown of TOP error types grouped by month.
 
@@ -95,29 +123,22 @@ class AnalyticsService:
         Returns:
             List of monthly breakdowns with error categories
         """
-        # Get all analyses for user
-        analyses = db.query(CodeAnalysis).filter(
-            CodeAnalysis.user_id == user_id
-        ).order_by(CodeAnalysis.created_at).all()
+        rows = (await db.execute(
+            select(
+                func.date_trunc('month', UserDailyErrorCount.day).label('month'),
+                UserDailyErrorCount.error_type,
+                func.sum(UserDailyErrorCount.count).label('count')
+            ).where(
+                UserDailyErrorCount.user_id == user_id
+            ).group_by('month', UserDailyErrorCount.error_type).order_by('month')
+        )).all()
 
         # Group by month and aggregate error types
         monthly_data = {}
 
-        for analysis in analyses:
-            if not analysis.errors:
-                continue
-
-            month_key = analysis.created_at.strftime('%B %Y')
-
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {}
-
-            # Count each error type
-            for error in analysis.errors:
-                error_type = error.get("type", "Unknown")
-                if error_type not in monthly_data[month_key]:
-                    monthly_data[month_key][error_type] = 0
-                monthly_data[month_key][error_type] += 1
+        for row in rows:
+            month_key = row.month.strftime('%B %Y')
+            monthly_data.setdefault(month_key, {})[row.error_type] = int(row.count)
 
         # Format for frontend
         result = []
@@ -131,49 +152,59 @@ class AnalyticsService:
 
         return result
 
-    def get_user_day_streak(self, user_id: str, db: Session) -> int:
+    async def get_user_day_streak(self, user_id: str, db: AsyncSession) -> int:
         """
         Calculate consecutive days streak for a user.
 
+        Gaps-and-islands over the daily rollup: consecutive days share the same
+        (day - row_number) value, and the streak is the size of the island that
+        contains today.
+
         Args:
             user_id: User ID
             db: Database session
 
         Returns:
-            Number of consecutive days with at least one analysis
+            Number of consecutive days with at least one analysis, ending today
         """
-        from datetime import date, timedelta
-
-        # Get unique dates (only date part, not time)
-        analyses = db.query(CodeAnalysis).filter(
-            CodeAnalysis.user_id == user_id
-        ).order_by(CodeAnalysis.created_at).all()
-
-        if not analyses:
-            return 0
-
-        # Get unique dates
-        analysis_dates = sorted(set(
-            analysis.created_at.date() for analysis in analyses
-        ), reverse=True)
-
-        # Calculate streak starting from today
-        today = date.today()
-        streak = 0
-        current_date = today
-
-        for analysis_date in analysis_dates:
-            # Check if this date is consecutive
-            if analysis_date == current_date:
-                streak += 1
-                current_date -= timedelta(days=1)
-            elif analysis_date < current_date:
-                # Gap found, break
-                break
-
-        return streak
-
-    def get_most_common_error(self, user_id: str, db: Session) -> str:
+        query = text("""
+            WITH islands AS (
+                SELECT
+                    day,
+                    day - CAST(ROW_NUMBER() OVER (ORDER BY day) AS INTEGER) AS island
+                FROM user_daily_stats
+                WHERE
+                    user_id = :user_id
+                    AND day <= CURRENT_DATE
+            )
+            SELECT COUNT(*)
+            FROM islands
+            WHERE island = (SELECT island FROM islands WHERE day = CURRENT_DATE)
+        """)
+
+        result = await db.execute(query, {"user_id": user_id})
+        return int(result.scalar() or 0)
+
+    async def get_user_stats(self, user_id: str, db: AsyncSession) -> Dict:
+        """
+        Get profile statistics without loading any analysis rows.
+
+        Args:
+            user_id: User ID
+            db: Database session
+
+        Returns:
+            {"total_analyses": int, "errors_fixed": int, "day_streak": int}
+        """
+        totals = await self._get_totals(user_id, db)
+
+        return {
+            "total_analyses": totals.total_analyses if totals else 0,
+            "errors_fixed": totals.total_errors if totals else 0,
+            "day_streak": await self.get_user_day_streak(user_id, db)
+        }
+
+    async def get_most_common_error(self, user_id: str, db: AsyncSession) -> str:
         """
         Get the most common error type for a user.
 
@@ -184,14 +215,14 @@ class AnalyticsService:
         Returns:
             Most common error type name
         """
-        top_errors = self.get_top_errors(user_id, 1, db)
+        top_errors = await self.get_top_errors(user_id, 1, db)
 
         if top_errors:
             return top_errors[0]["error_type"]
 
         return "No errors yet"
 
-    def get_improvement_rate(self, user_id: str, db: Session) -> float:
+    async def get_improvement_rate(self, user_id: str, db: AsyncSession) -> float:
         """
         Calculate error reduction rate (improvement percentage).
 
@@ -204,7 +235,7 @@ class AnalyticsService:
         Returns:
             Improvement percentage (0-100)
         """
-        monthly_progress = self.get_monthly_progress(user_id, db)
+        monthly_progress = await self.get_monthly_progress(user_id, db)
 
         if len(monthly_progress) < 2:
             return 0.0
@@ -222,7 +253,7 @@ class AnalyticsService:
         # Return positive number (0-100), capped at 100
         return max(0.0, min(100.0, improvement))
 
-    def get_average_errors(self, user_id: str, db: Session) -> float:
+    async def get_average_errors(self, user_id: str, db: AsyncSession) -> float:
         """
         Calculate average errors per analysis session.
 
@@ -233,18 +264,14 @@ class AnalyticsService:
         Returns:
             Average errors per analysis
         """
-        result = db.query(
-            func.avg(CodeAnalysis.total_errors).label('avg_errors')
-        ).filter(
-            CodeAnalysis.user_id == user_id
-        ).first()
+        totals = await self._get_totals(user_id, db)
 
-        if result and result.avg_errors:
-            return round(float(result.avg_errors), 1)
+        if totals and totals.total_analyses:
+            return round(totals.total_errors / totals.total_analyses, 1)
 
         return 0.0
 
-    def get_best_score(self, user_id: str, db: Session) -> int:
+    async def get_best_score(self, user_id: str, db: AsyncSession) -> int:
         """
         Get the lowest error count (best score) from all analyses.
 
@@ -255,18 +282,18 @@ class AnalyticsService:
         Returns:
             Lowest error count
         """
-        result = db.query(
-            func.min(CodeAnalysis.total_errors).label('min_errors')
-        ).filter(
-            CodeAnalysis.user_id == user_id
-        ).first()
+        totals = await self._get_totals(user_id, db)
 
-        if result and result.min_errors is not None:
-            return int(result.min_errors)
+        if totals and totals.min_errors is not None:
+            return int(totals.min_errors)
 
         return 0
 
-    def get_progress_metrics(self, user_id: str, db: Session) -> Dict:
+    async def _get_totals(self, user_id: str, db: AsyncSession) -> Optional[UserStatsTotals]:
+        """Get the lifetime totals rollup row for a user"""
+        return await db.get(UserStatsTotals, user_id)
+
+    async def get_progress_metrics(self, user_id: str, db: AsyncSession) -> Dict:
         """
         Get all progress metrics for the user in one call.
 
@@ -278,9 +305,9 @@ class AnalyticsService:
             }
         """
         return {
-            "improvement": self.get_improvement_rate(user_id, db),
-            "avg_errors": self.get_average_errors(user_id, db),
-            "best_score": self.get_best_score(user_id, db)
+            "improvement": await self.get_improvement_rate(user_id, db),
+            "avg_errors": await self.get_average_errors(user_id, db),
+            "best_score": await self.get_best_score(user_id, db)
         }
 
 
@@ -0,0 +1,254 @@
+"""
+Content-addressed cache for AI analysis results.
+
+Identical submissions (same normalized code, language and model/prompt
+version) reuse the previous AI output instead of paying for another
+upstream round trip. Results live in two tiers: an in-process LRU for the
+hot set and the analysis_cache table so hits survive restarts and are
+shared between workers.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
+
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_MEMORY_SIZE = int(os.getenv("ANALYSIS_CACHE_MEMORY_SIZE", "512"))
+ANALYSIS_CACHE_MAX_ROWS = int(os.getenv("ANALYSIS_CACHE_MAX_ROWS", "50000"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_PRUNE_EVERY = int(os.getenv("ANALYSIS_CACHE_PRUNE_EVERY", "100"))
+# Memory-tier hits refresh the database row at most this often per key
+ANALYSIS_CACHE_TOUCH_SECONDS = int(os.getenv("ANALYSIS_CACHE_TOUCH_SECONDS", "300"))
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalize code so cosmetic differences do not defeat the cache.
+
+    Line endings are unified, trailing whitespace is stripped from every line
+    and leading/trailing blank lines are dropped. Indentation is preserved
+    because it is significant in several languages.
+    """
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class AnalysisCacheService:
+    """Two-tier (memory + database) cache of AI analysis results"""
+
+    def __init__(self):
+        self.enabled = ANALYSIS_CACHE_ENABLED
+        self.ttl = timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS)
+        self.memory = LRUCache(maxsize=ANALYSIS_CACHE_MEMORY_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS)
+        self._puts_since_prune = 0
+        # Keys whose row was refreshed within ANALYSIS_CACHE_TOUCH_SECONDS, and
+        # memory hits not yet written to their row
+        self._touched = LRUCache(maxsize=ANALYSIS_CACHE_MEMORY_SIZE, ttl_seconds=ANALYSIS_CACHE_TOUCH_SECONDS)
+        self._pending_hits = LRUCache(maxsize=ANALYSIS_CACHE_MEMORY_SIZE)
+
+    def make_key(self, code: str, language: str, model_version: str) -> str:
+        """
+        Build the content address for a submission.
+
+        Args:
+            code: Source code as submitted
+            language: Language hint
+            model_version: Identifier of the model and prompt that produce the result
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in (model_version, (language or "auto").lower(), normalize_code(code)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get(self, key: str, db: AsyncSession) -> Optional[Dict]:
+        """
+        Look up a cached result, checking memory first and then the database.
+
+        Args:
+            key: Cache key from make_key
+            db: Database session
+
+        Returns:
+            {"ai_response": str | None, "structured_result": dict | None} or None on miss
+        """
+        if not self.enabled:
+            return None
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            metrics.inc("analysis_cache_hits_memory")
+            await self._touch(key, db)
+            return cached
+
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        entry = (await db.execute(
+            select(AnalysisCacheEntry).where(
+                AnalysisCacheEntry.cache_key == key,
+                AnalysisCacheEntry.created_at >= cutoff
+            )
+        )).scalar_one_or_none()
+
+        if entry is None:
+            metrics.inc("analysis_cache_misses")
+            return None
+
+        # Hit bookkeeping is committed together with the caller's analysis row
+        entry.hit_count = (entry.hit_count or 0) + 1
+        now = datetime.now(timezone.utc)
+        entry.last_hit_at = now
+        self._touched.set(key, True)
+
+        cached = {
+            "ai_response": entry.ai_response,
+            "structured_result": entry.structured_result
+        }
+        # The memory copy expires with the row, not a full TTL after this hit
+        remaining = (entry.created_at + self.ttl - now).total_seconds()
+        self.memory.set(key, cached, ttl_seconds=max(remaining, 0))
+        metrics.inc("analysis_cache_hits_db")
+        return cached
+
+    async def _touch(self, key: str, db: AsyncSession) -> None:
+        """
+        Record a memory-tier hit on the database row.
+
+        Hits are counted in memory and written with last_hit_at at most once
+        per ANALYSIS_CACHE_TOUCH_SECONDS per key, so pruning evicts rows in
+        least recently hit order without a write on every hit. The update is
+        committed with the caller's analysis row.
+        """
+        hits = self._pending_hits.get(key, 0) + 1
+        if key in self._touched:
+            self._pending_hits.set(key, hits)
+            return
+
+        self._pending_hits.pop(key)
+        self._touched.set(key, True)
+        await db.execute(
+            update(AnalysisCacheEntry)
+            .where(AnalysisCacheEntry.cache_key == key)
+            .values(
+                hit_count=AnalysisCacheEntry.hit_count + hits,
+                last_hit_at=datetime.now(timezone.utc)
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        metrics.inc("analysis_cache_touches")
+
+    async def put(
+        self,
+        key: str,
+        language: str,
+        model_version: str,
+        ai_response: Optional[str],
+        structured_result: Optional[Dict],
+        db: AsyncSession
+    ) -> None:
+        """
+        Store a result in both tiers.
+
+        The database row is upserted in the caller's transaction and committed
+        with the analysis that produced it. A concurrent store of the same key
+        (another request or worker that missed at the same time) replaces the
+        row instead of failing the analysis commit.
+
+        Args:
+            key: Cache key from make_key
+            language: Language hint used for the lookup
+            model_version: Identifier of the model and prompt
+            ai_response: Markdown AI response (None when the structured result is stored)
+            structured_result: Structured output as a plain dict, if available
+            db: Database session
+        """
+        if not self.enabled:
+            return
+
+        cached = {"ai_response": ai_response, "structured_result": structured_result}
+        self.memory.set(key, cached)
+        self._touched.set(key, True)
+
+        now = datetime.now(timezone.utc)
+        row = insert(AnalysisCacheEntry).values(
+            cache_key=key,
+            language=(language or "auto").lower(),
+            model_version=model_version,
+            ai_response=ai_response,
+            structured_result=structured_result,
+            hit_count=0,
+            created_at=now,
+            last_hit_at=now
+        )
+        await db.execute(row.on_conflict_do_update(
+            index_elements=[AnalysisCacheEntry.cache_key],
+            set_={
+                "language": row.excluded.language,
+                "model_version": row.excluded.model_version,
+                "ai_response": row.excluded.ai_response,
+                "structured_result": row.excluded.structured_result,
+                "created_at": row.excluded.created_at,
+                "last_hit_at": row.excluded.last_hit_at
+            }
+        ))
+
+        self._puts_since_prune += 1
+        if self._puts_since_prune >= ANALYSIS_CACHE_PRUNE_EVERY:
+            self._puts_since_prune = 0
+            await self.prune(db)
+
+    async def prune(self, db: AsyncSession) -> None:
+        """
+        Evict expired rows and trim the table to ANALYSIS_CACHE_MAX_ROWS,
+        dropping the least recently hit entries first.
+        """
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        await db.execute(delete(AnalysisCacheEntry).where(AnalysisCacheEntry.created_at < cutoff))
+
+        overflow = select(AnalysisCacheEntry.cache_key).order_by(
+            AnalysisCacheEntry.last_hit_at.desc()
+        ).offset(ANALYSIS_CACHE_MAX_ROWS).scalar_subquery()
+        await db.execute(
+            delete(AnalysisCacheEntry).where(AnalysisCacheEntry.cache_key.in_(overflow)),
+            execution_options={"synchronize_session": False}
+        )
+        metrics.inc("analysis_cache_prunes")
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and memory tier size"""
+        hits_memory = metrics.get_counter("analysis_cache_hits_memory")
+        hits_db = metrics.get_counter("analysis_cache_hits_db")
+        misses = metrics.get_counter("analysis_cache_misses")
+        lookups = hits_memory + hits_db + misses
+
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self.memory),
+            "hits_memory": hits_memory,
+            "hits_db": hits_db,
+            "misses": misses,
+            "hit_rate": round((hits_memory + hits_db) / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance
+_analysis_cache_instance = None
+
+
+def get_analysis_cache() -> AnalysisCacheService:
+    """Get singleton analysis cache instance"""
+    global _analysis_cache_instance
+    if _analysis_cache_instance is None:
+        _analysis_cache_instance = AnalysisCacheService()
+    return _analysis_cache_instance
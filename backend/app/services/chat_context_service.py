@@ -0,0 +1,338 @@
+"""
+Token-budgeted chat context.
+
+Keeps a per-user, in-memory window of recent chat turns whose size is
+measured in (estimated) tokens. Turns pushed out of the window are folded
+into a rolling summary by a background task and stored in
+conversation_summaries, so the prompt for every message is
+system prompt + summary + as many recent turns as fit the budget. Messages
+are served from memory; at most every CHAT_CONTEXT_REVALIDATE_SECONDS a
+cached context is checked against the user's newest stored exchange (one
+indexed read), so exchanges stored or history cleared by another worker
+cause a reload instead of a stale window.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.conversation_summary import ConversationSummary
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
+
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "4000"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "512"))
+CHAT_CONTEXT_LOAD_LIMIT = int(os.getenv("CHAT_CONTEXT_LOAD_LIMIT", "25"))  # exchanges per query and per summary call
+CHAT_CONTEXT_CACHE_SIZE = int(os.getenv("CHAT_CONTEXT_CACHE_SIZE", "1000"))
+CHAT_CONTEXT_TTL_SECONDS = int(os.getenv("CHAT_CONTEXT_TTL_SECONDS", "3600"))
+# How long a cached context is trusted before checking for other workers' writes
+CHAT_CONTEXT_REVALIDATE_SECONDS = int(os.getenv("CHAT_CONTEXT_REVALIDATE_SECONDS", "30"))
+CHAT_SUMMARY_RETRIES = int(os.getenv("CHAT_SUMMARY_RETRIES", "3"))
+
+# Code-heavy chat text averages roughly 3.5 characters per Llama token
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (errs on the high side for code)"""
+    return int(len(text or "") / CHARS_PER_TOKEN) + 1
+
+
+@dataclass
+class ChatTurn:
+    """One exchange of a conversation (user message and assistant response)"""
+    message: str
+    response: str
+    created_at: datetime
+    message_tokens: int = 0
+    response_tokens: int = 0
+
+    def __post_init__(self):
+        if not self.message_tokens:
+            self.message_tokens = estimate_tokens(self.message)
+        if not self.response_tokens:
+            self.response_tokens = estimate_tokens(self.response)
+
+    @property
+    def tokens(self) -> int:
+        return self.message_tokens + self.response_tokens
+
+
+@dataclass
+class _UserContext:
+    summary: str = ""
+    summary_tokens: int = 0
+    window: Deque[ChatTurn] = field(default_factory=deque)
+    window_tokens: int = 0
+    # Turns evicted from the window and waiting to be summarized
+    overflow: List[ChatTurn] = field(default_factory=list)
+    # created_at of the newest stored exchange this context includes
+    latest: Optional[datetime] = None
+    # time.monotonic() when latest was last compared with the database
+    checked_at: float = 0.0
+    summarizing: bool = False
+
+
+# summarize(previous_summary, turns) -> new summary
+Summarizer = Callable[[str, List[ChatTurn]], Awaitable[str]]
+
+
+class ChatContextManager:
+    """Per-user chat context window with rolling summaries"""
+
+    def __init__(self, summarize: Summarizer, system_prompt_tokens: int = 0):
+        """
+        Args:
+            summarize: Coroutine that folds turns into the previous summary
+            system_prompt_tokens: Tokens of the fixed system prompt, counted against the budget
+        """
+        self.summarize = summarize
+        self.system_prompt_tokens = system_prompt_tokens
+        self.window_budget = max(
+            CHAT_CONTEXT_TOKEN_BUDGET - system_prompt_tokens - CHAT_SUMMARY_MAX_TOKENS, 0
+        )
+        self._contexts = LRUCache(maxsize=CHAT_CONTEXT_CACHE_SIZE, ttl_seconds=CHAT_CONTEXT_TTL_SECONDS)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def get_prompt_context(self, user_id: str, message: str, db: AsyncSession) -> Tuple[str, List[ChatTurn]]:
+        """
+        Get the summary and recent turns to send with a new message.
+
+        Turns are taken newest first until the prompt (system prompt, summary,
+        turns and the new message) would exceed CHAT_CONTEXT_TOKEN_BUDGET.
+
+        Args:
+            user_id: ID of the user
+            message: The new user message
+            db: Database session
+
+        Returns:
+            (summary, turns in chronological order)
+        """
+        context = await self._get_context(user_id, db)
+
+        available = (
+            CHAT_CONTEXT_TOKEN_BUDGET
+            - self.system_prompt_tokens
+            - context.summary_tokens
+            - estimate_tokens(message)
+        )
+        turns: List[ChatTurn] = []
+        for turn in reversed(context.window):
+            if turn.tokens > available:
+                break
+            turns.append(turn)
+            available -= turn.tokens
+
+        turns.reverse()
+        metrics.observe("chat_prompt_tokens", CHAT_CONTEXT_TOKEN_BUDGET - available)
+        return context.summary, turns
+
+    def append(self, user_id: str, turns: List[ChatTurn]) -> None:
+        """
+        Add stored turns to a cached context (no-op if the user is not cached).
+
+        Turns that no longer fit the window are queued for summarization.
+        """
+        context = self._contexts.get(user_id)
+        if context is None:
+            return
+
+        for turn in turns:
+            self._push(context, turn)
+        if turns:
+            context.latest = turns[-1].created_at
+        self._schedule_summary(user_id, context)
+
+    async def clear(self, user_id: str, db: AsyncSession) -> None:
+        """Forget a user's context and delete the stored summary (caller commits)"""
+        self._contexts.pop(user_id)
+        await db.execute(delete(ConversationSummary).where(ConversationSummary.user_id == user_id))
+
+    async def _get_context(self, user_id: str, db: AsyncSession) -> _UserContext:
+        context = self._contexts.get(user_id)
+        latest = None
+        if context is not None:
+            if time.monotonic() - context.checked_at < CHAT_CONTEXT_REVALIDATE_SECONDS:
+                metrics.inc("chat_context_cache_hits")
+                self._schedule_summary(user_id, context)
+                return context
+
+            latest = await self._latest(user_id, db)
+            if context.latest == latest:
+                metrics.inc("chat_context_cache_hits")
+                context.checked_at = time.monotonic()
+                self._schedule_summary(user_id, context)
+                return context
+            # Another worker stored exchanges or cleared the history
+            metrics.inc("chat_context_stale")
+
+        metrics.inc("chat_context_cache_misses")
+        context = await self._load(user_id, db)
+        self._contexts.set(user_id, context)
+        self._schedule_summary(user_id, context)
+        return context
+
+    async def _latest(self, user_id: str, db: AsyncSession) -> Optional[datetime]:
+        return (await db.execute(
+            select(func.max(Conversation.created_at)).where(Conversation.user_id == user_id)
+        )).scalar()
+
+    async def _load(self, user_id: str, db: AsyncSession) -> _UserContext:
+        """
+        Build a context from the stored summary and the newest exchanges.
+
+        Exchanges not covered by the summary are read newest first, in pages,
+        until the window budget is full and CHAT_CONTEXT_LOAD_LIMIT older
+        exchanges are queued for one summary call. Anything older than that
+        stays out of the summary, so a long unsummarized history (e.g. one
+        migrated before summaries existed) costs a bounded read.
+        """
+        context = _UserContext(checked_at=time.monotonic())
+
+        stored = await db.get(ConversationSummary, user_id)
+        query = select(
+            Conversation.id,
+            Conversation.message,
+            Conversation.response,
+            Conversation.created_at,
+            Conversation.message_tokens,
+            Conversation.response_tokens
+        ).where(Conversation.user_id == user_id)
+        if stored is not None:
+            context.summary = stored.summary
+            context.summary_tokens = stored.token_count
+            query = query.where(Conversation.created_at > stored.summarized_until)
+
+        query = query.order_by(Conversation.created_at.desc(), Conversation.id.desc()).limit(CHAT_CONTEXT_LOAD_LIMIT)
+        newest_first: List[ChatTurn] = []
+        window_tokens = 0
+        overflow = 0
+        page = []
+        while overflow < CHAT_CONTEXT_LOAD_LIMIT:
+            page_query = query
+            if page:
+                last = page[-1]
+                page_query = query.where(
+                    tuple_(Conversation.created_at, Conversation.id) < tuple_(last.created_at, last.id)
+                )
+            page = (await db.execute(page_query)).all()
+
+            for conv in page:
+                turn = ChatTurn(
+                    message=conv.message,
+                    response=conv.response,
+                    created_at=conv.created_at,
+                    message_tokens=conv.message_tokens,
+                    response_tokens=conv.response_tokens
+                )
+                if overflow or window_tokens + turn.tokens > self.window_budget:
+                    overflow += 1
+                else:
+                    window_tokens += turn.tokens
+                newest_first.append(turn)
+                if overflow >= CHAT_CONTEXT_LOAD_LIMIT:
+                    break
+            if len(page) < CHAT_CONTEXT_LOAD_LIMIT:
+                break
+
+        if newest_first:
+            context.latest = newest_first[0].created_at
+        else:
+            context.latest = await self._latest(user_id, db)
+
+        for turn in reversed(newest_first):
+            self._push(context, turn)
+        return context
+
+    def _push(self, context: _UserContext, turn: ChatTurn) -> None:
+        context.window.append(turn)
+        context.window_tokens += turn.tokens
+        while context.window and context.window_tokens > self.window_budget:
+            evicted = context.window.popleft()
+            context.window_tokens -= evicted.tokens
+            context.overflow.append(evicted)
+
+    def _schedule_summary(self, user_id: str, context: _UserContext) -> None:
+        if not context.overflow or context.summarizing:
+            return
+
+        context.summarizing = True
+        task = asyncio.create_task(self._summarize_overflow(user_id, context))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize_overflow(self, user_id: str, context: _UserContext) -> None:
+        """
+        Fold overflowing turns into the summary until none are left.
+
+        A failed call is retried up to CHAT_SUMMARY_RETRIES times with
+        exponential backoff; after that the turns stay queued and the next
+        message for this context schedules another attempt.
+        """
+        failures = 0
+        try:
+            while context.overflow:
+                batch = context.overflow[:CHAT_CONTEXT_LOAD_LIMIT]
+                try:
+                    summary = await self.summarize(context.summary, batch)
+                except Exception as e:
+                    print(f"❌ Error summarizing conversation for user {user_id}: {str(e)}")
+                    metrics.inc("chat_summary_failures")
+                    failures += 1
+                    if failures > CHAT_SUMMARY_RETRIES or self._contexts.get(user_id) is not context:
+                        return
+                    await asyncio.sleep(2 ** failures)
+                    continue
+
+                if self._contexts.get(user_id) is not context:
+                    # History was cleared (or the context evicted) meanwhile
+                    return
+
+                summary_tokens = estimate_tokens(summary)
+                if summary_tokens > CHAT_SUMMARY_MAX_TOKENS:
+                    summary = summary[:int(CHAT_SUMMARY_MAX_TOKENS * CHARS_PER_TOKEN)]
+                    summary_tokens = CHAT_SUMMARY_MAX_TOKENS
+
+                await self._store_summary(user_id, summary, summary_tokens, batch[-1].created_at)
+
+                context.summary = summary
+                context.summary_tokens = summary_tokens
+                del context.overflow[:len(batch)]
+                metrics.inc("chat_summaries")
+
+        except Exception as e:
+            print(f"❌ Error storing conversation summary for user {user_id}: {str(e)}")
+            metrics.inc("chat_summary_failures")
+
+        finally:
+            context.summarizing = False
+
+    async def _store_summary(self, user_id: str, summary: str, token_count: int, summarized_until: datetime) -> None:
+        async with AsyncSessionLocal() as db:
+            upsert = insert(ConversationSummary).values(
+                user_id=user_id,
+                summary=summary,
+                token_count=token_count,
+                summarized_until=summarized_until
+            )
+            await db.execute(upsert.on_conflict_do_update(
+                index_elements=[ConversationSummary.user_id],
+                set_={
+                    "summary": upsert.excluded.summary,
+                    "token_count": upsert.excluded.token_count,
+                    "summarized_until": upsert.excluded.summarized_until,
+                    "updated_at": func.now()
+                }
+            ))
+            await db.commit()
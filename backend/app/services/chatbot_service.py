@@ -4,14 +4,26 @@ Uses llama-3.3-versatile model via Groq API with conversation memory.
 """
 
 import os
-from typing import List, Dict, Optional
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain.memory import ConversationBufferMemory
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import AsyncSessionLocal, release_connection
 from app.models.conversation import Conversation
+from app.services.chat_context_service import (
+    CHAT_SUMMARY_MAX_TOKENS,
+    ChatContextManager,
+    ChatTurn,
+    estimate_tokens
+)
+
+CHAT_MODEL = "llama-3.3-70b-versatile"
 
 
 class ChatbotService:
@@ -30,8 +42,9 @@ class ChatbotService:
             raise ValueError("GROQ_API_KEY not provided and not found in environment variables")
 
         # Initialize Groq LLM with Llama 3.3
+        self.model = CHAT_MODEL
         self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
+            model=self.model,
             api_key=self.api_key,
             temperature=0.7,  # Higher temperature for more creative conversational responses
             max_tokens=2048
@@ -40,6 +53,20 @@ class ChatbotService:
         # Create programming-focused system prompt
         self.system_message = SystemMessage(content=self._get_system_prompt())
 
+        # Low-temperature model for compressing older history
+        self.summary_llm = ChatGroq(
+            model=self.model,
+            api_key=self.api_key,
+            temperature=0.2,
+            max_tokens=CHAT_SUMMARY_MAX_TOKENS
+        )
+
+        # Token-budgeted history window with rolling summaries
+        self.context = ChatContextManager(
+            summarize=self._summarize,
+            system_prompt_tokens=estimate_tokens(self.system_message.content)
+        )
+
     def _get_system_prompt(self) -> str:
         """Get the programming-focused system prompt"""
         return """You are ABCode AI, an expert programming assistant specialized in helping developers with code analysis, debugging, and software development.
@@ -68,7 +95,7 @@ You have access to the conversation history, so you can reference previous messa
         self,
         user_id: str,
         message: str,
-        db: Session
+        db: AsyncSession
     ) -> str:
         """
         Process a chat message and return AI response with persistent conversation history.
@@ -82,51 +109,14 @@ You have access to the conversation history, so you can reference previous messa
             AI response string
         """
         try:
-            # Load conversation history from database (last 10 messages for context)
-            history = db.query(Conversation).filter(
-                Conversation.user_id == user_id
-            ).order_by(
-                Conversation.created_at.desc()
-            ).limit(10).all()
-
-            # Reverse to get chronological order
-            history = list(reversed(history))
-
-            # Build messages list with system message
-            messages = [self.system_message]
-
-            # Add conversation history
-            for conv in history:
-                if conv.role == "user":
-                    messages.append(HumanMessage(content=conv.message))
-                elif conv.role == "assistant":
-                    messages.append(AIMessage(content=conv.response))
-
-            # Add current user message
-            messages.append(HumanMessage(content=message))
+            messages = await self._build_messages(user_id, message, db)
+            await release_connection(db)
 
             # Get AI response
             response = await self.llm.ainvoke(messages)
             response_text = response.content
 
-            # Store user message in database
-            user_conversation = Conversation(
-                user_id=user_id,
-                message=message,
-                response="",  # Empty for user messages
-                role="user"
-            )
-            db.add(user_conversation)
-
-            # Store AI response in database
-            ai_conversation = Conversation(
-                user_id=user_id,
-                message="",  # Empty for AI messages
-                response=response_text,
-                role="assistant"
-            )
-            db.add(ai_conversation)
-            db.commit()
+            await self._save_exchange(user_id, message, response_text, db)
 
             return response_text
 
@@ -136,7 +126,122 @@ You have access to the conversation history, so you can reference previous messa
             traceback.print_exc()
             return "I apologize, but I encountered an error processing your message. Please try again."
 
-    async def clear_history(self, user_id: str, db: Session) -> bool:
+    async def chat_stream(
+        self,
+        user_id: str,
+        message: str
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Process a chat message, yielding response tokens as they arrive.
+
+        Opens its own database session so it can outlive the request handler.
+        Both turns are stored only once the response is complete; closing the
+        generator early (client disconnect) cancels the upstream generation
+        and stores nothing.
+
+        Args:
+            user_id: ID of the user
+            message: User's message
+
+        Yields:
+            ("token", {"content": str}) for each chunk, then
+            ("complete", {"message": str, "response": str})
+        """
+        db = AsyncSessionLocal()
+        try:
+            messages = await self._build_messages(user_id, message, db)
+            await release_connection(db)
+
+            parts: List[str] = []
+            stream = self.llm.astream(messages)
+            try:
+                async for chunk in stream:
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield "token", {"content": chunk.content}
+            finally:
+                # Closes the upstream HTTP stream when we stop early
+                await stream.aclose()
+
+            response_text = "".join(parts)
+            await self._save_exchange(user_id, message, response_text, db)
+
+            yield "complete", {"message": message, "response": response_text}
+        finally:
+            await db.close()
+
+    async def _build_messages(self, user_id: str, message: str, db: AsyncSession) -> List:
+        """Build the LLM input: system prompt, history summary, recent turns and the new message"""
+        summary, turns = await self.context.get_prompt_context(user_id, message, db)
+
+        # Build messages list with system message
+        messages = [self.system_message]
+
+        if summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+
+        # Add recent turns that fit the token budget
+        for turn in turns:
+            messages.append(HumanMessage(content=turn.message))
+            messages.append(AIMessage(content=turn.response))
+
+        # Add current user message
+        messages.append(HumanMessage(content=message))
+        return messages
+
+    async def _save_exchange(self, user_id: str, message: str, response_text: str, db: AsyncSession) -> None:
+        """Store one exchange and add it to the context window"""
+        turn = ChatTurn(message=message, response=response_text, created_at=datetime.now(timezone.utc))
+        await self.save_turns(user_id, [turn], db)
+        self.context.append(user_id, [turn])
+
+    async def save_turns(self, user_id: str, turns: List[ChatTurn], db: AsyncSession) -> None:
+        """
+        Store exchanges with a single multi-row insert.
+
+        Args:
+            user_id: ID of the user
+            turns: Exchanges to store
+            db: Database session (committed here)
+        """
+        if not turns:
+            return
+
+        await db.execute(insert(Conversation), [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "message": turn.message,
+                "response": turn.response,
+                "message_tokens": turn.message_tokens,
+                "response_tokens": turn.response_tokens,
+                "model": self.model,
+                "created_at": turn.created_at
+            }
+            for turn in turns
+        ])
+        await db.commit()
+
+    async def _summarize(self, previous_summary: str, turns: List[ChatTurn]) -> str:
+        """Fold older turns into the rolling conversation summary"""
+        transcript = "\n\n".join(
+            f"User: {turn.message}\n\nAssistant: {turn.response}" for turn in turns
+        )
+        response = await self.summary_llm.ainvoke([
+            SystemMessage(content=(
+                "You maintain a running summary of a programming help conversation. "
+                "Merge the new messages into the existing summary. Keep the user's goals, "
+                "languages, key code identifiers, errors discussed and conclusions reached. "
+                "Do not copy code blocks. Reply with the updated summary only."
+            )),
+            HumanMessage(content=(
+                f"Existing summary:\n{previous_summary or '(none)'}\n\n"
+                f"New messages:\n{transcript}"
+            ))
+        ])
+        return response.content.strip()
+
+    async def clear_history(self, user_id: str, db: AsyncSession) -> bool:
         """
         Clear conversation history for a user.
 
@@ -148,14 +253,17 @@ You have access to the conversation history, so you can reference previous messa
             True if successful
         """
         try:
-            db.query(Conversation).filter(
-                Conversation.user_id == user_id
-            ).delete()
-            db.commit()
+            await db.execute(
+                delete(Conversation).where(
+                    Conversation.user_id == user_id
+                )
+            )
+            await self.context.clear(user_id, db)
+            await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error clearing conversation history: {str(e)}")
-            db.rollback()
+            await db.rollback()
             return False
 
 
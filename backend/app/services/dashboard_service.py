@@ -0,0 +1,108 @@
+"""
+Dashboard service - all dashboard statistics in one computation.
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics_rollup import UserStatsTotals
+from app.services.analytics_service import get_analytics_service
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
+
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "1024"))
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+
+
+class DashboardService:
+    """Computes and caches the per-user dashboard payload"""
+
+    def __init__(self):
+        self.analytics = get_analytics_service()
+        self.cache = LRUCache(maxsize=DASHBOARD_CACHE_SIZE, ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS)
+
+    async def get_dashboard(
+        self,
+        user_id: str,
+        top_k: int,
+        db: AsyncSession,
+        etag: Optional[str] = None
+    ) -> Tuple[str, Dict]:
+        """
+        Get the dashboard payload and its ETag.
+
+        A cached payload is reused while its ETag still matches, so other
+        workers' writes are picked up even without local invalidation.
+
+        Args:
+            user_id: User ID
+            top_k: Number of top error types to include
+            db: Database session
+            etag: ETag already read with get_etag for this request, if any
+
+        Returns:
+            (etag, payload)
+        """
+        if etag is None:
+            etag = await self.get_etag(user_id, top_k, db)
+
+        cached = self.cache.get(user_id)
+        if cached and cached["etag"] == etag:
+            metrics.inc("dashboard_cache_hits")
+            return etag, cached["payload"]
+
+        metrics.inc("dashboard_cache_misses")
+        payload = {
+            "progress": await self.analytics.get_monthly_average_errors(user_id, db),
+            "breakdown": await self.analytics.get_error_breakdown_by_month(user_id, db),
+            "top_errors": await self.analytics.get_top_errors(user_id, top_k, db),
+            "user_stats": await self.analytics.get_user_stats(user_id, db),
+            "progress_metrics": await self.analytics.get_progress_metrics(user_id, db)
+        }
+
+        self.cache.set(user_id, {"etag": etag, "payload": payload})
+        return etag, payload
+
+    async def get_etag(self, user_id: str, top_k: int, db: AsyncSession) -> str:
+        """
+        Build the dashboard ETag for a user without computing the payload.
+
+        Derived from the user's latest analysis timestamp and analysis count
+        (one primary-key read of the totals rollup), the current date, since
+        the day streak changes at midnight, and top_k, which changes the
+        representation.
+        """
+        row = (await db.execute(
+            select(
+                UserStatsTotals.total_analyses,
+                UserStatsTotals.last_analysis_at,
+                func.current_date()
+            ).where(UserStatsTotals.user_id == user_id)
+        )).first()
+
+        if row:
+            version = f"{row.total_analyses}:{row.last_analysis_at.isoformat()}:{row[2]}"
+        else:
+            version = "empty"
+
+        return '"' + hashlib.sha1(f"{user_id}:{top_k}:{version}".encode()).hexdigest() + '"'
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop a user's cached dashboard (call after their analyses change)"""
+        self.cache.pop(user_id)
+
+
+# Global instance
+_dashboard_service_instance = None
+
+
+def get_dashboard_service() -> DashboardService:
+    """Get singleton dashboard service instance"""
+    global _dashboard_service_instance
+    if _dashboard_service_instance is None:
+        _dashboard_service_instance = DashboardService()
+    return _dashboard_service_instance
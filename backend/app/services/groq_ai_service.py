@@ -4,56 +4,42 @@ Uses llama-3.3-versatile model via Groq API with structured output.
 """
 
 import os
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Optional, Tuple, Any
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
 
+from app.services.analysis_result import AnalysisResult, CodeAnalysisOutput, ErrorCategory
+from app.services.stream_parser import IncrementalJSONParser
 
-class ErrorDetail(BaseModel):
-    """Detailed information about a specific error instance"""
-    line: int = Field(description="Line number where error occurs")
-    message: str = Field(description="Brief description of the error")
-    codeSnippet: str = Field(description="The problematic code snippet")
-    suggestion: str = Field(description="Suggested fix for this error")
-
-
-class ErrorCategory(BaseModel):
-    """Category of errors with details"""
-    category: str = Field(description="Error type/category name (e.g., 'Syntax Error', 'Indentation Error')")
-    count: int = Field(description="Number of occurrences of this error type")
-    description: str = Field(description="General description of this error category")
-    icon: str = Field(description="Icon identifier (use 'X' for errors, '!' for warnings, '?' for suggestions)")
-    details: List[ErrorDetail] = Field(description="List of specific error instances with line numbers")
-
-
-class CodeAnalysisOutput(BaseModel):
-    """Structured output format for code analysis"""
-    errors: List[ErrorCategory] = Field(description="List of error categories found in the code")
-    corrected_code: str = Field(description="The corrected version of the code")
-    explanations: List[str] = Field(description="List of explanations for each error category")
-    recommendations: List[str] = Field(description="General recommendations to improve code quality")
+# Bump whenever the system prompt or output schema changes so cached results are not reused
+PROMPT_VERSION = "1"
+GROQ_MODEL = "llama-3.3-70b-versatile"
 
 
 class GroqAIService:
     """Service for code analysis using Groq API with Llama model via LangChain"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, model: str = GROQ_MODEL):
         """
         Initialize Groq AI service with LangChain.
 
         Args:
             api_key: Groq API key (or from environment variable GROQ_API_KEY)
+            model: Groq model id
         """
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
 
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not provided and not found in environment variables")
 
-        # Initialize Groq LLM with Llama 3.3
+        # Identifies model + prompt for the analysis result cache
+        self.model = model
+        self.model_version = f"groq:{model}:prompt-{PROMPT_VERSION}"
+
+        # Initialize Groq LLM (Llama 3.3 70B by default)
         self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",  # Groq's Llama 3.3 70B model
+            model=model,
             api_key=self.api_key,
             temperature=0.3,  # Lower temperature for more consistent code analysis
             max_tokens=4096
@@ -65,12 +51,15 @@ class GroqAIService:
         # Create structured prompt
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", self._get_system_prompt()),
-            ("user", "Analyze this {language} code:\n\n{code}")
+            ("user", "Analyze this {language} code:\n\n{code}{hints}")
         ])
 
         # Create the chain
         self.chain = self.prompt | self.llm | self.parser
 
+        # Chain without the output parser, for token streaming
+        self.stream_chain = self.prompt | self.llm
+
     def _get_system_prompt(self) -> str:
         """Get the system prompt with output format instructions"""
         return """You are an expert code analyzer. Analyze the provided code and identify ALL errors, issues, and areas for improvement.
@@ -116,91 +105,94 @@ IMPORTANT RULES:
 8. If the code has no errors, still provide an empty errors array and suggestions for improvement
 """
 
-    async def analyze_code(self, code: str, language: str) -> str:
+    async def analyze_code(self, code: str, language: str, hints: str = "") -> AnalysisResult:
         """
-        Analyze code using Groq API and return markdown-formatted response.
+        Analyze code using Groq API.
 
         Args:
             code: Source code to analyze
             language: Programming language (python, javascript, java, etc.)
+            hints: Static analysis findings to include in the prompt
 
         Returns:
-            Markdown-formatted string compatible with existing parser
+            Result holding the structured output, or an uncacheable fallback
+            response if the API call failed
         """
         try:
-            # Invoke the chain - returns a dict
-            result_dict = await self.chain.ainvoke({
-                "code": code,
-                "language": language
-            })
-
-            print(f"DEBUG: Raw result type: {type(result_dict)}")
-            print(f"DEBUG: Raw result keys: {result_dict.keys() if isinstance(result_dict, dict) else 'Not a dict'}")
-
-            # Convert dict to Pydantic model for validation
-            result = CodeAnalysisOutput(**result_dict)
-
-            print(f"DEBUG: Successfully parsed to CodeAnalysisOutput")
-            print(f"DEBUG: Errors count: {len(result.errors)}")
-
-            # Store structured result for direct access
-            self._last_structured_result = result
-
-            # Convert structured output to markdown format
-            # This ensures compatibility with existing parser_service.py
-            markdown = self._convert_to_markdown(result, language)
-            return markdown
+            result = await self.analyze_structured(code, language, hints)
+            return AnalysisResult(language, structured=result)
 
         except Exception as e:
             # Fallback to simple error response
             print(f"❌ Groq API Error: {str(e)}")
             import traceback
             traceback.print_exc()
-            self._last_structured_result = None
-            return self._create_fallback_response(code, language, str(e))
+            return AnalysisResult(
+                language,
+                markdown=self._create_fallback_response(code, language, str(e)),
+                cacheable=False
+            )
+
+    async def analyze_structured(self, code: str, language: str, hints: str = "") -> CodeAnalysisOutput:
+        """
+        Analyze code using Groq API and return the validated structured output.
+
+        Unlike analyze_code, failures are raised instead of being turned into a
+        fallback response, so callers such as the model router can react to them.
+
+        Args:
+            code: Source code to analyze
+            language: Programming language
+            hints: Static analysis findings to include in the prompt
 
-    def get_last_structured_result(self):
-        """Get the last structured result directly from Groq"""
-        return getattr(self, '_last_structured_result', None)
+        Returns:
+            Structured analysis
 
-    def _convert_to_markdown(self, result: CodeAnalysisOutput, language: str) -> str:
+        Raises:
+            Exception: If the API call fails or the output does not match the schema
         """
-        Convert structured output to markdown format.
-        This maintains compatibility with the existing parser service.
+        # Invoke the chain - returns a dict
+        result_dict = await self.chain.ainvoke(self._prompt_input(code, language, hints))
+
+        # Convert dict to Pydantic model for validation
+        return CodeAnalysisOutput(**result_dict)
+
+    async def stream_analysis(self, code: str, language: str, hints: str = "") -> AsyncIterator[Tuple[str, Any]]:
         """
-        # Build errors section
-        errors_section = "## Errors\n"
-        if result.errors:
-            for error_cat in result.errors:
-                errors_section += f"**{error_cat.category}**: {error_cat.description}\n"
-                if error_cat.details:
-                    for detail in error_cat.details:
-                        errors_section += f"  - Line {detail.line}: {detail.message}\n"
-        else:
-            errors_section += "No errors found.\n"
-
-        # Build corrected code section
-        corrected_section = f"\n## Corrected Code\n```{language}\n{result.corrected_code}\n```\n"
-
-        # Build explanation section with error type prefixes
-        explanation_section = "\n## Explanation\n"
-        if result.errors:
-            for i, error_cat in enumerate(result.errors):
-                # Match explanations to error categories
-                if i < len(result.explanations):
-                    explanation_section += f"**{error_cat.category}**: {result.explanations[i]}\n\n"
-        else:
-            for explanation in result.explanations:
-                explanation_section += f"{explanation}\n\n"
-
-        # Build recommendations section
-        recommendations_section = "\n## Recommendations\n"
-        for rec in result.recommendations:
-            recommendations_section += f"- {rec}\n"
-
-        # Combine all sections
-        markdown = f"{errors_section}{corrected_section}{explanation_section}{recommendations_section}"
-        return markdown
+        Analyze code using Groq's streaming API, yielding results as they complete.
+
+        Events, in the order the model writes them:
+        - ("error_category", ErrorCategory) for each error category
+        - ("corrected_code", str)
+        - ("explanations", List[str])
+        - ("recommendations", List[str])
+        - ("result", AnalysisResult) once the document is complete
+
+        Args:
+            code: Source code to analyze
+            language: Programming language
+            hints: Static analysis findings to include in the prompt
+
+        Raises:
+            ValueError: If the stream ends before a complete JSON document was received
+        """
+        parser = IncrementalJSONParser(stream_arrays=("errors",))
+
+        async for chunk in self.stream_chain.astream(self._prompt_input(code, language, hints)):
+            if not chunk.content:
+                continue
+
+            for name, value in parser.feed(chunk.content):
+                if name == "errors[]":
+                    yield "error_category", ErrorCategory(**value)
+                elif name in ("corrected_code", "explanations", "recommendations"):
+                    yield name, value
+
+        yield "result", AnalysisResult(language, structured=CodeAnalysisOutput(**parser.result()))
+
+    def _prompt_input(self, code: str, language: str, hints: str) -> Dict:
+        """Variables of the user prompt (hints follow the code, separated by a blank line)"""
+        return {"code": code, "language": language, "hints": f"\n\n{hints}" if hints else ""}
 
     def _create_fallback_response(self, code: str, language: str, error_msg: str) -> str:
         """Create a fallback response when Groq API fails"""
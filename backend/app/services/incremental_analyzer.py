@@ -0,0 +1,455 @@
+"""
+Incremental analyzer - re-analyzes only what changed in a resubmitted file.
+
+Students typically fix a line or two and resubmit the same file. When an
+earlier analysis of that file exists (same client-supplied document id, or
+else the user's recent analysis with the most similar code), the two versions
+are diffed line by line and only the changed regions, widened by a few lines
+of context, are sent to the AI model as one excerpt. Findings and corrections
+on unchanged lines are carried forward from the earlier analysis with their
+line numbers remapped, the excerpt's are mapped back from excerpt lines to
+file lines, and both are merged into one structured result.
+
+Only structured results are merged (markdown results keep line numbers in
+free text). When the file changed too much, the earlier analysis has no
+structured result, or the model's corrections cannot be placed back in the
+file, the caller runs a full analysis instead.
+"""
+
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.code_analysis import CodeAnalysis
+from app.services.analysis_result import CodeAnalysisOutput, ErrorCategory
+from app.services.static_analyzer import StaticReport
+from app.utils.diff import correction_ranges, diff_hunks
+from app.utils.document import SourceText
+from app.utils.metrics import metrics
+
+INCREMENTAL_ANALYSIS_ENABLED = os.getenv("INCREMENTAL_ANALYSIS_ENABLED", "true").lower() == "true"
+INCREMENTAL_MIN_LINES = int(os.getenv("INCREMENTAL_MIN_LINES", "40"))  # smaller files are always analyzed in full
+INCREMENTAL_CONTEXT_LINES = int(os.getenv("INCREMENTAL_CONTEXT_LINES", "5"))  # around each changed region
+INCREMENTAL_MAX_EXCERPT_RATIO = float(os.getenv("INCREMENTAL_MAX_EXCERPT_RATIO", "0.5"))  # of the file's lines
+INCREMENTAL_MIN_SIMILARITY = float(os.getenv("INCREMENTAL_MIN_SIMILARITY", "0.8"))  # matching without a document id
+INCREMENTAL_CANDIDATES = int(os.getenv("INCREMENTAL_CANDIDATES", "10"))
+INCREMENTAL_MAX_AGE_HOURS = int(os.getenv("INCREMENTAL_MAX_AGE_HOURS", "24"))
+
+# How far above a region to look for the unindented line (def, class, function header) it belongs to
+HEADER_SEARCH_LINES = 20
+
+_CLOSERS = ")]}"
+
+# (start, end, replacement) character offsets into the submitted code
+Edit = Tuple[int, int, str]
+
+
+@dataclass
+class BaseAnalysis:
+    """Earlier analysis a resubmission is compared with"""
+    id: str
+    code: str
+    result: CodeAnalysisOutput
+
+
+class IncrementalPlan:
+    """Changed regions of a resubmitted file, and how their analysis merges with the earlier one"""
+
+    def __init__(
+        self,
+        base: BaseAnalysis,
+        code: str,
+        regions: List[Tuple[int, int]],
+        line_map: Dict[int, int]
+    ):
+        """
+        Args:
+            base: Earlier analysis of the same file
+            code: Submitted code
+            regions: (first, last) 1-based inclusive line ranges of the code to re-analyze
+            line_map: Earlier line number -> line number in the code, for unchanged lines
+        """
+        self.base = base
+        self.code = code
+        self.regions = regions
+        self.line_map = line_map
+
+        lines = code.split("\n")
+        self.line_count = len(lines)
+
+        # Regions separated by one blank line; file line of each excerpt line (None for separators)
+        excerpt: List[str] = []
+        self.excerpt_lines: List[Optional[int]] = []
+        for first, last in regions:
+            if excerpt:
+                excerpt.append("")
+                self.excerpt_lines.append(None)
+            excerpt.extend(lines[first - 1:last])
+            self.excerpt_lines.extend(range(first, last + 1))
+        self.excerpt = "\n".join(excerpt)
+
+        self._reanalyzed = {line: index + 1 for index, line in enumerate(self.excerpt_lines) if line is not None}
+
+    def static_report(self, report: Optional[StaticReport]) -> Optional[StaticReport]:
+        """Static findings within the excerpt, renumbered to excerpt lines"""
+        if report is None:
+            return None
+
+        findings = [
+            dict(finding, line=self._reanalyzed[finding["line"]])
+            for finding in report.findings
+            if finding["line"] in self._reanalyzed
+        ]
+        return StaticReport(report.language, findings, None, False)
+
+    def hints(self) -> str:
+        """Prompt text telling the AI model what the excerpt is"""
+        ranges = []
+        excerpt_line = 1
+        for first, last in self.regions:
+            ranges.append(f"excerpt lines {excerpt_line}-{excerpt_line + last - first} are file lines {first}-{last}")
+            excerpt_line += last - first + 2
+
+        return (
+            f"The code above is an excerpt of a {self.line_count}-line file: the parts changed since it was "
+            f"last analyzed, with surrounding context ({'; '.join(ranges)}), separated by blank lines. "
+            "Names used here may be defined elsewhere in the file and a part may start or end inside a block; "
+            "do not report those as errors. Use excerpt line numbers, and return the corrected excerpt with "
+            "its parts and blank separator lines in place."
+        )
+
+    def merge(self, excerpt: Optional[CodeAnalysisOutput]) -> Optional[CodeAnalysisOutput]:
+        """
+        Combine the excerpt's analysis with the earlier analysis of the unchanged lines.
+
+        Args:
+            excerpt: AI analysis of the excerpt (None when nothing changed)
+
+        Returns:
+            Analysis of the whole submitted code, or None if the excerpt's
+            corrections cannot be placed in the file
+        """
+        edits: List[Edit] = []
+        if excerpt is not None:
+            excerpt_edits = self._excerpt_edits(excerpt.corrected_code)
+            if excerpt_edits is None:
+                return None
+            edits.extend(excerpt_edits)
+        edits.extend(self._carried_edits())
+
+        # Category name -> merged entry, excerpt findings first
+        categories: Dict[str, Dict] = {}
+        if excerpt is not None:
+            _add_categories(categories, excerpt, self._excerpt_line, keep_general=True)
+        # Earlier categories without details cannot be placed; they still hold if nothing changed
+        _add_categories(categories, self.base.result, self._carried_line, keep_general=not self.regions)
+
+        recommendations = (excerpt.recommendations if excerpt is not None else []) + self.base.result.recommendations
+        limit = max(len(self.base.result.recommendations), len(excerpt.recommendations) if excerpt is not None else 0)
+
+        return CodeAnalysisOutput(
+            errors=[
+                ErrorCategory(
+                    category=entry["category"].category,
+                    count=entry["count"],
+                    description=entry["category"].description,
+                    icon=entry["category"].icon,
+                    details=sorted(entry["details"], key=lambda detail: detail.line)
+                )
+                for entry in categories.values()
+            ],
+            corrected_code=_apply(self.code, edits),
+            explanations=[entry["explanation"] for entry in categories.values()],
+            recommendations=list(dict.fromkeys(recommendations))[:limit]
+        )
+
+    def _excerpt_line(self, line_number: int) -> Optional[int]:
+        """File line of an excerpt line (None for separators and lines outside the excerpt)"""
+        if 1 <= line_number <= len(self.excerpt_lines):
+            return self.excerpt_lines[line_number - 1]
+        return None
+
+    def _carried_line(self, line_number: int) -> Optional[int]:
+        """Line in the code of an earlier line that is unchanged and not re-analyzed"""
+        line = self.line_map.get(line_number)
+        return None if line is None or line in self._reanalyzed else line
+
+    def _excerpt_edits(self, corrected: str) -> Optional[List[Edit]]:
+        """Corrections of the excerpt as edits of the code, or None if one spans a region boundary"""
+        excerpt = SourceText(self.excerpt)
+        code = SourceText(self.code)
+        edits = []
+
+        for edit in correction_ranges(self.excerpt, corrected):
+            # Every line whose text or line break is replaced must belong to a region
+            covered = self.excerpt_lines[edit["line"] - 1:edit["endLine"] - 1]
+            start = self._excerpt_offset(code, edit["line"], edit["col"])
+            end = self._excerpt_offset(code, edit["endLine"], edit["endCol"])
+
+            if None in covered or start is None or end is None:
+                removed = self.excerpt[
+                    excerpt.offset(edit["line"], edit["col"]):excerpt.offset(edit["endLine"], edit["endCol"])
+                ]
+                if removed.strip() or edit["replacement"].strip():
+                    return None
+                continue  # Only blank separator lines moved
+
+            edits.append((start, end, edit["replacement"]))
+
+        return edits
+
+    def _excerpt_offset(self, code: SourceText, line_number: int, col: int) -> Optional[int]:
+        """Offset in the code of a position in the excerpt"""
+        line = self._excerpt_line(line_number)
+        if line is not None:
+            return code.offset(line, col)
+        if col == 0 and line_number > 1:
+            # Start of a separator: right after the preceding region
+            return code.offset(self.excerpt_lines[line_number - 2] + 1, 0)
+        return None
+
+    def _carried_edits(self) -> List[Edit]:
+        """Earlier corrections of lines that are unchanged and not re-analyzed, as edits of the code"""
+        corrected = self.base.result.corrected_code
+        if not corrected.strip():
+            return []
+
+        code = SourceText(self.code)
+        edits = []
+        for edit in correction_ranges(self.base.code, corrected):
+            lines = [self._carried_line(number) for number in range(edit["line"], edit["endLine"] + 1)]
+            if None in lines or lines[-1] - lines[0] != len(lines) - 1:
+                continue
+            edits.append((
+                code.offset(lines[0], edit["col"]),
+                code.offset(lines[-1], edit["endCol"]),
+                edit["replacement"]
+            ))
+        return edits
+
+
+class IncrementalAnalyzer:
+    """Finds the earlier analysis of a resubmitted file and plans re-analyzing its changes"""
+
+    def __init__(self, enabled: bool = INCREMENTAL_ANALYSIS_ENABLED):
+        self.enabled = enabled
+
+    async def find_plan(
+        self,
+        user_id: str,
+        code: str,
+        document_id: Optional[str],
+        db: AsyncSession
+    ) -> Optional[IncrementalPlan]:
+        """
+        Plan an incremental analysis of submitted code.
+
+        Args:
+            user_id: User performing the analysis
+            code: Submitted code
+            document_id: Client-supplied id of the file, if any
+            db: Database session
+
+        Returns:
+            Plan, or None when the code should be analyzed in full
+        """
+        lines = code.split("\n")
+        if not self.enabled or len(lines) < INCREMENTAL_MIN_LINES:
+            return None
+
+        start = time.perf_counter()
+        try:
+            base = await self._find_base(user_id, code, lines, document_id, db)
+            return self.plan(base, code) if base is not None else None
+        finally:
+            metrics.observe("analysis_tier_latency_ms.incremental", (time.perf_counter() - start) * 1000)
+
+    def plan(self, base: BaseAnalysis, code: str) -> Optional[IncrementalPlan]:
+        """
+        Diff submitted code against an earlier analysis of the same file.
+
+        Returns:
+            Plan (without regions if nothing changed), or None if the regions
+            to re-analyze would cover too much of the file
+        """
+        base_lines = base.code.split("\n")
+        lines = code.split("\n")
+
+        line_map: Dict[int, int] = {}
+        changed: List[Tuple[int, int]] = []
+        end = (len(base_lines), len(base_lines), len(lines), len(lines))
+        x = y = 0
+        for i1, i2, j1, j2 in diff_hunks(base_lines, lines) + [end]:
+            for k in range(i1 - x):
+                line_map[x + k + 1] = y + k + 1
+            if i2 > i1 or j2 > j1:
+                # A deletion is re-analyzed through the lines on both sides of it
+                changed.append((j1, j2) if j2 > j1 else (j1 - 1, j1 + 1))
+            x, y = i2, j2
+
+        # 0-based half-open ranges, widened by context and merged where they touch
+        regions: List[List[int]] = []
+        for lo, hi in changed:
+            lo = _top_level_start(lines, max(0, lo - INCREMENTAL_CONTEXT_LINES))
+            hi = min(len(lines), hi + INCREMENTAL_CONTEXT_LINES)
+            if regions and lo <= regions[-1][1]:
+                regions[-1] = [min(regions[-1][0], lo), max(regions[-1][1], hi)]
+            else:
+                regions.append([lo, hi])
+
+        if sum(hi - lo for lo, hi in regions) > len(lines) * INCREMENTAL_MAX_EXCERPT_RATIO:
+            metrics.inc("incremental_too_many_changes")
+            return None
+
+        return IncrementalPlan(base, code, [(lo + 1, hi) for lo, hi in regions], line_map)
+
+    async def _find_base(
+        self,
+        user_id: str,
+        code: str,
+        lines: List[str],
+        document_id: Optional[str],
+        db: AsyncSession
+    ) -> Optional[BaseAnalysis]:
+        """Latest analysis of the document, or else the user's recent analysis most similar to the code"""
+        query = (
+            select(CodeAnalysis.id, CodeAnalysis.code_content, CodeAnalysis.ai_raw_response)
+            .where(
+                CodeAnalysis.user_id == user_id,
+                CodeAnalysis.created_at >= func.now() - timedelta(hours=INCREMENTAL_MAX_AGE_HOURS)
+            )
+            .order_by(CodeAnalysis.created_at.desc())
+        )
+
+        if document_id:
+            rows = (await db.execute(
+                query.where(CodeAnalysis.document_id == document_id).limit(1)
+            )).all()
+        else:
+            # Similar code has roughly the same size; don't transfer the rest
+            rows = (await db.execute(
+                query.where(func.length(CodeAnalysis.code_content).between(
+                    int(len(code) * INCREMENTAL_MIN_SIMILARITY),
+                    int(len(code) / INCREMENTAL_MIN_SIMILARITY) + 1
+                )).limit(INCREMENTAL_CANDIDATES)
+            )).all()
+            rows = _most_similar(lines, rows)
+
+        for row in rows:
+            result = _structured(row.ai_raw_response)
+            if result is not None:
+                return BaseAnalysis(row.id, row.code_content, result)
+        return None
+
+
+def _most_similar(lines: List[str], rows: List) -> List:
+    """Rows whose code shares enough lines with the submitted lines, most similar (then most recent) first"""
+    counts = Counter(lines)
+    scored = []
+    for row in rows:
+        base_lines = row.code_content.split("\n")
+        similarity = 2 * sum((counts & Counter(base_lines)).values()) / (len(lines) + len(base_lines))
+        if similarity >= INCREMENTAL_MIN_SIMILARITY:
+            scored.append((similarity, row))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [row for _, row in scored]
+
+
+def _structured(raw_response: Optional[str]) -> Optional[CodeAnalysisOutput]:
+    """Structured output saved with an analysis, or None for markdown results"""
+    if not raw_response or not raw_response.lstrip().startswith("{"):
+        return None
+    try:
+        return CodeAnalysisOutput.model_validate_json(raw_response)
+    except ValueError:
+        return None
+
+
+def _top_level_start(lines: List[str], start: int) -> int:
+    """
+    Move a region start up to the unindented line (def, class, function
+    header) its first code line belongs to, so the excerpt does not begin in
+    the middle of a block. The start is kept when no such line is near.
+    """
+    first = next((line for line in lines[start:] if line.strip()), "")
+    if not first[:1].isspace():
+        return start
+
+    for number in range(start - 1, max(start - HEADER_SEARCH_LINES, 0) - 1, -1):
+        line = lines[number]
+        if line.strip() and not line[0].isspace():
+            # A closing bracket ends the previous block; the region starts between blocks
+            return start if line[0] in _CLOSERS else number
+    return start
+
+
+def _add_categories(
+    categories: Dict[str, Dict],
+    analysis: CodeAnalysisOutput,
+    map_line: Callable[[int], Optional[int]],
+    keep_general: bool
+) -> None:
+    """
+    Add an analysis' error categories to merged entries.
+
+    Details are renumbered with map_line and dropped where it returns None;
+    a category that loses all its details is dropped too.
+    """
+    for index, category in enumerate(analysis.errors):
+        details = []
+        for detail in category.details:
+            line = map_line(detail.line)
+            if line is not None:
+                details.append(detail.model_copy(update={"line": line}))
+
+        if (category.details and not details) or (not category.details and not keep_general):
+            continue
+
+        explanation = analysis.explanations[index] if index < len(analysis.explanations) else ""
+        count = len(details) if details else category.count
+
+        entry = categories.get(category.category)
+        if entry is None:
+            categories[category.category] = {
+                "category": category,
+                "count": count,
+                "details": details,
+                "explanation": explanation
+            }
+        else:
+            entry["count"] += count
+            entry["details"].extend(details)
+            entry["explanation"] = entry["explanation"] or explanation
+
+
+def _apply(code: str, edits: List[Edit]) -> str:
+    """Apply non-overlapping edits (an edit overlapping an earlier one is skipped)"""
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        if start < position:
+            continue
+        parts.append(code[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(code[position:])
+    return "".join(parts)
+
+
+# Global instance
+_incremental_analyzer_instance = None
+
+
+def get_incremental_analyzer() -> IncrementalAnalyzer:
+    """Get singleton incremental analyzer instance"""
+    global _incremental_analyzer_instance
+    if _incremental_analyzer_instance is None:
+        _incremental_analyzer_instance = IncrementalAnalyzer()
+    return _incremental_analyzer_instance
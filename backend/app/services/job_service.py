@@ -0,0 +1,410 @@
+"""
+Analysis job queue - runs async-mode analyses in background workers.
+
+Jobs are rows in analysis_jobs, so they are shared by all app processes and
+survive restarts. Every process runs ANALYSIS_JOB_WORKERS workers that claim
+the oldest queued job with FOR UPDATE SKIP LOCKED and hold it under a lease
+that is renewed while the analysis runs. A job whose worker died (crash,
+restart, lost connection) is claimed again once its lease expires; jobs are
+therefore run at least once, and at most ANALYSIS_JOB_MAX_ATTEMPTS times.
+
+Enqueueing wakes this process's workers immediately; jobs enqueued by other
+processes are picked up within ANALYSIS_JOB_POLL_SECONDS.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.analysis_job import AnalysisJob, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+from app.services.analysis_service import get_analysis_service
+from app.utils.metrics import metrics
+
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))  # 0: this process only enqueues
+ANALYSIS_JOB_POLL_SECONDS = float(os.getenv("ANALYSIS_JOB_POLL_SECONDS", "2"))
+ANALYSIS_JOB_LEASE_SECONDS = int(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", "120"))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+ANALYSIS_JOB_RETENTION_HOURS = int(os.getenv("ANALYSIS_JOB_RETENTION_HOURS", "24"))
+ANALYSIS_JOB_STATS_SECONDS = float(os.getenv("ANALYSIS_JOB_STATS_SECONDS", "10"))
+
+TERMINAL_STATES = (JOB_DONE, JOB_FAILED)
+
+
+class AnalysisJobQueue:
+    """Durable analysis job queue with an in-process worker pool"""
+
+    def __init__(self, workers: int = ANALYSIS_JOB_WORKERS):
+        """
+        Args:
+            workers: Number of worker tasks started by start()
+        """
+        self.workers = workers
+        self.analysis = get_analysis_service()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        # job id -> events of local subscribers waiting for that job to change
+        self._subscribers: Dict[str, Set[asyncio.Event]] = {}
+
+    def start(self) -> None:
+        """Start the workers and the queue statistics loop"""
+        if self._tasks:
+            return
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._stats_loop()))
+        print(f"✓ Analysis job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running are handed back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(
+        self,
+        user_id: str,
+        code: str,
+        language: str,
+        db: AsyncSession,
+        document_id: Optional[str] = None
+    ) -> AnalysisJob:
+        """
+        Queue an analysis.
+
+        Args:
+            user_id: User requesting the analysis
+            code: Source code to analyze
+            language: Language hint
+            db: Database session (committed)
+            document_id: Client-supplied id of the submitted file, if any
+
+        Returns:
+            The queued job
+        """
+        job = AnalysisJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            code=code,
+            language=language,
+            document_id=document_id,
+            status=JOB_QUEUED,
+            attempts=0
+        )
+        db.add(job)
+        await db.commit()
+
+        metrics.inc("analysis_jobs_enqueued")
+        self._wakeup.set()
+        return job
+
+    async def get_job(self, job_id: str, user_id: str, db: AsyncSession) -> Optional[AnalysisJob]:
+        """Get one of the user's jobs, or None"""
+        return (await db.execute(
+            select(AnalysisJob).where(AnalysisJob.id == job_id, AnalysisJob.user_id == user_id)
+        )).scalar_one_or_none()
+
+    async def subscribe(self, job_id: str, user_id: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Follow a job until it finishes.
+
+        Yields ("status", job) whenever the job's status changes and finally
+        ("complete", result) or ("failed", {"detail": ...}). No database
+        connection is held between checks.
+
+        Args:
+            job_id: Job to follow
+            user_id: Owner of the job
+        """
+        changed = asyncio.Event()
+        self._subscribers.setdefault(job_id, set()).add(changed)
+        last_status = None
+
+        try:
+            while True:
+                async with AsyncSessionLocal() as db:
+                    job = await self.get_job(job_id, user_id, db)
+
+                if job is None:
+                    yield "failed", {"detail": "Job not found"}
+                    return
+
+                if job.status == JOB_DONE:
+                    yield "complete", job.result
+                    return
+                if job.status == JOB_FAILED:
+                    yield "failed", {"detail": job.error or "Failed to analyze code"}
+                    return
+
+                if job.status != last_status:
+                    last_status = job.status
+                    yield "status", format_job(job)
+
+                # Woken by local workers at once; jobs run by other processes are polled
+                try:
+                    await asyncio.wait_for(changed.wait(), ANALYSIS_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+        finally:
+            waiting = self._subscribers.get(job_id)
+            if waiting is not None:
+                waiting.discard(changed)
+                if not waiting:
+                    del self._subscribers[job_id]
+
+    async def _worker(self) -> None:
+        """Claim and run jobs until cancelled"""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await self._claim(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Analysis job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), ANALYSIS_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed; the job is retried once its lease expires
+                print(f"❌ Analysis job {job.id} could not be recorded: {str(e)}")
+
+    async def _claim(self, db: AsyncSession):
+        """
+        Claim the oldest runnable job: queued, or running with an expired lease.
+
+        Returns:
+            Row with the job's id, user_id, code, language, document_id, attempts
+            and queue wait, or None
+        """
+        now = func.now()
+        candidate = (
+            select(AnalysisJob.id)
+            .where(or_(
+                AnalysisJob.status == JOB_QUEUED,
+                and_(AnalysisJob.status == JOB_RUNNING, AnalysisJob.lease_expires_at < now)
+            ))
+            .order_by(AnalysisJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        job = (await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == candidate)
+            .values(
+                status=JOB_RUNNING,
+                attempts=AnalysisJob.attempts + 1,
+                started_at=now,
+                lease_expires_at=now + timedelta(seconds=ANALYSIS_JOB_LEASE_SECONDS)
+            )
+            .returning(
+                AnalysisJob.id,
+                AnalysisJob.user_id,
+                AnalysisJob.code,
+                AnalysisJob.language,
+                AnalysisJob.document_id,
+                AnalysisJob.attempts,
+                func.extract("epoch", now - AnalysisJob.created_at).label("waited_seconds")
+            )
+        )).first()
+        await db.commit()
+        return job
+
+    async def _run(self, job) -> None:
+        """Run a claimed job and record its outcome"""
+        if job.attempts > ANALYSIS_JOB_MAX_ATTEMPTS:
+            # Its workers kept dying mid-run; don't let it take down another one
+            await self._finish(job, JOB_FAILED, error="Analysis did not complete")
+            metrics.inc("analysis_jobs_failed")
+            return
+
+        if job.attempts == 1:
+            metrics.observe("analysis_job_queue_wait_ms", float(job.waited_seconds) * 1000)
+        else:
+            metrics.inc("analysis_jobs_retried")
+
+        self._notify(job.id)
+        lease = asyncio.create_task(self._keep_leased(job))
+        start = time.perf_counter()
+
+        analysis = asyncio.create_task(self.analysis.analyze_and_save(
+            user_id=job.user_id,
+            code=job.code,
+            language=job.language,
+            document_id=job.document_id
+        ))
+
+        try:
+            result = await asyncio.shield(analysis)
+        except asyncio.CancelledError:
+            # Shutting down. The analysis runs to completion and is saved either way
+            # (in-flight analyses are shielded), so wait for it instead of letting the
+            # next worker save a second one
+            try:
+                result = await analysis
+            except Exception:
+                # Hand the job to the next worker without using up an attempt
+                await self._finish(job, JOB_QUEUED, handed_back=True)
+            else:
+                await self._finish(job, JOB_DONE, result=result)
+                metrics.inc("analysis_jobs_completed")
+            raise
+        except Exception as e:
+            print(f"❌ Analysis job {job.id} failed (attempt {job.attempts}): {str(e)}")
+            if job.attempts < ANALYSIS_JOB_MAX_ATTEMPTS:
+                await self._finish(job, JOB_QUEUED)
+            else:
+                await self._finish(job, JOB_FAILED, error="Failed to analyze code. Please try again.")
+                metrics.inc("analysis_jobs_failed")
+            return
+        finally:
+            lease.cancel()
+
+        await self._finish(job, JOB_DONE, result=result)
+        metrics.inc("analysis_jobs_completed")
+        metrics.observe("analysis_job_run_ms", (time.perf_counter() - start) * 1000)
+
+    async def _keep_leased(self, job) -> None:
+        """Extend the job's lease while it runs"""
+        while True:
+            await asyncio.sleep(ANALYSIS_JOB_LEASE_SECONDS / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(AnalysisJob)
+                        .where(AnalysisJob.id == job.id, AnalysisJob.attempts == job.attempts)
+                        .values(lease_expires_at=func.now() + timedelta(seconds=ANALYSIS_JOB_LEASE_SECONDS))
+                    )
+                    await db.commit()
+            except Exception as e:
+                print(f"⚠ Failed to renew lease of analysis job {job.id}: {str(e)}")
+
+    async def _finish(
+        self,
+        job,
+        status: str,
+        result: Optional[Dict] = None,
+        error: Optional[str] = None,
+        handed_back: bool = False
+    ) -> None:
+        """
+        Record a job's new state.
+
+        Only applies while this worker still owns the job, so a worker whose
+        lease expired cannot overwrite the attempt that replaced it.
+        """
+        values = {"status": status, "lease_expires_at": None}
+        if handed_back:
+            values["attempts"] = AnalysisJob.attempts - 1
+        if status in TERMINAL_STATES:
+            values.update(
+                finished_at=func.now(),
+                result=result,
+                analysis_id=result["id"] if result else None,
+                error=error
+            )
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(AnalysisJob)
+                .where(
+                    AnalysisJob.id == job.id,
+                    AnalysisJob.status == JOB_RUNNING,
+                    AnalysisJob.attempts == job.attempts
+                )
+                .values(**values)
+            )
+            await db.commit()
+
+        self._notify(job.id)
+        if status == JOB_QUEUED:
+            self._wakeup.set()
+
+    def _notify(self, job_id: str) -> None:
+        """Wake local subscribers of a job"""
+        for changed in self._subscribers.get(job_id, ()):
+            changed.set()
+
+    async def _stats_loop(self) -> None:
+        """Publish queue depth/age gauges and prune old finished jobs"""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self._update_stats(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Failed to update analysis job stats: {str(e)}")
+            await asyncio.sleep(ANALYSIS_JOB_STATS_SECONDS)
+
+    async def _update_stats(self, db: AsyncSession) -> None:
+        rows = (await db.execute(
+            select(
+                AnalysisJob.status,
+                func.count(),
+                func.extract("epoch", func.now() - func.min(AnalysisJob.created_at))
+            )
+            .where(AnalysisJob.status.in_((JOB_QUEUED, JOB_RUNNING)))
+            .group_by(AnalysisJob.status)
+        )).all()
+        by_status = {status: (count, age) for status, count, age in rows}
+
+        queued, oldest = by_status.get(JOB_QUEUED, (0, None))
+        metrics.set_gauge("analysis_jobs_queued", queued)
+        metrics.set_gauge("analysis_jobs_running", by_status.get(JOB_RUNNING, (0, None))[0])
+        metrics.set_gauge("analysis_jobs_oldest_queued_seconds", float(oldest or 0))
+
+        await db.execute(
+            delete(AnalysisJob).where(
+                AnalysisJob.status.in_(TERMINAL_STATES),
+                AnalysisJob.finished_at < func.now() - timedelta(hours=ANALYSIS_JOB_RETENTION_HOURS)
+            )
+        )
+        await db.commit()
+
+
+def format_job(job: AnalysisJob) -> Dict:
+    """Job status for API responses (result only once the job is done)"""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "createdAt": job.created_at.isoformat() if job.created_at else None,
+        "finishedAt": job.finished_at.isoformat() if job.finished_at else None,
+        "result": job.result,
+        "error": job.error
+    }
+
+
+# Global instance
+_job_queue_instance = None
+
+
+def get_job_queue() -> AnalysisJobQueue:
+    """Get singleton analysis job queue"""
+    global _job_queue_instance
+    if _job_queue_instance is None:
+        _job_queue_instance = AnalysisJobQueue()
+    return _job_queue_instance
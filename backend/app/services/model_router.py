@@ -0,0 +1,433 @@
+"""
+Model router - spreads code analysis over several AI backends.
+
+Each backend (a model/provider pair) keeps rolling latency and error
+statistics and a circuit breaker. Requests go to the healthy backend with
+the best recent latency; failures fail over to the next one. With hedging
+enabled, a second backend is asked as well when the first has not answered
+within its own p95 latency, and whichever answers first wins. Only answers
+of the first configured (primary) backend are cached, under its
+model_version; failover and hedge answers from other models are served but
+never reused for other requests.
+
+Backends are configured with AI_BACKENDS, a comma-separated list of:
+    groq:<model>                          e.g. groq:llama-3.3-70b-versatile
+    mock                                  the development mock service
+    fake:<latency_ms>[:<failure_rate>[:<slow_rate>]]
+                                          offline fake with configurable latency,
+                                          failure rate and tail (10x) rate
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from app.services.ai_service import AIService, FakeAIService
+from app.services.analysis_result import AnalysisResult
+from app.utils.metrics import metrics
+
+AI_BACKENDS = os.getenv("AI_BACKENDS", "")
+AI_ROUTER_HEDGE = os.getenv("AI_ROUTER_HEDGE", "false").lower() == "true"
+AI_ROUTER_HEDGE_DEFAULT_DELAY_MS = int(os.getenv("AI_ROUTER_HEDGE_DEFAULT_DELAY_MS", "3000"))
+AI_ROUTER_HEDGE_MIN_DELAY_MS = int(os.getenv("AI_ROUTER_HEDGE_MIN_DELAY_MS", "200"))
+AI_ROUTER_TIMEOUT_SECONDS = float(os.getenv("AI_ROUTER_TIMEOUT_SECONDS", "60"))
+AI_ROUTER_STATS_WINDOW = int(os.getenv("AI_ROUTER_STATS_WINDOW", "100"))
+AI_ROUTER_BREAKER_FAILURES = int(os.getenv("AI_ROUTER_BREAKER_FAILURES", "5"))
+AI_ROUTER_BREAKER_COOLDOWN_SECONDS = float(os.getenv("AI_ROUTER_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Percentiles need a few samples before they are trusted
+MIN_SAMPLES = 5
+
+# Score multiplier per unit of error rate when ranking backends
+ERROR_RATE_PENALTY = 4.0
+
+
+class RollingStats:
+    """Latency and outcome of the most recent calls to a backend"""
+
+    def __init__(self, window: int = AI_ROUTER_STATS_WINDOW):
+        """
+        Args:
+            window: Number of recent calls kept
+        """
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        """Add one call (only successful calls count towards latency)"""
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Latency percentile of recent successful calls.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Latency in ms, or None with fewer than MIN_SAMPLES samples
+        """
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        """Share of recent calls that failed"""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a failing backend for a while.
+
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `cooldown_seconds` have passed, letting one probe
+    call through; the probe closes the circuit on success or reopens it.
+    Calls claim their slot with begin(), so concurrent requests that all saw
+    the circuit half open send only one probe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = AI_ROUTER_BREAKER_FAILURES,
+        cooldown_seconds: float = AI_ROUTER_BREAKER_COOLDOWN_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Whether a call may be sent now"""
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self._probe_in_flight
+        return self.state == "closed"
+
+    def begin(self) -> bool:
+        """
+        Mark a call as started, claiming the probe slot when half open.
+
+        Returns:
+            False if the call may not be sent (the circuit opened, or another
+            request is already probing since the caller checked available())
+        """
+        if not self.available():
+            return False
+        if self.state == "half_open":
+            self._probe_in_flight = True
+        return True
+
+    def abandon(self) -> None:
+        """A started call was cancelled without an outcome"""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"⚠ Circuit opened for AI backend {self.name} after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class Backend:
+    """One model/provider the router can send requests to"""
+
+    def __init__(self, name: str, service):
+        """
+        Args:
+            name: Unique backend name (used in metrics)
+            service: AIService, FakeAIService or GroqAIService instance
+        """
+        self.name = name
+        self.service = service
+        self.stats = RollingStats()
+        self.breaker = CircuitBreaker(name)
+
+    @property
+    def model_version(self) -> str:
+        return getattr(self.service, "model_version", self.name)
+
+    @property
+    def supports_streaming(self) -> bool:
+        return hasattr(self.service, "stream_analysis")
+
+    async def analyze(self, code: str, language: str, hints: str = "") -> AnalysisResult:
+        """Analyze code, raising on failure"""
+        if hasattr(self.service, "analyze_structured"):
+            # analyze_code of structured backends hides failures behind a fallback response
+            structured = await self.service.analyze_structured(code, language, hints)
+            return AnalysisResult(language, structured=structured)
+        return await self.service.analyze_code(code, language, hints)
+
+    def score(self) -> float:
+        """Ranking score, lower is better (untried backends rank first)"""
+        p50 = self.stats.percentile(50) or 0.0
+        return p50 * (1 + ERROR_RATE_PENALTY * self.stats.error_rate())
+
+    def snapshot(self) -> Dict:
+        return {
+            "circuit": self.breaker.state,
+            "p50_ms": self.stats.percentile(50),
+            "p95_ms": self.stats.percentile(95),
+            "error_rate": round(self.stats.error_rate(), 3),
+            "calls": len(self.stats.outcomes)
+        }
+
+
+class ModelRouter:
+    """Latency-aware router with circuit breaking and optional hedging"""
+
+    def __init__(self, backends: List[Backend], hedge: bool = AI_ROUTER_HEDGE):
+        """
+        Args:
+            backends: Backends in preference order (used to break ties)
+            hedge: Send a second request when the first is slower than its p95
+        """
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+
+        self.backends = backends
+        self.hedge = hedge
+        # Cache keys name the model whose answers are cached
+        self.primary = backends[0]
+        self.model_version = self.primary.model_version
+
+    async def analyze_code(self, code: str, language: str, hints: str = "") -> AnalysisResult:
+        """
+        Analyze code on the best available backend.
+
+        Raises:
+            RuntimeError: If every backend failed or is unavailable
+        """
+        return await self._route(code, language, hints)
+
+    async def stream_analysis(self, code: str, language: str, hints: str = "") -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream an analysis from the best available backend.
+
+        Fails over to the next backend only while nothing has been yielded.
+        Backends that cannot stream yield just the final ("result", ...) event.
+        """
+        last_error: Optional[Exception] = None
+
+        for backend in self._ranked():
+            if not backend.supports_streaming:
+                try:
+                    result = await self._call(backend, code, language, hints)
+                except Exception as e:
+                    last_error = e
+                    continue
+                yield "result", result
+                return
+
+            if not backend.breaker.begin():
+                metrics.inc("ai_router_probe_skips")
+                last_error = RuntimeError(f"AI backend {backend.name} is unavailable")
+                continue
+
+            yielded = False
+            start = time.perf_counter()
+            try:
+                async for name, value in backend.service.stream_analysis(code, language, hints):
+                    yielded = True
+                    if name == "result":
+                        self._mark_origin(backend, value)
+                    yield name, value
+            except asyncio.CancelledError:
+                backend.breaker.abandon()
+                raise
+            except Exception as e:
+                self._record(backend, start, ok=False)
+                if yielded:
+                    raise
+                last_error = e
+                continue
+            except GeneratorExit:
+                backend.breaker.abandon()
+                raise
+
+            self._record(backend, start, ok=True)
+            return
+
+        raise RuntimeError(f"No AI backend could complete the analysis: {last_error}")
+
+    def stats(self) -> Dict:
+        """Per-backend health for /metrics"""
+        return {
+            "hedging": self.hedge,
+            "backends": {b.name: b.snapshot() for b in self.backends}
+        }
+
+    def _ranked(self) -> List[Backend]:
+        """Available backends, best first"""
+        available = [b for b in self.backends if b.breaker.available()]
+        return sorted(available, key=lambda b: b.score())
+
+    async def _route(self, code: str, language: str, hints: str) -> AnalysisResult:
+        candidates = self._ranked()
+        if not candidates:
+            metrics.inc("ai_router_unavailable")
+            raise RuntimeError("No AI backend available (all circuits open)")
+
+        if not self.hedge or len(candidates) < 2:
+            return await self._failover(candidates, code, language, hints)
+
+        primary, hedge, rest = candidates[0], candidates[1], candidates[2:]
+        primary_task = asyncio.create_task(self._call(primary, code, language, hints))
+        tasks = {primary_task}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(primary) / 1000)
+            if primary_task in done and primary_task.exception() is None:
+                return primary_task.result()
+
+            if primary_task in done:
+                # Primary failed fast: plain failover to the others
+                return await self._failover([hedge] + rest, code, language, hints)
+
+            metrics.inc("ai_router_hedges")
+            hedge_task = asyncio.create_task(self._call(hedge, code, language, hints))
+            tasks.add(hedge_task)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            metrics.inc("ai_router_hedge_wins")
+                        return task.result()
+
+            return await self._failover(rest, code, language, hints)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _failover(
+        self,
+        candidates: List[Backend],
+        code: str,
+        language: str,
+        hints: str
+    ) -> AnalysisResult:
+        """Try backends in order until one succeeds"""
+        last_error: Optional[Exception] = None
+        for backend in candidates:
+            try:
+                return await self._call(backend, code, language, hints)
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f"No AI backend could complete the analysis: {last_error}")
+
+    async def _call(self, backend: Backend, code: str, language: str, hints: str) -> AnalysisResult:
+        """Call one backend with a timeout, recording latency and outcome"""
+        if not backend.breaker.begin():
+            metrics.inc("ai_router_probe_skips")
+            raise RuntimeError(f"AI backend {backend.name} is unavailable")
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(backend.analyze(code, language, hints), AI_ROUTER_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            # Lost a hedge race (or the request went away): no outcome to record
+            backend.breaker.abandon()
+            raise
+        except Exception as e:
+            print(f"⚠ AI backend {backend.name} failed: {str(e)}")
+            self._record(backend, start, ok=False)
+            raise
+
+        self._record(backend, start, ok=True)
+        return self._mark_origin(backend, result)
+
+    def _mark_origin(self, backend: Backend, result: Optional[AnalysisResult]) -> Optional[AnalysisResult]:
+        """Keep answers of backends other than the primary out of the cache"""
+        if result is not None and backend is not self.primary:
+            result.cacheable = False
+        return result
+
+    def _record(self, backend: Backend, start: float, ok: bool) -> None:
+        latency_ms = (time.perf_counter() - start) * 1000
+        backend.stats.record(latency_ms, ok)
+        if ok:
+            backend.breaker.record_success()
+            metrics.observe(f"ai_backend_latency_ms.{backend.name}", latency_ms)
+        else:
+            backend.breaker.record_failure()
+            metrics.inc(f"ai_backend_failures.{backend.name}")
+        metrics.set_gauge(f"ai_backend_circuit_open.{backend.name}", 0 if backend.breaker.state == "closed" else 1)
+
+    def _hedge_delay(self, backend: Backend) -> float:
+        """How long to wait for a backend before hedging, in ms"""
+        p95 = backend.stats.percentile(95)
+        delay = p95 if p95 is not None else AI_ROUTER_HEDGE_DEFAULT_DELAY_MS
+        return max(delay, AI_ROUTER_HEDGE_MIN_DELAY_MS)
+
+
+def parse_backends(spec: str) -> List[Backend]:
+    """
+    Build backends from an AI_BACKENDS specification.
+
+    Raises:
+        ValueError: On an unknown backend kind
+    """
+    backends: List[Backend] = []
+    names = set()
+
+    for entry in (part.strip() for part in spec.split(",")):
+        if not entry:
+            continue
+
+        kind, _, options = entry.partition(":")
+        if kind == "groq":
+            from app.services.groq_ai_service import GroqAIService, GROQ_MODEL
+            service = GroqAIService(model=options or GROQ_MODEL)
+        elif kind == "mock":
+            service = AIService()
+        elif kind == "fake":
+            values = [float(v) for v in options.split(":") if v] if options else []
+            latency_ms, failure_rate, slow_rate = (values + [800, 0.0, 0.0][len(values):])[:3]
+            service = FakeAIService(latency_ms, failure_rate, slow_rate, name=entry)
+        else:
+            raise ValueError(f"Unknown AI backend '{entry}'")
+
+        name = entry
+        while name in names:
+            name += "'"
+        names.add(name)
+        backends.append(Backend(name, service))
+
+    return backends
+
+
+# Global instance
+_model_router_instance = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get singleton model router built from AI_BACKENDS"""
+    global _model_router_instance
+    if _model_router_instance is None:
+        _model_router_instance = ModelRouter(parse_backends(AI_BACKENDS))
+    return _model_router_instance
@@ -3,7 +3,29 @@ Parser service to extract structured data from AI markdown responses.
 """
 
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+
+# Section names recognized in AI responses (matched case-insensitively)
+SECTIONS = ("Errors", "Corrected Code", "Explanation", "Recommendations")
+
+# "## Name" header line; a section runs until the next "##" or the end of the response
+_SECTION_HEADER = re.compile(
+    r'##\s*(' + "|".join(re.escape(name) for name in SECTIONS) + r')\s*\n',
+    re.IGNORECASE
+)
+_SECTION_KEYS = {name.lower(): name for name in SECTIONS}
+
+_CODE_BLOCK = re.compile(r'```([\w]*)\n(.*?)```', re.DOTALL)
+_CODE_FENCE = re.compile(r'```[\w]*')
+_ERROR_ENTRY = re.compile(r'\*\*([^*]+)\*\*:\s*([^\n]+)', re.MULTILINE)
+_EXPLANATION_ENTRY = re.compile(r'\*\*([^*]+)\*\*:\s*([^\n]+(?:\n(?!\*\*)[^\n]+)*)', re.MULTILINE)
+_BULLET = re.compile(r'^[-*]\s+(.+)$', re.MULTILINE)
+
+# "on line 5", "at line 3" are preferred over "Line 10:"
+_LINE_NUMBER = re.compile(r'line\s+(\d+)')
+_LINE_NUMBER_CAPITALIZED = re.compile(r'Line\s+(\d+)')
+
+_NO_EXPLANATION = "No detailed explanation available."
 
 
 class ParserService:
@@ -13,22 +35,51 @@ class ParserService:
         """
         Parse AI markdown response into structured format.
 
+        The response is split into sections once; each extractor then only
+        scans its own section.
+
         Args:
             markdown: Markdown-formatted AI response
 
         Returns:
             Dictionary with errors, corrected_code, explanations, recommendations, and language
         """
-        code_info = self.extract_code_block_with_language(markdown)
+        sections = self.split_sections(markdown)
+        code_info = self._code_block_with_language(markdown, sections)
 
         return {
-            "errors": self.extract_errors(markdown),
+            "errors": self._errors_from_section(sections.get("Errors")),
             "corrected_code": code_info["code"],
             "language": code_info["language"],
-            "explanations": self.extract_explanations(markdown),
-            "recommendations": self.extract_recommendations(markdown)
+            "explanations": self._explanations_from_section(sections.get("Explanation")),
+            "recommendations": self._recommendations_from_section(sections.get("Recommendations"))
         }
 
+    def split_sections(self, markdown: str) -> Dict[str, str]:
+        """
+        Split a response into its known sections in one pass.
+
+        Args:
+            markdown: Full markdown text
+
+        Returns:
+            Section name (as in SECTIONS) -> stripped content, for the first
+            occurrence of each section
+        """
+        sections: Dict[str, str] = {}
+
+        for header in _SECTION_HEADER.finditer(markdown):
+            name = _SECTION_KEYS[header.group(1).lower()]
+            if name in sections:
+                continue
+
+            end = markdown.find("##", header.end())
+            sections[name] = markdown[header.end():end if end != -1 else len(markdown)].strip()
+            if len(sections) == len(SECTIONS):
+                break
+
+        return sections
+
     def extract_errors(self, markdown: str) -> List[Dict[str, str]]:
         """
         Extract errors from ## Errors section.
@@ -41,24 +92,7 @@ class ParserService:
         Returns:
             List of {"type": "Error Type", "message": "Description"}
         """
-        errors = []
-
-        # Find the Errors section
-        errors_section = self._extract_section(markdown, "Errors")
-        if not errors_section:
-            return errors
-
-        # Match pattern: **Error Type**: Description
-        pattern = r'\*\*([^*]+)\*\*:\s*([^\n]+)'
-        matches = re.findall(pattern, errors_section, re.MULTILINE)
-
-        for error_type, message in matches:
-            errors.append({
-                "type": error_type.strip(),
-                "message": message.strip()
-            })
-
-        return errors
+        return self._errors_from_section(self._extract_section(markdown, "Errors"))
 
     def extract_code_block(self, markdown: str) -> str:
         """
@@ -89,34 +123,7 @@ class ParserService:
         Returns:
             Dictionary with "code" and "language" keys
         """
-        # Find code block with language specification
-        # Pattern matches: ```language\ncode```
-        code_pattern = r'```([\w]*)\n(.*?)```'
-        code_match = re.search(code_pattern, markdown, re.DOTALL)
-
-        if code_match:
-            language = code_match.group(1).strip()
-            code = code_match.group(2).strip()
-            return {
-                "code": code,
-                "language": language if language else "unknown"
-            }
-
-        # Fallback: try to find Corrected Code section without code block
-        corrected_section = self._extract_section(markdown, "Corrected Code")
-        if corrected_section:
-            # Remove any remaining markdown
-            clean = re.sub(r'```[\w]*', '', corrected_section)
-            clean = clean.replace('```', '')
-            return {
-                "code": clean.strip(),
-                "language": "unknown"
-            }
-
-        return {
-            "code": "",
-            "language": "unknown"
-        }
+        return self._code_block_with_language(markdown, None)
 
     def extract_explanations(self, markdown: str) -> List[Dict[str, str]]:
         """
@@ -130,24 +137,21 @@ class ParserService:
         Returns:
             List of {"error_type": "Error Type", "explanation": "..."}
         """
-        explanations = []
-
-        # Find the Explanation section
-        expl_section = self._extract_section(markdown, "Explanation")
-        if not expl_section:
-            return explanations
+        return self._explanations_from_section(self._extract_section(markdown, "Explanation"))
 
-        # Match pattern: **Error Type**: Explanation
-        pattern = r'\*\*([^*]+)\*\*:\s*([^\n]+(?:\n(?!\*\*)[^\n]+)*)'
-        matches = re.findall(pattern, expl_section, re.MULTILINE)
+    def extract_recommendations(self, markdown: str) -> List[str]:
+        """
+        Extract recommendations from ## Recommendations section.
 
-        for error_type, explanation in matches:
-            explanations.append({
-                "error_type": error_type.strip(),
-                "explanation": explanation.strip()
-            })
+        Expected format:
+        ## Recommendations
+        - Recommendation 1
+        - Recommendation 2
 
-        return explanations
+        Returns:
+            List of recommendation strings
+        """
+        return self._recommendations_from_section(self._extract_section(markdown, "Recommendations"))
 
     def _extract_section(self, markdown: str, section_name: str) -> Optional[str]:
         """
@@ -160,59 +164,97 @@ class ParserService:
         Returns:
             Section content or None if not found
         """
-        # Match: ## Section Name ... until next ## or end of string
-        pattern = rf'##\s*{section_name}\s*\n(.*?)(?=##|\Z)'
-        match = re.search(pattern, markdown, re.DOTALL | re.IGNORECASE)
+        return self.split_sections(markdown).get(_SECTION_KEYS.get(section_name.lower(), section_name))
 
-        if match:
-            return match.group(1).strip()
+    def _code_block_with_language(self, markdown: str, sections: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Code and language of the first fenced block, else of the Corrected Code section"""
+        code_match = _CODE_BLOCK.search(markdown)
 
-        return None
+        if code_match:
+            language = code_match.group(1).strip()
+            code = code_match.group(2).strip()
+            return {
+                "code": code,
+                "language": language if language else "unknown"
+            }
+
+        # Fallback: try to find Corrected Code section without code block
+        if sections is None:
+            sections = self.split_sections(markdown)
+        corrected_section = sections.get("Corrected Code")
+        if corrected_section:
+            # Remove any remaining markdown
+            clean = _CODE_FENCE.sub('', corrected_section)
+            clean = clean.replace('```', '')
+            return {
+                "code": clean.strip(),
+                "language": "unknown"
+            }
+
+        return {
+            "code": "",
+            "language": "unknown"
+        }
+
+    def _errors_from_section(self, section: Optional[str]) -> List[Dict[str, str]]:
+        if not section:
+            return []
+
+        return [
+            {"type": error_type.strip(), "message": message.strip()}
+            for error_type, message in _ERROR_ENTRY.findall(section)
+        ]
 
-    def find_explanation_for_error(self, error_type: str, explanations: List[Dict]) -> str:
+    def _explanations_from_section(self, section: Optional[str]) -> List[Dict[str, str]]:
+        if not section:
+            return []
+
+        return [
+            {"error_type": error_type.strip(), "explanation": explanation.strip()}
+            for error_type, explanation in _EXPLANATION_ENTRY.findall(section)
+        ]
+
+    def _recommendations_from_section(self, section: Optional[str]) -> List[str]:
+        if not section:
+            return []
+
+        return [rec.strip() for rec in _BULLET.findall(section)]
+
+    def index_explanations(self, explanations: List[Dict]) -> Dict[str, str]:
         """
-        Find explanation for a specific error type.
+        Index explanations by lower-cased error type (first explanation wins).
 
         Args:
-            error_type: The error type to find explanation for
             explanations: List of explanation dictionaries
 
         Returns:
-            Explanation text or default message
+            Lookup table for find_explanation_for_error
         """
+        index: Dict[str, str] = {}
         for expl in explanations:
-            if expl["error_type"].lower() == error_type.lower():
-                return expl["explanation"]
-
-        return "No detailed explanation available."
-
-    def extract_recommendations(self, markdown: str) -> List[str]:
+            index.setdefault(expl["error_type"].lower(), expl["explanation"])
+        return index
+
+    def find_explanation_for_error(
+        self,
+        error_type: str,
+        explanations: Union[List[Dict], Dict[str, str]]
+    ) -> str:
         """
-        Extract recommendations from ## Recommendations section.
+        Find explanation for a specific error type.
 
-        Expected format:
-        ## Recommendations
-        - Recommendation 1
-        - Recommendation 2
+        Args:
+            error_type: The error type to find explanation for
+            explanations: Index from index_explanations, or a list of explanation
+                dictionaries (index it once when looking up several errors)
 
         Returns:
-            List of recommendation strings
+            Explanation text or default message
         """
-        recommendations = []
+        if not isinstance(explanations, dict):
+            explanations = self.index_explanations(explanations)
 
-        # Find the Recommendations section
-        rec_section = self._extract_section(markdown, "Recommendations")
-        if not rec_section:
-            return recommendations
-
-        # Match bullet points (- or * prefix)
-        pattern = r'^[-*]\s+(.+)$'
-        matches = re.findall(pattern, rec_section, re.MULTILINE)
-
-        for rec in matches:
-            recommendations.append(rec.strip())
-
-        return recommendations
+        return explanations.get(error_type.lower(), _NO_EXPLANATION)
 
     def extract_line_numbers(self, error_message: str) -> Optional[int]:
         """
@@ -225,16 +267,9 @@ class ParserService:
             Line number or None
         """
         # Match patterns like: "on line 5", "Line 10:", "at line 3"
-        patterns = [
-            r'line\s+(\d+)',
-            r'Line\s+(\d+)',
-            r'at\s+line\s+(\d+)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, error_message)
-            if match:
-                return int(match.group(1))
+        match = _LINE_NUMBER.search(error_message) or _LINE_NUMBER_CAPITALIZED.search(error_message)
+        if match:
+            return int(match.group(1))
 
         return None
 
@@ -0,0 +1,136 @@
+"""
+Rollup service - keeps per-user analytics aggregates up to date.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analysis_error import AnalysisError
+from app.models.analytics_rollup import UserDailyStats, UserDailyErrorCount, UserStatsTotals
+from app.models.code_analysis import CodeAnalysis
+
+_LINE_PATTERN = re.compile(r"\bline\s+(\d+)", re.IGNORECASE)
+
+
+class RollupService:
+    """Incremental maintenance of the analytics rollup tables"""
+
+    async def record_analyses(self, analyses: List[CodeAnalysis], db: AsyncSession) -> None:
+        """
+        Add new analyses to the rollups and the analysis_errors table.
+
+        Must be called in the same transaction that inserts the analyses. Rows
+        are attributed to CURRENT_DATE, which matches the created_at default of
+        rows inserted in that transaction.
+
+        Args:
+            analyses: Analyses being inserted
+            db: Database session
+        """
+        if not analyses:
+            return
+
+        # Insert the analyses first: occurrence rows reference their ids
+        await db.flush()
+
+        totals: Dict[str, Dict] = {}
+        error_counts: Dict[tuple, int] = defaultdict(int)
+        occurrences: List[Dict] = []
+
+        for analysis in analyses:
+            total_errors = analysis.total_errors or 0
+            user_totals = totals.setdefault(
+                analysis.user_id,
+                {"analyses": 0, "errors": 0, "min_errors": total_errors}
+            )
+            user_totals["analyses"] += 1
+            user_totals["errors"] += total_errors
+            user_totals["min_errors"] = min(user_totals["min_errors"], total_errors)
+
+            for error in analysis.errors or []:
+                error_type = error.get("type") or "Unknown"
+                error_counts[(analysis.user_id, error_type)] += 1
+                occurrences.append({
+                    "analysis_id": analysis.id,
+                    "user_id": analysis.user_id,
+                    "error_type": error_type,
+                    "line": self._error_line(error)
+                })
+
+        if occurrences:
+            await db.execute(insert(AnalysisError), occurrences)
+
+        today = func.current_date()
+
+        daily = insert(UserDailyStats).values([
+            {
+                "user_id": user_id,
+                "day": today,
+                "analysis_count": t["analyses"],
+                "error_count": t["errors"]
+            }
+            for user_id, t in totals.items()
+        ])
+        await db.execute(daily.on_conflict_do_update(
+            index_elements=[UserDailyStats.user_id, UserDailyStats.day],
+            set_={
+                "analysis_count": UserDailyStats.analysis_count + daily.excluded.analysis_count,
+                "error_count": UserDailyStats.error_count + daily.excluded.error_count
+            }
+        ))
+
+        if error_counts:
+            by_type = insert(UserDailyErrorCount).values([
+                {"user_id": user_id, "day": today, "error_type": error_type, "count": count}
+                for (user_id, error_type), count in error_counts.items()
+            ])
+            await db.execute(by_type.on_conflict_do_update(
+                index_elements=[UserDailyErrorCount.user_id, UserDailyErrorCount.day, UserDailyErrorCount.error_type],
+                set_={"count": UserDailyErrorCount.count + by_type.excluded.count}
+            ))
+
+        lifetime = insert(UserStatsTotals).values([
+            {
+                "user_id": user_id,
+                "total_analyses": t["analyses"],
+                "total_errors": t["errors"],
+                "min_errors": t["min_errors"],
+                "first_analysis_at": func.now(),
+                "last_analysis_at": func.now()
+            }
+            for user_id, t in totals.items()
+        ])
+        await db.execute(lifetime.on_conflict_do_update(
+            index_elements=[UserStatsTotals.user_id],
+            set_={
+                "total_analyses": UserStatsTotals.total_analyses + lifetime.excluded.total_analyses,
+                "total_errors": UserStatsTotals.total_errors + lifetime.excluded.total_errors,
+                "min_errors": func.least(UserStatsTotals.min_errors, lifetime.excluded.min_errors),
+                "last_analysis_at": lifetime.excluded.last_analysis_at
+            }
+        ))
+
+    @staticmethod
+    def _error_line(error: Dict) -> Optional[int]:
+        """Line number of an error, from its "line" field or its message"""
+        if isinstance(error.get("line"), int):
+            return error["line"]
+        match = _LINE_PATTERN.search(error.get("message") or "")
+        return int(match.group(1)) if match else None
+
+
+# Global instance
+_rollup_service_instance = None
+
+
+def get_rollup_service() -> RollupService:
+    """Get singleton rollup service instance"""
+    global _rollup_service_instance
+    if _rollup_service_instance is None:
+        _rollup_service_instance = RollupService()
+    return _rollup_service_instance
@@ -0,0 +1,621 @@
+"""
+Static analyzer - local syntax checks that run before the AI model.
+
+Python code is compiled (never executed). Each syntax error the compiler
+reports is repaired when the fix is unambiguous (missing colon, indentation,
+unbalanced bracket, unterminated string, `=` in a condition, Python 2 print)
+and the code is compiled again, so one pass finds every such error and yields
+corrected code that is known to parse. Other languages get a bracket and
+quote balancer that skips comments and string literals; its findings are
+reported but not repaired.
+
+STATIC_ANALYSIS_MODE decides what the findings are used for:
+- "off": the analyzer is not run
+- "hint": findings are passed to the AI model with the code
+- "short_circuit": code whose every syntax error was repaired and re-verified
+  by the Python parser is answered without calling the AI model; anything
+  else is sent to the model with hints
+"""
+
+import io
+import os
+import re
+import time
+import tokenize
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+from app.services.analysis_result import AnalysisResult, CodeAnalysisOutput, ErrorCategory, ErrorDetail
+from app.utils.document import SourceText
+from app.utils.metrics import metrics
+
+STATIC_ANALYSIS_MODE = os.getenv("STATIC_ANALYSIS_MODE", "hint").lower()  # off | hint | short_circuit
+STATIC_ANALYSIS_MAX_CHARS = int(os.getenv("STATIC_ANALYSIS_MAX_CHARS", "200000"))
+STATIC_ANALYSIS_MAX_FIXES = int(os.getenv("STATIC_ANALYSIS_MAX_FIXES", "20"))
+
+# Bump whenever findings or hint wording change so cached AI results are not reused
+STATIC_ANALYZER_VERSION = "1"
+
+MODES = ("off", "hint", "short_circuit")
+
+# Line comment prefixes, whether /* */ block comments exist, and string delimiters
+# (where "'" is not a string delimiter, 'a' is skipped as a char literal and a lone ' is ignored)
+_C_LIKE = (("//",), True, ('"',))
+_SCRIPT = (("//",), True, ('"', "'", "`"))
+BALANCER_SYNTAX = {
+    "javascript": _SCRIPT,
+    "javascriptreact": _SCRIPT,
+    "typescript": _SCRIPT,
+    "typescriptreact": _SCRIPT,
+    "java": _C_LIKE,
+    "c": _C_LIKE,
+    "cpp": _C_LIKE,
+    "csharp": _C_LIKE,
+    "go": (("//",), True, ('"', "`")),
+    "rust": _C_LIKE,
+    "kotlin": _C_LIKE,
+    "swift": _C_LIKE,
+    "dart": (("//",), True, ('"', "'")),
+    "scala": _C_LIKE,
+    "php": (("//", "#"), True, ('"', "'")),
+    "css": ((), True, ('"', "'")),
+    "scss": (("//",), True, ('"', "'")),
+    "json": ((), False, ('"',)),
+}
+_PYTHON_SYNTAX = (("#",), False, ('"""', "'''", '"', "'"))
+
+# Compiled balancer pattern per syntax
+_PATTERNS: Dict[Tuple, re.Pattern] = {}
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CLOSERS = {closer: opener for opener, closer in _OPENERS.items()}
+
+_COMPOUND_HEADER = re.compile(
+    r"^\s*(?:async\s+)?(if|elif|else|for|while|def|class|try|except|finally|with|match|case)\b"
+)
+_HEADER_LINE = re.compile(r"on line (\d+)")
+_ASSIGNMENT = re.compile(r"(?<![=!<>:])=(?!=)")
+_PRINT_STATEMENT = re.compile(r"^(\s*)print\s+(.+?),?$")
+_CONTINUES = (",", "(", "[", "{", "+", "-", "*", "/", "\\", "=", "and", "or")
+
+# Category -> (description, explanation, recommendation)
+CATEGORIES = {
+    "Missing Colon": (
+        "A statement that starts a block does not end with a colon.",
+        "In Python, lines that start a block (if, elif, else, for, while, def, class, try, except, "
+        "with) must end with ':'. The indented lines after it form the block.",
+        "Check that every line starting a block ends with a colon."
+    ),
+    "Indentation Error": (
+        "Lines are not indented consistently with the block structure.",
+        "Python uses indentation to group statements. Every line of a block must be indented by the "
+        "same amount, and a line ending with ':' must be followed by an indented block.",
+        "Indent with 4 spaces per level and never mix tabs and spaces."
+    ),
+    "Unbalanced Brackets": (
+        "Opening and closing brackets do not match.",
+        "Every '(', '[' and '{' needs a matching ')', ']' or '}' of the same kind, closed in the "
+        "reverse order they were opened.",
+        "Type the closing bracket right after the opening one, then fill in the middle."
+    ),
+    "Unterminated String": (
+        "A string literal is missing its closing quote.",
+        "A string has to end with the same quote character it starts with, on the same line "
+        "(unless it is a multi-line string).",
+        "Use an editor with syntax highlighting; an unterminated string colors the rest of the line."
+    ),
+    "Unterminated Comment": (
+        "A block comment is never closed.",
+        "A comment opened with '/*' continues until the next '*/', so everything after it is ignored.",
+        "Close every block comment with '*/'."
+    ),
+    "Assignment Instead of Comparison": (
+        "'=' is used where a comparison was intended.",
+        "'=' assigns a value, '==' compares two values. Conditions in if and while need a comparison.",
+        "Use '==' to compare values in conditions."
+    ),
+    "Missing Parentheses": (
+        "print is used as a statement instead of a function call.",
+        "In Python 3, print is a function, so its arguments must be wrapped in parentheses.",
+        "Always call print with parentheses: print(value)."
+    ),
+    "Syntax Error": (
+        "The code does not follow the language grammar.",
+        "The parser could not understand this line. Check for typos, missing operators or commas, "
+        "and keywords used as names.",
+        "Run your code after each small change so syntax errors are easy to locate."
+    ),
+}
+
+
+class StaticReport:
+    """Findings of one static analysis"""
+
+    def __init__(
+        self,
+        language: str,
+        findings: List[Dict],
+        corrected_code: Optional[str],
+        short_circuit: bool
+    ):
+        """
+        Args:
+            language: Language the code was analyzed as
+            findings: {"category", "line", "message", "snippet", "suggestion"} per error
+            corrected_code: Code with every finding repaired and re-verified, if available
+            short_circuit: Whether this report answers the request without the AI model
+        """
+        self.language = language
+        self.findings = findings
+        self.corrected_code = corrected_code
+        self.short_circuit = short_circuit
+
+    @property
+    def categories(self) -> List[ErrorCategory]:
+        """Findings grouped into error categories, in order of first occurrence"""
+        grouped: Dict[str, List[Dict]] = {}
+        for finding in self.findings:
+            grouped.setdefault(finding["category"], []).append(finding)
+
+        return [
+            ErrorCategory(
+                category=category,
+                count=len(findings),
+                description=CATEGORIES[category][0],
+                icon="X",
+                details=[
+                    ErrorDetail(
+                        line=finding["line"],
+                        message=finding["message"],
+                        codeSnippet=finding["snippet"],
+                        suggestion=finding["suggestion"]
+                    ) for finding in findings
+                ]
+            )
+            for category, findings in grouped.items()
+        ]
+
+    def to_hints(self) -> str:
+        """Findings as prompt text for the AI model ("" when there are none)"""
+        if not self.findings:
+            return ""
+
+        lines = [
+            "A local syntax check already found these errors (line numbers refer to the code above). "
+            "Verify them and include them in your analysis along with anything else you find:"
+        ]
+        for finding in self.findings:
+            lines.append(f"- Line {finding['line']}: {finding['category']}: {finding['message']}")
+        return "\n".join(lines)
+
+    def to_result(self) -> AnalysisResult:
+        """
+        Build the full analysis from this report (short-circuit path).
+
+        The result is not cached: recomputing it is cheaper than a cache lookup.
+        """
+        categories = self.categories
+        return AnalysisResult(
+            self.language,
+            structured=CodeAnalysisOutput(
+                errors=categories,
+                corrected_code=self.corrected_code,
+                explanations=[CATEGORIES[category.category][1] for category in categories],
+                recommendations=[CATEGORIES[category.category][2] for category in categories]
+            ),
+            cacheable=False
+        )
+
+
+class StaticAnalyzer:
+    """Local syntax checks for Python (compiler) and brace languages (bracket/quote balancer)"""
+
+    def __init__(self, mode: str = STATIC_ANALYSIS_MODE):
+        """
+        Args:
+            mode: "off", "hint" or "short_circuit"
+        """
+        if mode not in MODES:
+            print(f"⚠ Unknown STATIC_ANALYSIS_MODE '{mode}', using 'hint'")
+            mode = "hint"
+        self.mode = mode
+
+    @property
+    def version_tag(self) -> str:
+        """Suffix for AI cache keys: prompts include hints unless the analyzer is off"""
+        return "" if self.mode == "off" else f"+static-{STATIC_ANALYZER_VERSION}"
+
+    def supports(self, language: str) -> bool:
+        return language == "python" or language in BALANCER_SYNTAX
+
+    def analyze(self, code: str, language: str) -> Optional[StaticReport]:
+        """
+        Check code locally.
+
+        Args:
+            code: Source code
+            language: Language hint of the request
+
+        Returns:
+            Report, or None when the analyzer is off or cannot check this
+            language or size of code
+        """
+        if self.mode == "off" or not self.supports(language) or len(code) > STATIC_ANALYSIS_MAX_CHARS:
+            return None
+
+        start = time.perf_counter()
+        try:
+            if language == "python":
+                findings, corrected = self._analyze_python(code)
+            else:
+                findings, corrected = self._analyze_balanced(code, BALANCER_SYNTAX[language]), None
+        except (RecursionError, MemoryError, ValueError) as e:
+            # Pathologically nested or malformed (e.g. null bytes) input: leave it to the AI model
+            print(f"⚠ Static analysis skipped: {str(e)}")
+            return None
+        finally:
+            metrics.observe("analysis_tier_latency_ms.static", (time.perf_counter() - start) * 1000)
+
+        if findings:
+            metrics.inc("static_analysis_findings", len(findings))
+
+        short_circuit = self.mode == "short_circuit" and bool(findings) and corrected is not None
+        return StaticReport(language, findings, corrected, short_circuit)
+
+    # ------------------------------------------------------------------ Python
+
+    def _analyze_python(self, code: str) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Compile, repair the reported error, repeat.
+
+        Fixes never add or remove lines, so finding line numbers always refer
+        to the submitted code.
+
+        Returns:
+            (findings, corrected code if every error was repaired and the result parses)
+        """
+        newline = "\r\n" if "\r\n" in code else "\n"
+        original = code.replace("\r\n", "\n").split("\n")
+        lines = list(original)
+        findings: List[Dict] = []
+        seen = set()
+
+        for _ in range(STATIC_ANALYSIS_MAX_FIXES + 1):
+            try:
+                with warnings.catch_warnings():
+                    # Warnings such as invalid escape sequences are not syntax errors
+                    warnings.simplefilter("ignore")
+                    # A full compile is faster than building the AST as Python objects, and also
+                    # reports errors like 'return' outside a function
+                    compile("\n".join(lines), "<submitted>", "exec", dont_inherit=True)
+            except SyntaxError as error:
+                location = (error.msg, error.lineno, error.offset)
+                fix = None if location in seen else self._fix_python(error, lines)
+                seen.add(location)
+
+                if fix is None:
+                    findings.append(self._finding(
+                        "Syntax Error", error.lineno or 1, _describe(error), original,
+                        "Review this line for typos or missing symbols"
+                    ))
+                    findings.sort(key=lambda finding: finding["line"])
+                    return findings, None
+
+                finding, lines = fix
+                findings.append(finding)
+                continue
+
+            if not findings:
+                return findings, None
+
+            # Every error repaired: attach the repaired line to each suggestion
+            findings.sort(key=lambda finding: finding["line"])
+            for finding in findings:
+                finding["suggestion"] += f": {lines[finding['line'] - 1].strip()}"
+            return findings, newline.join(lines)
+
+        return findings, None
+
+    def _fix_python(self, error: SyntaxError, lines: List[str]) -> Optional[Tuple[Dict, List[str]]]:
+        """
+        Repair the error Python reported, when the repair is unambiguous.
+
+        Returns:
+            (finding, repaired lines), or None if the error cannot be repaired locally
+        """
+        number = error.lineno
+        if not number or number > len(lines):
+            return None
+
+        line = lines[number - 1]
+        col = (error.offset or 1) - 1
+        code, comment = _split_comment(line)
+        msg = error.msg or ""
+        fixed = list(lines)
+
+        def repaired(category: str, message: str, advice: str, new_line: str, at: int = number):
+            if new_line == lines[at - 1]:
+                return None
+            fixed[at - 1] = new_line
+            return self._finding(category, at, message, lines, advice), fixed
+
+        header = _COMPOUND_HEADER.match(code)
+
+        # Older Pythons report a missing colon as invalid syntax at the end of the line
+        if msg == "expected ':'" or (msg == "invalid syntax" and header and col >= len(code)
+                                      and not code.endswith(":") and not _balance_issues(code, _PYTHON_SYNTAX)):
+            statement = f"'{header.group(1)}' statement" if header else "statement"
+            return repaired("Missing Colon", f"Missing ':' at the end of the {statement}",
+                            "Add ':' at the end of the line", code + ":" + comment)
+
+        if msg.startswith("expected an indented block"):
+            header_match = _HEADER_LINE.search(msg)
+            header_number = int(header_match.group(1)) if header_match else number - 1
+            header_indent = _indent(lines[header_number - 1]) if header_number >= 1 else ""
+            unit = "\t" if header_indent.startswith("\t") else "    "
+            return repaired("Indentation Error", msg[0].upper() + msg[1:],
+                            "Indent the block under the statement",
+                            header_indent + unit + line.lstrip())
+
+        if msg == "unexpected indent":
+            previous = _previous_code_line(lines, number)
+            indent = _indent(previous) if previous is not None else ""
+            return repaired("Indentation Error", "Unexpected indent",
+                            "Align the line with the surrounding block", indent + line.lstrip())
+
+        if msg.startswith("unindent does not match"):
+            current = len(_indent(line))
+            levels = [_indent(lines[i]) for i in range(number - 1) if lines[i].strip() and
+                      not lines[i].lstrip().startswith("#") and len(_indent(lines[i])) < current]
+            indent = max(levels, key=len) if levels else ""
+            return repaired("Indentation Error", "Indentation does not match any outer block",
+                            "Align the line with the block it belongs to", indent + line.lstrip())
+
+        if isinstance(error, TabError):
+            # Tabs count as 8 columns, as the Python tokenizer reads them
+            fixed = [_indent(text).expandtabs(8) + text.lstrip(" \t") for text in lines]
+            if fixed == lines:
+                return None
+            return self._finding("Indentation Error", number, "Inconsistent use of tabs and spaces",
+                                 lines, "Indent with spaces only"), fixed
+
+        never_closed = re.match(r"'([(\[{])' was never closed", msg)
+        if never_closed or msg == "invalid syntax":
+            issue = next((i for i in _balance_issues(code, _PYTHON_SYNTAX) if i["kind"] == "unclosed"), None)
+            if never_closed and issue is None:
+                issue = {"char": never_closed.group(1), "line": 1}
+            if issue is None or issue["line"] != 1 or code.rstrip(":").rstrip().endswith(_CONTINUES):
+                return None
+            closer = _OPENERS[issue["char"]]
+            body, colon = (code[:-1].rstrip(), ":") if code.endswith(":") and header else (code, "")
+            return repaired("Unbalanced Brackets", f"'{issue['char']}' is never closed",
+                            f"Add the missing '{closer}'", body + closer + colon + comment)
+
+        unmatched = re.match(r"unmatched '([)\]}])'", msg)
+        if unmatched and line[col:col + 1] == unmatched.group(1):
+            return repaired("Unbalanced Brackets", f"Unmatched '{unmatched.group(1)}'",
+                            f"Remove the extra '{unmatched.group(1)}'", line[:col] + line[col + 1:])
+
+        mismatch = re.match(r"closing parenthesis '([)\]}])' does not match opening parenthesis '([(\[{])'", msg)
+        if mismatch and line[col:col + 1] == mismatch.group(1):
+            closer = _OPENERS[mismatch.group(2)]
+            return repaired("Unbalanced Brackets",
+                            f"'{mismatch.group(1)}' does not match the opening '{mismatch.group(2)}'",
+                            f"Close it with '{closer}'", line[:col] + closer + line[col + 1:])
+
+        if msg.startswith("unterminated string literal"):
+            quote_at = next((i for i in range(col, len(line)) if line[i] in "\"'"), None)
+            if quote_at is None:
+                return None
+            end = len(line.rstrip())
+            # print("hello) -> print("hello"): keep closers that belong to brackets opened before the string
+            open_before = sum(line[:quote_at].count(c) for c in "([{") - sum(line[:quote_at].count(c) for c in ")]}")
+            while open_before > 0 and end > quote_at + 1 and line[end - 1] in ")]}":
+                end -= 1
+                open_before -= 1
+            quote = line[quote_at]
+            return repaired("Unterminated String", f"String starting with {quote} is never closed",
+                            f"Add the closing {quote}", line[:end] + quote + line[end:])
+
+        if "Maybe you meant '==' or ':=' instead of '='" in msg:
+            end_col = (error.end_offset or len(line) + 1) - 1 if error.end_lineno == number else len(line)
+            assignment = _ASSIGNMENT.search(line, col, max(end_col, col))
+            if assignment is None:
+                return None
+            return repaired("Assignment Instead of Comparison", "'=' used in a condition",
+                            "Compare with '=='", line[:assignment.start()] + "==" + line[assignment.end():])
+
+        if msg.startswith("Missing parentheses in call to 'print'"):
+            statement = _PRINT_STATEMENT.match(code)
+            if statement is None:
+                return None
+            return repaired("Missing Parentheses", "print is called without parentheses",
+                            "Wrap the arguments in parentheses",
+                            f"{statement.group(1)}print({statement.group(2)})" + comment)
+
+        return None
+
+    def _finding(self, category: str, line: int, message: str, lines: List[str], advice: str) -> Dict:
+        return {
+            "category": category,
+            "line": line,
+            "message": message,
+            "snippet": lines[line - 1].strip() if 1 <= line <= len(lines) else "",
+            "suggestion": advice
+        }
+
+    # ----------------------------------------------------------- Other languages
+
+    def _analyze_balanced(self, code: str, syntax: Tuple) -> List[Dict]:
+        """Bracket and quote findings for brace languages"""
+        text = SourceText(code)
+        findings = []
+
+        for issue in _balance_issues(code, syntax, text)[:STATIC_ANALYSIS_MAX_FIXES]:
+            char, kind = issue["char"], issue["kind"]
+            if kind == "unclosed":
+                finding = ("Unbalanced Brackets", f"'{char}' is never closed", f"Add the matching '{_OPENERS[char]}'")
+            elif kind == "unmatched":
+                finding = ("Unbalanced Brackets", f"Unmatched '{char}'",
+                           f"Remove it or add the matching '{_CLOSERS[char]}'")
+            elif kind == "mismatch":
+                finding = ("Unbalanced Brackets",
+                           f"'{char}' does not match '{issue['opener']}' opened on line {issue['opener_line']}",
+                           f"Close it with '{_OPENERS[issue['opener']]}'")
+            elif kind == "string":
+                finding = ("Unterminated String", f"String starting with {char} is never closed",
+                           f"Add the closing {char}")
+            else:
+                finding = ("Unterminated Comment", "Block comment is never closed", "Add '*/' where the comment ends")
+
+            category, message, advice = finding
+            findings.append({
+                "category": category,
+                "line": issue["line"],
+                "message": message,
+                "snippet": text.line(issue["line"]).strip(),
+                "suggestion": advice
+            })
+
+        return findings
+
+
+def _balance_issues(code: str, syntax: Tuple, text: Optional[SourceText] = None) -> List[Dict]:
+    """
+    Scan brackets outside comments and strings.
+
+    Returns:
+        {"kind": "unclosed" | "unmatched" | "mismatch" | "string" | "comment",
+        "char", "line" (1-based), "col"} in source order, plus "opener" and
+        "opener_line" for mismatches
+    """
+    text = text or SourceText(code)
+    issues = []
+    stack: List[Tuple[str, int]] = []
+
+    for match in _balance_pattern(syntax).finditer(code):
+        kind = match.lastgroup
+        if kind in ("comment", "line_comment", "string", "char"):
+            continue
+        if kind == "open_string":
+            issues.append(_issue("string", _quote_of(match.group(kind), syntax), text, match.start()))
+            continue
+        if kind == "open_comment":
+            issues.append(_issue("comment", "/*", text, match.start()))
+            continue
+
+        char = match.group(kind)
+        if kind == "open":
+            stack.append((char, match.start()))
+            continue
+
+        opener = _CLOSERS[char]
+        if stack and stack[-1][0] == opener:
+            stack.pop()
+            continue
+
+        line, col = text.position(match.start())
+        top_line = text.position(stack[-1][1])[0] if stack else None
+        depth = next((i for i in range(len(stack) - 1, -1, -1) if stack[i][0] == opener), None)
+        if depth is not None and top_line != line:
+            # Brackets opened inside this pair were never closed
+            while len(stack) > depth + 1:
+                unclosed, offset = stack.pop()
+                issues.append(_issue("unclosed", unclosed, text, offset))
+            stack.pop()
+        elif stack:
+            top, offset = stack.pop()
+            issues.append({
+                "kind": "mismatch", "char": char, "line": line, "col": col,
+                "opener": top, "opener_line": text.position(offset)[0]
+            })
+        else:
+            issues.append({"kind": "unmatched", "char": char, "line": line, "col": col})
+
+    issues.extend(_issue("unclosed", char, text, offset) for char, offset in stack)
+    issues.sort(key=lambda issue: (issue["line"], issue["col"]))
+    return issues
+
+
+def _balance_pattern(syntax: Tuple) -> re.Pattern:
+    """One alternation matching comments, strings and brackets of a language (compiled once)"""
+    pattern = _PATTERNS.get(syntax)
+    if pattern is not None:
+        return pattern
+
+    line_comments, block_comments, quotes = syntax
+    parts = []
+    if block_comments:
+        parts.append(r"(?P<comment>/\*.*?\*/)|(?P<open_comment>/\*)")
+    if line_comments:
+        parts.append("(?P<line_comment>(?:" + "|".join(re.escape(p) for p in line_comments) + r")[^\n]*)")
+    if "'" not in quotes:
+        parts.append(r"(?P<char>'(?:\\.|[^'\\\n])')")
+
+    strings = []
+    for quote in quotes:
+        q = re.escape(quote)
+        if len(quote) == 3 or quote == "`":
+            # Multi-line: triple-quoted strings, template literals, raw strings
+            strings.append(rf"{q}(?:\\.|(?!{q})[^\\])*{q}")
+        else:
+            strings.append(rf"{q}(?:\\.|[^{q}\\\n])*{q}")
+    parts.append("(?P<string>" + "|".join(strings) + ")")
+    parts.append("(?P<open_string>(?:" + "|".join(re.escape(quote) for quote in quotes) + r")[^\n]*)")
+    parts.append(r"(?P<open>[(\[{])|(?P<close>[)\]}])")
+
+    pattern = _PATTERNS[syntax] = re.compile("|".join(parts), re.DOTALL)
+    return pattern
+
+
+def _quote_of(unterminated: str, syntax: Tuple) -> str:
+    return next(quote for quote in syntax[2] if unterminated.startswith(quote))
+
+
+def _issue(kind: str, char: str, text: SourceText, offset: int) -> Dict:
+    line, col = text.position(offset)
+    return {"kind": kind, "char": char, "line": line, "col": col}
+
+
+def _split_comment(line: str) -> Tuple[str, str]:
+    """Split a Python line into code (right-stripped) and its trailing comment (with leading space)"""
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(line).readline):
+            if token.type == tokenize.COMMENT:
+                code = line[:token.start[1]].rstrip()
+                return code, line[len(code):]
+    except (tokenize.TokenError, SyntaxError):
+        pass
+
+    code = line.rstrip()
+    return code, line[len(code):]
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip(" \t"))]
+
+
+def _previous_code_line(lines: List[str], number: int) -> Optional[str]:
+    """Closest non-blank, non-comment line before a 1-based line number"""
+    for i in range(number - 2, -1, -1):
+        stripped = lines[i].strip()
+        if stripped and not stripped.startswith("#"):
+            return lines[i]
+    return None
+
+
+def _describe(error: SyntaxError) -> str:
+    msg = error.msg or "invalid syntax"
+    return msg[0].upper() + msg[1:]
+
+
+# Global instance
+_static_analyzer_instance = None
+
+
+def get_static_analyzer() -> StaticAnalyzer:
+    """Get singleton static analyzer instance"""
+    global _static_analyzer_instance
+    if _static_analyzer_instance is None:
+        _static_analyzer_instance = StaticAnalyzer()
+    return _static_analyzer_instance
@@ -0,0 +1,192 @@
+"""
+Incremental JSON parser for streamed LLM output.
+
+The model streams its JSON answer a few characters at a time. This parser
+consumes those chunks and reports top-level values (and the items of
+selected top-level arrays) as soon as they are syntactically complete, so
+callers can forward partial results without waiting for the whole document.
+"""
+
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for a single top-level JSON object.
+
+    feed() returns a list of (name, value) events:
+    - (key, value) when a top-level member is complete
+    - (key + "[]", item) for every completed item of an array listed in stream_arrays
+
+    Text before the first "{" (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self, stream_arrays: Iterable[str] = ()):
+        """
+        Args:
+            stream_arrays: Top-level keys whose array items are emitted individually
+        """
+        self.stream_arrays = set(stream_arrays)
+        self.done = False
+
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._object_start: Optional[int] = None
+        self._object_end: Optional[int] = None
+
+        # Top-level member state: key -> in_key -> colon -> value -> in_value -> comma -> key
+        self._state = "key"
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start = 0
+
+        # Item state inside a streamed array: item -> in_item -> comma -> item
+        self._item_state: Optional[str] = None
+        self._item_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk of model output.
+
+        Args:
+            chunk: Text fragment
+
+        Returns:
+            Events completed by this chunk, in document order
+        """
+        events: List[Tuple[str, Any]] = []
+        self._buf += chunk
+
+        while self._pos < len(self._buf) and not self.done:
+            i = self._pos
+            ch = self._buf[i]
+            self._pos += 1
+
+            if self._object_start is None:
+                if ch == "{":
+                    self._object_start = i
+                    self._stack.append(ch)
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, events)
+                continue
+
+            if ch in _WHITESPACE:
+                continue
+
+            if ch == '"':
+                self._begin_token(i)
+                self._in_string = True
+            elif ch in "{[":
+                self._begin_token(i)
+                self._stack.append(ch)
+            elif ch in "}]":
+                self._end_literal(i, events)
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    self._object_end = i + 1
+                else:
+                    self._end_container(i, events)
+            elif ch == ",":
+                self._end_literal(i, events)
+                if len(self._stack) == 1:
+                    self._state = "key"
+                elif self._in_streamed_array():
+                    self._item_state = "item"
+            elif ch == ":":
+                if len(self._stack) == 1 and self._state == "colon":
+                    self._state = "value"
+            else:
+                self._begin_token(i)
+
+        return events
+
+    def result(self) -> Any:
+        """
+        Get the fully parsed document once the closing brace has been seen.
+
+        Raises:
+            ValueError: If the object is not complete yet
+        """
+        if not self.done:
+            raise ValueError("Incomplete JSON document")
+        return json.loads(self._buf[self._object_start:self._object_end])
+
+    def _in_streamed_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[1] == "["
+            and self._state == "in_value"
+            and self._key in self.stream_arrays
+        )
+
+    def _begin_token(self, i: int) -> None:
+        """Record where a key, value or array item starts (called before pushing containers)"""
+        depth = len(self._stack)
+
+        if depth == 1:
+            if self._state == "key":
+                self._key_start = i
+                self._state = "in_key"
+            elif self._state == "value":
+                self._value_start = i
+                self._state = "in_value"
+                self._item_state = "item" if self._buf[i] == "[" else None
+        elif self._in_streamed_array() and self._item_state == "item":
+            self._item_start = i
+            self._item_state = "in_item"
+
+    def _end_string(self, i: int, events: List[Tuple[str, Any]]) -> None:
+        depth = len(self._stack)
+
+        if depth == 1:
+            if self._state == "in_key":
+                self._key = json.loads(self._buf[self._key_start:i + 1])
+                self._state = "colon"
+            elif self._state == "in_value" and self._buf[self._value_start] == '"':
+                events.append((self._key, json.loads(self._buf[self._value_start:i + 1])))
+                self._state = "comma"
+        elif self._in_streamed_array() and self._item_state == "in_item" and self._buf[self._item_start] == '"':
+            events.append((f"{self._key}[]", json.loads(self._buf[self._item_start:i + 1])))
+            self._item_state = "comma"
+
+    def _end_container(self, i: int, events: List[Tuple[str, Any]]) -> None:
+        """Handle a closing bracket after it has been popped from the stack"""
+        depth = len(self._stack)
+
+        if depth == 1 and self._state == "in_value":
+            events.append((self._key, json.loads(self._buf[self._value_start:i + 1])))
+            self._state = "comma"
+            self._item_state = None
+        elif self._in_streamed_array() and self._item_state == "in_item":
+            events.append((f"{self._key}[]", json.loads(self._buf[self._item_start:i + 1])))
+            self._item_state = "comma"
+
+    def _end_literal(self, i: int, events: List[Tuple[str, Any]]) -> None:
+        """Emit a number/true/false/null terminated by , } or ]"""
+        depth = len(self._stack)
+
+        if depth == 1 and self._state == "in_value" and self._buf[self._value_start] not in '"{[':
+            events.append((self._key, json.loads(self._buf[self._value_start:i].strip())))
+            self._state = "comma"
+        elif (
+            self._in_streamed_array()
+            and self._item_state == "in_item"
+            and self._buf[self._item_start] not in '"{['
+        ):
+            events.append((f"{self._key}[]", json.loads(self._buf[self._item_start:i].strip())))
+            self._item_state = "comma"
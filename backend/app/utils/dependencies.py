@@ -1,85 +1,207 @@
 """
 FastAPI dependencies for authentication and authorization.
+
+Authenticated requests are resolved to a lightweight Principal (id and
+active flag) instead of a full User row. Decoded tokens and principals are
+kept in small TTL caches, so the hot path does no JWT verification and no
+database access. Principals are invalidated once a transaction that
+updated or deleted a User row through the ORM commits; routes that need the
+full row opt in with get_current_user_model.
 """
 
+import os
+import time
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
 from app.utils.security import decode_access_token
 
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# Invalidation on commit is local to this process: other workers see a changed
+# user (e.g. a deactivation) only once their cached principal expires
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+
 # HTTP Bearer token authentication
 security = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated identity resolved from a JWT token"""
+
+    id: str
+    is_active: bool
+
+
+# token -> user id, never kept past the token's own expiry
+_token_cache = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl_seconds=AUTH_CACHE_TTL_SECONDS)
+# user id -> Principal
+_principal_cache = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl_seconds=AUTH_CACHE_TTL_SECONDS)
+
+# Session.info key collecting the ids of users changed in the open transaction
+_CHANGED_USERS = "changed_user_ids"
+
+
+def invalidate_principal(user_id: str) -> None:
+    """
+    Drop a cached principal so the next request reloads it.
+
+    Called automatically when a transaction that updated or deleted a User
+    through the ORM commits; call it explicitly after committing bulk
+    UPDATE/DELETE statements on users.
+    """
+    _principal_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_changed(mapper, connection, target):
+    # Flushed but not committed: other sessions still read the old row, so
+    # invalidating now would let them cache it again
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_transaction_end(session, transaction):
+    # Rolled back (a commit has already taken the ids)
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_USERS, None)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _resolve_token(token: str) -> str:
+    """
+    Get the user id a token was issued for.
+
+    Raises:
+        HTTPException: 401 if the token is invalid or expired
+    """
+    user_id = _token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+
+    user_id = payload["sub"]
+    ttl = AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _token_cache.set(token, user_id, ttl_seconds=ttl)
+
+    return user_id
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """
     Dependency to get current authenticated user from JWT token.
 
     Usage in routes:
         @app.get("/protected")
-        def protected_route(current_user: User = Depends(get_current_user)):
+        def protected_route(current_user: Principal = Depends(get_current_user)):
             return {"user_id": current_user.id}
 
     Args:
         credentials: HTTP Bearer credentials from request header
-        db: Database session
+        db: Database session (only used on a principal cache miss)
 
     Returns:
-        User object
+        Principal of the authenticated user
 
     Raises:
-        HTTPException: 401 if token is invalid or user not found
+        HTTPException: 401 if token is invalid or user not found, 403 if inactive
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    user_id = _resolve_token(credentials.credentials)
+
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        metrics.inc("auth_principal_cache_misses")
+        row = (await db.execute(
+            select(User.id, User.is_active).where(User.id == user_id)
+        )).first()
+        if row is None:
+            raise _credentials_exception()
+
+        principal = Principal(id=row.id, is_active=bool(row.is_active))
+        _principal_cache.set(user_id, principal)
+    else:
+        metrics.inc("auth_principal_cache_hits")
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
 
-    # Extract token
-    token = credentials.credentials
+    return principal
 
-    # Decode token
-    payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
 
-    # Extract user identifier
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
+async def get_current_user_model(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to load the full User row of the authenticated user.
 
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    Use only in routes that need more than the user's id.
 
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user"
-        )
+    Args:
+        current_user: Principal from get_current_user dependency
+        db: Database session
+
+    Returns:
+        User object
 
+    Raises:
+        HTTPException: 401 if the user no longer exists
+    """
+    user = await db.get(User, current_user.id)
+    if user is None:
+        invalidate_principal(current_user.id)
+        raise _credentials_exception()
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency to ensure user is active.
 
     Args:
-        current_user: User from get_current_user dependency
+        current_user: Principal from get_current_user dependency
 
     Returns:
-        User object if active
+        Principal if active
 
     Raises:
         HTTPException: 403 if user is inactive
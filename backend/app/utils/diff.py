@@ -0,0 +1,324 @@
+"""
+Diff between submitted and corrected code.
+
+Lines are diffed first (patience diff, falling back to Myers' O(ND)
+algorithm between anchors); each changed block of lines is then diffed again
+by token (words, whitespace runs and single punctuation characters) with
+Myers, so a fixed colon or renamed variable becomes a small exact range
+instead of a whole-line change.
+
+Size guards keep this cheap on huge or completely rewritten inputs: blocks
+that are too large or differ too much, and everything past the token budget,
+are reported as whole-line ranges.
+"""
+
+import bisect
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DIFF_MAX_EDIT_COST = int(os.getenv("DIFF_MAX_EDIT_COST", "500"))  # per region, before reporting it as one block
+DIFF_TOKEN_BUDGET_CHARS = int(os.getenv("DIFF_TOKEN_BUDGET_CHARS", "200000"))  # changed text diffed by token
+DIFF_TOKEN_MAX_HUNK_CHARS = int(os.getenv("DIFF_TOKEN_MAX_HUNK_CHARS", "8000"))
+DIFF_TOKEN_MAX_EDIT_COST = int(os.getenv("DIFF_TOKEN_MAX_EDIT_COST", "400"))
+
+_TOKEN = re.compile(r"\w+|[^\S\n]+|\n|[^\w\s]")
+
+# (start, end) index ranges in the two sequences that differ
+Hunk = Tuple[int, int, int, int]
+
+
+def diff_hunks(a: Sequence, b: Sequence, max_cost: int = DIFF_MAX_EDIT_COST) -> List[Hunk]:
+    """
+    Changed blocks between two sequences (patience diff with Myers fallback).
+
+    Items that occur exactly once in both sequences anchor the diff (the
+    longest increasing run of them is kept), which splits large inputs into
+    small independent regions; regions without such anchors are diffed with
+    Myers' algorithm.
+
+    Args:
+        a: Old sequence (items must be hashable)
+        b: New sequence
+        max_cost: Maximum number of insertions + deletions searched per
+            region; a region needing more is reported as one changed block
+
+    Returns:
+        Ordered (a_start, a_end, b_start, b_end) blocks where a[a_start:a_end]
+        was replaced by b[b_start:b_end]
+    """
+    matches = _patience_matches(a, b, max_cost)
+
+    hunks: List[Hunk] = []
+    x = y = 0
+    for mx, my in matches + [(len(a), len(b))]:
+        if mx > x or my > y:
+            hunks.append((x, mx, y, my))
+        x, y = mx + 1, my + 1
+
+    return hunks
+
+
+def _patience_matches(a: Sequence, b: Sequence, max_cost: int) -> List[Tuple[int, int]]:
+    """Matched (a index, b index) pairs, in order"""
+    matches: List[Tuple[int, int]] = []
+    regions = [(0, len(a), 0, len(b))]
+
+    while regions:
+        a_lo, a_hi, b_lo, b_hi = regions.pop()
+
+        # Common prefix and suffix never need a search
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            matches.append((a_hi, b_hi))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        anchors = _unique_anchors(a, b, a_lo, a_hi, b_lo, b_hi)
+        if not anchors:
+            found = _myers_matches(a[a_lo:a_hi], b[b_lo:b_hi], max_cost)
+            if found:
+                matches.extend((a_lo + x, b_lo + y) for x, y in found)
+            continue
+
+        # Diff the gaps between consecutive anchors independently
+        x, y = a_lo, b_lo
+        for ax, by in anchors:
+            matches.append((ax, by))
+            regions.append((x, ax, y, by))
+            x, y = ax + 1, by + 1
+        regions.append((x, a_hi, y, b_hi))
+
+    matches.sort()
+    return matches
+
+
+def _unique_anchors(a: Sequence, b: Sequence, a_lo: int, a_hi: int, b_lo: int, b_hi: int) -> List[Tuple[int, int]]:
+    """Longest increasing run of items occurring exactly once in both regions"""
+    counts: Dict = {}
+    for i in range(a_lo, a_hi):
+        entry = counts.get(a[i])
+        counts[a[i]] = [i, -1, 1, 0] if entry is None else [entry[0], -1, entry[2] + 1, 0]
+    for j in range(b_lo, b_hi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] = j
+            entry[3] += 1
+
+    pairs = sorted((i, j) for i, j, in_a, in_b in counts.values() if in_a == 1 and in_b == 1)
+    if not pairs:
+        return []
+
+    # Patience sorting: longest subsequence increasing in b
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pile] = j
+            tail_index[pile] = index
+        previous[index] = tail_index[pile - 1] if pile > 0 else -1
+
+    anchors = []
+    index = tail_index[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers_matches(a: Sequence, b: Sequence, max_cost: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Matched (a index, b index) pairs of a shortest edit script, in order.
+
+    Returns None when the edit distance exceeds max_cost.
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, max_cost)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+
+    # trace[d] holds v[-d-1 .. d+1] as it was before step d
+    trace: List[List[int]] = []
+
+    for d in range(max_d + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+
+    return None
+
+
+def _backtrack(trace: List[List[int]], n: int, m: int) -> List[Tuple[int, int]]:
+    """Walk the recorded frontiers back from (n, m), collecting diagonal moves"""
+    matches: List[Tuple[int, int]] = []
+    x, y = n, m
+
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        # v[i] of this step is at v[i + d + 1]
+        if k == -d or (k != d and v[k - 1 + d + 1] < v[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+
+        if d > 0:
+            x, y = prev_x, prev_y
+
+    matches.reverse()
+    return matches
+
+
+def correction_ranges(original: str, corrected: str) -> List[Dict]:
+    """
+    Exact edits that turn the submitted code into the corrected code.
+
+    Positions refer to the submitted code: `line` and `endLine` are 1-based
+    (like error details), `col` and `endCol` are 0-based character offsets
+    within the line. `length` is the number of characters replaced, line
+    breaks included, and `replacement` the text to put there (empty for
+    deletions; `length` is 0 for insertions). Differences in line endings and
+    trailing blank lines are ignored.
+
+    Args:
+        original: Submitted code
+        corrected: Corrected code
+
+    Returns:
+        List of {"line", "col", "endLine", "endCol", "length", "replacement"}
+        in document order
+    """
+    raw_lines = original.split("\n")
+    a_lines = _comparable_lines(raw_lines)
+    b_lines = _comparable_lines(corrected.split("\n"))
+
+    # Everything is addressed in "\n"-joined comparable text with a virtual final newline
+    a_starts = _line_starts(a_lines)
+    b_starts = _line_starts(b_lines)
+    a_text = "\n".join(a_lines) + "\n"
+    b_text = "\n".join(b_lines) + "\n"
+
+    token_budget = DIFF_TOKEN_BUDGET_CHARS
+    edits: List[Tuple[int, int, str]] = []
+
+    for i1, i2, j1, j2 in diff_hunks(a_lines, b_lines):
+        a_start, a_end = a_starts[i1], a_starts[i2]
+        b_start, b_end = b_starts[j1], b_starts[j2]
+
+        if i2 == len(a_lines) and j2 == len(b_lines):
+            # Block reaches the end: keep the virtual newline out of the edit
+            if i1 == i2 or j1 == j2:
+                if i1 > 0:
+                    a_start, b_start = a_start - 1, b_start - 1
+            a_end, b_end = a_end - 1, b_end - 1
+
+        old, new = a_text[a_start:a_end], b_text[b_start:b_end]
+        size = len(old) + len(new)
+        if old and new and size <= min(DIFF_TOKEN_MAX_HUNK_CHARS, token_budget):
+            token_budget -= size
+            token_edits = _token_edits(old, new)
+            if token_edits is not None:
+                edits.extend((a_start + s, a_start + e, text) for s, e, text in token_edits)
+                continue
+
+        edits.append((a_start, a_end, new))
+
+    raw_starts = _line_starts(raw_lines)
+    ranges = []
+    for start, end, replacement in edits:
+        line, col = _position(a_starts, start)
+        end_line, end_col = _position(a_starts, end)
+        ranges.append({
+            "line": line + 1,
+            "col": col,
+            "endLine": end_line + 1,
+            "endCol": end_col,
+            "length": (raw_starts[end_line] + end_col) - (raw_starts[line] + col),
+            "replacement": replacement
+        })
+
+    return ranges
+
+
+def _token_edits(old: str, new: str) -> Optional[List[Tuple[int, int, str]]]:
+    """Token-level edits within one changed block, as (start, end, replacement) offsets into old"""
+    a_tokens = _TOKEN.findall(old)
+    b_tokens = _TOKEN.findall(new)
+
+    matches = _myers_matches(a_tokens, b_tokens, DIFF_TOKEN_MAX_EDIT_COST)
+    if matches is None:
+        return None
+
+    a_offsets = _offsets(a_tokens)
+    b_offsets = _offsets(b_tokens)
+
+    edits = []
+    x = y = 0
+    for mx, my in matches + [(len(a_tokens), len(b_tokens))]:
+        if mx > x or my > y:
+            edits.append((a_offsets[x], a_offsets[mx], new[b_offsets[y]:b_offsets[my]]))
+        x, y = mx + 1, my + 1
+
+    return edits
+
+
+def _comparable_lines(lines: List[str]) -> List[str]:
+    """Lines without carriage returns and trailing blank lines"""
+    lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+    while len(lines) > 1 and not lines[-1].strip():
+        lines.pop()
+    return lines
+
+
+def _line_starts(lines: List[str]) -> List[int]:
+    """Offset of every line in the "\\n"-joined text, plus the end (after a final newline)"""
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+    return starts
+
+
+def _offsets(tokens: List[str]) -> List[int]:
+    offsets = [0]
+    for token in tokens:
+        offsets.append(offsets[-1] + len(token))
+    return offsets
+
+
+def _position(starts: List[int], offset: int) -> Tuple[int, int]:
+    """0-based (line, column) of an offset in the "\\n"-joined text"""
+    line = bisect.bisect_right(starts, offset) - 1
+    line = min(line, len(starts) - 2)
+    return line, offset - starts[line]
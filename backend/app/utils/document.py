@@ -0,0 +1,140 @@
+"""
+Line-indexed source documents.
+
+Formatting an analysis looks lines up by number many times (a snippet and a
+correction per reported error). The line start offsets of each text are
+indexed once, so every lookup is a slice instead of a split of the whole
+file, and AI-reported line numbers can be checked against the real lines.
+"""
+
+import bisect
+import re
+from typing import List, Optional, Tuple
+
+_NEWLINE = re.compile("\n")
+
+# Characters shown when an error has no usable line number
+PREVIEW_CHARS = 50
+
+
+class SourceText:
+    """A text with O(1) access to its lines by 1-based number"""
+
+    def __init__(self, text: Optional[str]):
+        """
+        Args:
+            text: Full text (None is treated as empty)
+        """
+        self.text = text or ""
+        self._starts = [0]
+        self._starts.extend(match.end() for match in _NEWLINE.finditer(self.text))
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, as str.split("\\n") would count them"""
+        return len(self._starts)
+
+    def is_valid_line(self, line_number: Optional[int]) -> bool:
+        """Whether a 1-based line number refers to a line of this text"""
+        return isinstance(line_number, int) and 1 <= line_number <= len(self._starts)
+
+    def line(self, line_number: int) -> str:
+        """
+        Get one line without its line break.
+
+        Args:
+            line_number: 1-based line number
+
+        Returns:
+            Line text, or "" if the line does not exist
+        """
+        if not self.is_valid_line(line_number):
+            return ""
+
+        start = self._starts[line_number - 1]
+        end = self._starts[line_number] - 1 if line_number < len(self._starts) else len(self.text)
+        return self.text[start:end]
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Convert a character offset to a position.
+
+        Returns:
+            (1-based line number, 0-based column)
+        """
+        line = bisect.bisect_right(self._starts, offset)
+        return line, offset - self._starts[line - 1]
+
+    def offset(self, line_number: int, col: int) -> int:
+        """
+        Convert a position to a character offset (inverse of position).
+
+        Args:
+            line_number: 1-based line number (must exist)
+            col: 0-based column
+        """
+        return self._starts[line_number - 1] + col
+
+    def context(self, line_number: int, radius: int = 2) -> List[Tuple[int, str]]:
+        """
+        Get a window of lines around a line.
+
+        Args:
+            line_number: 1-based center line
+            radius: Lines to include before and after it (clipped at the edges)
+
+        Returns:
+            (line number, line text) pairs, empty if the line does not exist
+        """
+        if not self.is_valid_line(line_number):
+            return []
+
+        first = max(1, line_number - radius)
+        last = min(len(self._starts), line_number + radius)
+        return [(number, self.line(number)) for number in range(first, last + 1)]
+
+    def preview(self, limit: int = PREVIEW_CHARS) -> str:
+        """First `limit` characters, with an ellipsis if the text is longer"""
+        return self.text[:limit] + "..." if len(self.text) > limit else self.text
+
+
+class AnalysisDocument:
+    """Submitted and corrected code of one analysis, indexed once for formatting"""
+
+    def __init__(self, original: Optional[str], corrected: Optional[str]):
+        """
+        Args:
+            original: Submitted code (line numbers reported by the AI refer to it)
+            corrected: Corrected code, if any
+        """
+        self.original = SourceText(original)
+        self.corrected = SourceText(corrected)
+
+    def validate_line(self, line_number: Optional[int]) -> Optional[int]:
+        """
+        Check an AI-reported line number against the submitted code.
+
+        Returns:
+            The line number, or None if it is missing or out of range
+        """
+        return line_number if self.original.is_valid_line(line_number) else None
+
+    def code_snippet(self, line_number: Optional[int]) -> str:
+        """Submitted line for an error, or a preview of the code without a valid line"""
+        if not self.original.text:
+            return ""
+        if self.validate_line(line_number) is None:
+            return self.original.preview()
+        return self.original.line(line_number)
+
+    def correction_snippet(self, line_number: Optional[int]) -> str:
+        """Corrected line at the same position, or a preview without a valid line"""
+        if not self.corrected.text:
+            return ""
+        if self.validate_line(line_number) is None:
+            return self.corrected.preview()
+        return self.corrected.line(line_number)
+
+    def context(self, line_number: Optional[int], radius: int = 2) -> List[Tuple[int, str]]:
+        """Window of submitted lines around an error (see SourceText.context)"""
+        return self.original.context(line_number, radius)
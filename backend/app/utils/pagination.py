@@ -0,0 +1,41 @@
+"""
+Keyset pagination helpers.
+
+Cursors are opaque, URL-safe encodings of the (created_at, id) of the last
+row on a page. The next page continues strictly after that row, so each
+page costs an index range scan of `limit` rows regardless of depth.
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """
+    Build the cursor pointing after a row.
+
+    Args:
+        created_at: Row timestamp
+        row_id: Row primary key (tie-breaker for equal timestamps)
+
+    Returns:
+        Opaque cursor string
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
@@ -2,14 +2,32 @@
 Security utilities for password hashing and JWT token management.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from threading import Lock
+from typing import Callable, Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+import asyncio
 import os
+import time
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.metrics import metrics
+
+# Password hashing settings
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Password hashing context. Pinning min/max rounds to BCRYPT_ROUNDS makes
+# hashes with any other cost "need update", so they are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 
 # JWT settings (load from environment in production)
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production-min-32-chars")
@@ -44,6 +62,117 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHasher:
+    """
+    Dedicated, bounded executor for bcrypt work.
+
+    Hashing runs on its own small thread pool instead of the shared default
+    threadpool, so a burst of logins cannot starve other work. At most
+    max_pending operations may be queued or running; beyond that callers
+    are rejected immediately instead of piling up.
+
+    Metrics: password_hash_pending (queued + running), password_hash_running,
+    password_hash_queue_wait_ms, password_hash_ms, password_hash_rejected.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        """
+        Args:
+            workers: Number of hashing threads
+            max_pending: Maximum queued + running operations
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._lock = Lock()
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run a hashing function on the executor.
+
+        Raises:
+            PasswordHasherBusy: If max_pending operations are already outstanding
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.inc("password_hash_rejected")
+                raise PasswordHasherBusy()
+            self._pending += 1
+            metrics.set_gauge("password_hash_pending", self._pending)
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            metrics.observe("password_hash_queue_wait_ms", (started - submitted) * 1000)
+            metrics.add_gauge("password_hash_running", 1)
+            try:
+                return fn(*args)
+            finally:
+                metrics.add_gauge("password_hash_running", -1)
+                metrics.observe("password_hash_ms", (time.perf_counter() - started) * 1000)
+
+        def release(_):
+            # Runs when the executor is done with the job, even if the caller
+            # was cancelled meanwhile, so max_pending bounds the real work
+            with self._lock:
+                self._pending -= 1
+                metrics.set_gauge("password_hash_pending", self._pending)
+
+        future = self.executor.submit(job)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def queue_depth(self) -> int:
+        """Operations submitted but not finished (queued + running)"""
+        return self._pending
+
+
+# Global instance
+_password_hasher_instance = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get singleton password hasher instance"""
+    global _password_hasher_instance
+    if _password_hasher_instance is None:
+        _password_hasher_instance = PasswordHasher()
+    return _password_hasher_instance
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a plain text password on the password hashing executor.
+
+    Raises:
+        PasswordHasherBusy: If the hashing queue is full
+    """
+    return await get_password_hasher().run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hashing executor.
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password from database
+
+    Returns:
+        (matches, new_hash) where new_hash is set when the stored hash uses
+        outdated parameters and should be replaced
+
+    Raises:
+        PasswordHasherBusy: If the hashing queue is full
+    """
+    return await get_password_hasher().run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token.
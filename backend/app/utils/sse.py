@@ -0,0 +1,13 @@
+"""
+Server-Sent Events helpers.
+"""
+
+import json
+
+# Response headers for event streams (disable proxy buffering and caching)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
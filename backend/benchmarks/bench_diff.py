@@ -0,0 +1,103 @@
+"""
+Benchmark correction range computation on large files.
+
+Generates a Python-like file of --lines lines and a "corrected" copy with
+--change-rate of its lines edited (small token fixes, re-indented, inserted,
+deleted or moved lines), then times correction_ranges and checks that
+applying the ranges to the original reproduces the corrected file. The last
+row rewrites every line, which exceeds the edit-cost guard and shows the
+degraded (whole-block) path. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_diff --lines 5000 --change-rate 0.01 0.05 0.2
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from app.utils.diff import correction_ranges
+
+
+def build_file(lines: int) -> List[str]:
+    """Source lines with a realistic mix of indentation and tokens"""
+    out = []
+    for i in range(lines):
+        indent = "    " * (i % 3)
+        out.append(f"{indent}value_{i} = compute(items[{i}], factor={i % 7}) + offset  # step {i}")
+    return out
+
+
+def mutate(lines: List[str], rate: float, rng: random.Random) -> List[str]:
+    """Apply small edits to about `rate` of the lines"""
+    out = list(lines)
+    for _ in range(max(1, int(len(lines) * rate))):
+        i = rng.randrange(len(out))
+        kind = rng.random()
+        if kind < 0.5:
+            out[i] = out[i].replace("compute(", "compute_safe(", 1).replace(" + offset", " - offset", 1)
+        elif kind < 0.65:
+            out[i] = "    " + out[i]
+        elif kind < 0.8:
+            out.insert(i, "    if value is None:\n        continue".split("\n")[rng.randrange(2)])
+        elif kind < 0.9:
+            del out[i]
+        else:
+            out.insert(rng.randrange(len(out)), out.pop(i))
+    return out
+
+
+def apply_ranges(text: str, ranges: List[Dict]) -> str:
+    """Apply correction ranges to the original text"""
+    starts = [0]
+    for line in text.split("\n"):
+        starts.append(starts[-1] + len(line) + 1)
+
+    for edit in reversed(ranges):
+        offset = starts[edit["line"] - 1] + edit["col"]
+        text = text[:offset] + edit["replacement"] + text[offset + edit["length"]:]
+    return text
+
+
+def run(original: str, corrected: str, iterations: int) -> Dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        ranges = correction_ranges(original, corrected)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    assert apply_ranges(original, ranges) == corrected
+    return {
+        "ms": elapsed * 1000,
+        "ranges": len(ranges),
+        "whole_line": sum(1 for r in ranges if r["col"] == 0 and r["length"] > 200)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--change-rate", type=float, nargs="+", default=[0.01, 0.05, 0.2])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lines = build_file(args.lines)
+    original = "\n".join(lines)
+
+    print(f"lines={args.lines}, size={len(original) / 1024:.0f} KB, iterations={args.iterations}")
+    print(f"{'changed':>10} {'ms':>9} {'ranges':>7} {'block ranges':>13}")
+
+    for rate in args.change_rate:
+        corrected = "\n".join(mutate(lines, rate, rng))
+        result = run(original, corrected, args.iterations)
+        print(f"{rate:>10.0%} {result['ms']:>9.1f} {result['ranges']:>7} {result['whole_line']:>13}")
+
+    rewritten = "\n".join(line.replace("value_", "result_") for line in lines)
+    result = run(original, rewritten, 1)
+    print(f"{'rewrite':>10} {result['ms']:>9.1f} {result['ranges']:>7} {result['whole_line']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark incremental re-analysis of edited resubmissions.
+
+Builds Python files of --lines lines, analyzes them with a deterministic
+stand-in for the AI model (every line marked BUG is an error, corrected by
+replacing BUG with FIX), then edits --edits random lines the way students
+resubmit (fix a marked line, mark another, insert or delete a line). The
+edited file is planned against the earlier analysis: the table reports how
+many lines would be sent to the model instead of the whole file, how often
+the file had to be analyzed in full, the planning and merge latency, and
+checks that the merged result equals a full analysis of the edited file. No
+network or database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_incremental --lines 100 300 2000 --edits 1 3 10
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from app.services.analysis_result import CodeAnalysisOutput
+from app.services.incremental_analyzer import BaseAnalysis, IncrementalAnalyzer
+
+BLOCK = [
+    "def step_{i}(values):",
+    "    total = 0",
+    "    for value in values:",
+    "        if value == {i}:",
+    "            print(\"found\", value)",
+    "        total = total + (value * {i})",
+    "    return total",
+    "",
+]
+
+
+def build_program(lines: int, rng: random.Random) -> List[str]:
+    """At least `lines` lines of whole functions, a few of them marked BUG"""
+    out = []
+    i = 0
+    while len(out) < lines:
+        out.extend(line.format(i=i) for line in BLOCK)
+        i += 1
+    return [line + "  # BUG" if line.strip() and rng.random() < 0.02 else line for line in out]
+
+
+def edit(lines: List[str], edits: int, rng: random.Random) -> List[str]:
+    """Apply `edits` typical resubmission edits at random lines"""
+    out = list(lines)
+    for _ in range(edits):
+        i = rng.randrange(len(out))
+        kind = rng.choice(["fix", "break", "insert", "delete"])
+        if kind == "fix" or (kind == "break" and "BUG" in out[i]):
+            out[i] = out[i].replace("  # BUG", "") + "  # fixed"
+        elif kind == "break" and out[i].strip():
+            out[i] = out[i] + "  # BUG"
+        elif kind == "insert":
+            out.insert(i, out[i][:len(out[i]) - len(out[i].lstrip())] + "checked = True")
+        elif kind == "delete" and len(out) > 1:
+            del out[i]
+    return out
+
+
+def model(code: str) -> CodeAnalysisOutput:
+    """Deterministic stand-in for the AI model"""
+    details = [
+        {"line": number, "message": "Marked bug", "codeSnippet": line, "suggestion": "Use FIX"}
+        for number, line in enumerate(code.split("\n"), start=1)
+        if "BUG" in line
+    ]
+    errors = [{"category": "Bug", "count": len(details), "description": "Marked lines", "icon": "X",
+               "details": details}] if details else []
+    return CodeAnalysisOutput(
+        errors=errors,
+        corrected_code=code.replace("BUG", "FIX"),
+        explanations=["Marked lines are bugs"] * len(errors),
+        recommendations=["Remove the marks"]
+    )
+
+
+def same(a: CodeAnalysisOutput, b: CodeAnalysisOutput) -> bool:
+    lines = lambda result: sorted(detail.line for category in result.errors for detail in category.details)
+    return a.corrected_code == b.corrected_code and lines(a) == lines(b)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 300, 2000])
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analyzer = IncrementalAnalyzer(enabled=True)
+
+    print(f"samples={args.samples}")
+    print(f"{'lines':>6} {'edits':>6} {'sent':>6} {'full':>6} {'plan p50 ms':>12} {'merge p50 ms':>13} {'exact':>6}")
+
+    for lines in args.lines:
+        for edits in args.edits:
+            sent, full, exact = 0.0, 0, 0
+            plan_ms, merge_ms = [], []
+            for _ in range(args.samples):
+                program = build_program(lines, rng)
+                code = "\n".join(program)
+                base = BaseAnalysis("base", code, model(code))
+                edited = "\n".join(edit(program, edits, rng))
+
+                start = time.perf_counter()
+                plan = analyzer.plan(base, edited)
+                plan_ms.append((time.perf_counter() - start) * 1000)
+                if plan is None:
+                    full += 1
+                    sent += 1
+                    continue
+
+                excerpt = model(plan.excerpt) if plan.regions else None
+                start = time.perf_counter()
+                merged = plan.merge(excerpt)
+                merge_ms.append((time.perf_counter() - start) * 1000)
+
+                sent += len(plan.excerpt_lines) / plan.line_count
+                exact += merged is not None and same(merged, model(edited))
+
+            incremental = args.samples - full
+            print(
+                f"{lines:>6} {edits:>6} {sent / args.samples:>6.0%} {full / args.samples:>6.0%} "
+                f"{percentile(plan_ms, 50):>12.2f} {percentile(merge_ms, 50) if merge_ms else 0:>13.2f} "
+                f"{exact / incremental if incremental else 1:>6.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
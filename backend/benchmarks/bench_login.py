@@ -0,0 +1,71 @@
+"""
+Benchmark login throughput of the password hashing executor.
+
+Verifies --logins passwords at BCRYPT_ROUNDS cost through PasswordHasher for
+each worker count in --workers, with --concurrency logins in flight, and
+reports logins/second overall and per worker. Throughput stops scaling once
+workers exceed the available cores, which gives the capacity per core to
+size PASSWORD_HASH_WORKERS. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login --logins 200 --workers 1 2 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from app.utils.security import BCRYPT_ROUNDS, PasswordHasher, hash_password, pwd_context
+
+PASSWORD = "correct horse battery staple"
+
+
+async def run(workers: int, logins: int, concurrency: int, hashed: str) -> dict:
+    """Verify `logins` passwords with `concurrency` requests in flight"""
+    hasher = PasswordHasher(workers=workers, max_pending=concurrency)
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def login():
+        async with gate:
+            start = time.perf_counter()
+            ok, _ = await hasher.run(pwd_context.verify_and_update, PASSWORD, hashed)
+            assert ok
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.executor.shutdown()
+
+    latencies.sort()
+    return {
+        "throughput": logins / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD)
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, cores={os.cpu_count()}, logins={args.logins}, concurrency={args.concurrency}")
+    print(f"{'workers':>8} {'logins/s':>10} {'per worker':>11} {'p50 ms':>9} {'p95 ms':>9}")
+
+    for workers in args.workers:
+        result = asyncio.run(run(workers, args.logins, args.concurrency, hashed))
+        print(
+            f"{workers:>8} {result['throughput']:>10.1f} {result['throughput'] / workers:>11.1f} "
+            f"{result['p50']:>9.1f} {result['p95']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark ParserService against the previous per-section regex parser.
+
+Builds AI markdown responses with --categories error categories (each with
+--details detail lines, an explanation and a recommendation) and a corrected
+code block of --code-lines lines, then times parsing each response plus one
+explanation lookup per error, as AnalysisService does when formatting. The
+previous implementation is kept below as the baseline; both must produce the
+same output. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parser --categories 10 50 200 --code-lines 400
+"""
+
+import argparse
+import re
+import time
+
+from app.services.parser_service import ParserService
+
+
+class LegacyParser:
+    """ParserService as it was before sections were split in one pass"""
+
+    def parse_ai_response(self, markdown):
+        code_info = self.extract_code_block_with_language(markdown)
+        return {
+            "errors": self.extract_errors(markdown),
+            "corrected_code": code_info["code"],
+            "language": code_info["language"],
+            "explanations": self.extract_explanations(markdown),
+            "recommendations": self.extract_recommendations(markdown)
+        }
+
+    def extract_errors(self, markdown):
+        errors_section = self._extract_section(markdown, "Errors")
+        if not errors_section:
+            return []
+        matches = re.findall(r'\*\*([^*]+)\*\*:\s*([^\n]+)', errors_section, re.MULTILINE)
+        return [{"type": t.strip(), "message": m.strip()} for t, m in matches]
+
+    def extract_code_block_with_language(self, markdown):
+        code_match = re.search(r'```([\w]*)\n(.*?)```', markdown, re.DOTALL)
+        if code_match:
+            language = code_match.group(1).strip()
+            return {"code": code_match.group(2).strip(), "language": language if language else "unknown"}
+        corrected_section = self._extract_section(markdown, "Corrected Code")
+        if corrected_section:
+            clean = re.sub(r'```[\w]*', '', corrected_section).replace('```', '')
+            return {"code": clean.strip(), "language": "unknown"}
+        return {"code": "", "language": "unknown"}
+
+    def extract_explanations(self, markdown):
+        expl_section = self._extract_section(markdown, "Explanation")
+        if not expl_section:
+            return []
+        pattern = r'\*\*([^*]+)\*\*:\s*([^\n]+(?:\n(?!\*\*)[^\n]+)*)'
+        matches = re.findall(pattern, expl_section, re.MULTILINE)
+        return [{"error_type": t.strip(), "explanation": e.strip()} for t, e in matches]
+
+    def _extract_section(self, markdown, section_name):
+        pattern = rf'##\s*{section_name}\s*\n(.*?)(?=##|\Z)'
+        match = re.search(pattern, markdown, re.DOTALL | re.IGNORECASE)
+        return match.group(1).strip() if match else None
+
+    def find_explanation_for_error(self, error_type, explanations):
+        for expl in explanations:
+            if expl["error_type"].lower() == error_type.lower():
+                return expl["explanation"]
+        return "No detailed explanation available."
+
+    def extract_recommendations(self, markdown):
+        rec_section = self._extract_section(markdown, "Recommendations")
+        if not rec_section:
+            return []
+        return [r.strip() for r in re.findall(r'^[-*]\s+(.+)$', rec_section, re.MULTILINE)]
+
+
+def build_response(categories: int, details: int, code_lines: int) -> str:
+    """Markdown shaped like GroqAIService output"""
+    errors = "## Errors\n"
+    explanations = "\n## Explanation\n"
+    recommendations = "\n## Recommendations\n"
+    for c in range(categories):
+        errors += f"**Error Type {c}**: Something is wrong in category {c}\n"
+        for d in range(details):
+            errors += f"  - Line {c * details + d + 1}: detail {d} of category {c}\n"
+        explanations += f"**Error Type {c}**: Why category {c} happens and how to avoid it.\n\n"
+        recommendations += f"- Recommendation number {c}\n"
+
+    code = "\n".join(f"    value_{i} = compute({i}, items[{i}])" for i in range(code_lines))
+    return f"{errors}\n## Corrected Code\n```python\n{code}\n```\n{explanations}{recommendations}"
+
+
+def run(parser, markdown: str, iterations: int) -> float:
+    """Seconds per parse (including one explanation lookup per error)"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parsed = parser.parse_ai_response(markdown)
+        explanations = parser.index_explanations(parsed["explanations"]) if hasattr(parser, "index_explanations") \
+            else parsed["explanations"]
+        for error in parsed["errors"]:
+            parser.find_explanation_for_error(error["type"], explanations)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--details", type=int, default=3)
+    parser.add_argument("--code-lines", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    legacy, current = LegacyParser(), ParserService()
+    print(f"details/category={args.details}, code lines={args.code_lines}, iterations={args.iterations}")
+    print(f"{'categories':>10} {'size KB':>8} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+
+    for categories in args.categories:
+        markdown = build_response(categories, args.details, args.code_lines)
+        assert current.parse_ai_response(markdown) == legacy.parse_ai_response(markdown)
+
+        legacy_s = run(legacy, markdown, args.iterations)
+        current_s = run(current, markdown, args.iterations)
+        print(
+            f"{categories:>10} {len(markdown) / 1024:>8.1f} {legacy_s * 1000:>10.3f} "
+            f"{current_s * 1000:>11.3f} {legacy_s / current_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
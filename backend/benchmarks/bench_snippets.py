@@ -0,0 +1,87 @@
+"""
+Benchmark per-error snippet extraction against the previous split-per-lookup code.
+
+Builds a submitted and a corrected file of --lines lines and looks up the
+code snippet and correction snippet for --errors reported line numbers, as
+AnalysisService does when formatting one analysis. The previous
+implementation re-split both files for every error; the current one indexes
+them once in an AnalysisDocument. Both must return the same snippets for
+valid line numbers. No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_snippets --lines 5000 --errors 10 100 1000
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from app.utils.document import AnalysisDocument
+
+
+def legacy_code_snippet(code: str, line_number: int = None) -> str:
+    if not line_number or not code:
+        return code[:50] + "..." if len(code) > 50 else code
+    lines = code.split('\n')
+    if line_number > len(lines):
+        return lines[0] if lines else ""
+    return lines[line_number - 1] if line_number <= len(lines) else ""
+
+
+def legacy_correction_snippet(corrected_code: str, line_number: int = None) -> str:
+    if not corrected_code:
+        return ""
+    if not line_number:
+        return corrected_code[:50] + "..." if len(corrected_code) > 50 else corrected_code
+    lines = corrected_code.split('\n')
+    if line_number > len(lines):
+        return lines[0] if lines else ""
+    return lines[line_number - 1] if line_number <= len(lines) else ""
+
+
+def legacy(original: str, corrected: str, line_numbers: List[int]) -> List[Tuple[str, str]]:
+    return [
+        (legacy_code_snippet(original, n), legacy_correction_snippet(corrected, n))
+        for n in line_numbers
+    ]
+
+
+def current(original: str, corrected: str, line_numbers: List[int]) -> List[Tuple[str, str]]:
+    document = AnalysisDocument(original, corrected)
+    return [(document.code_snippet(n), document.correction_snippet(n)) for n in line_numbers]
+
+
+def timed(fn, original: str, corrected: str, line_numbers: List[int], iterations: int) -> float:
+    """Milliseconds per analysis"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(original, corrected, line_numbers)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--errors", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    original = "\n".join(f"    value_{i} = compute(items[{i}])" for i in range(args.lines))
+    corrected = original.replace("compute(", "compute_safe(")
+
+    print(f"lines={args.lines}, size={len(original) / 1024:.0f} KB, iterations={args.iterations}")
+    print(f"{'errors':>7} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+
+    for errors in args.errors:
+        line_numbers = [rng.randint(1, args.lines) for _ in range(errors)]
+        assert current(original, corrected, line_numbers) == legacy(original, corrected, line_numbers)
+
+        legacy_ms = timed(legacy, original, corrected, line_numbers, args.iterations)
+        current_ms = timed(current, original, corrected, line_numbers, args.iterations)
+        print(f"{errors:>7} {legacy_ms:>10.2f} {current_ms:>11.3f} {legacy_ms / current_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
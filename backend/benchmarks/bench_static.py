@@ -0,0 +1,122 @@
+"""
+Benchmark the static analyzer on typical beginner syntax errors.
+
+Builds valid Python programs of --lines lines, injects --errors syntax errors
+of the common kinds (missing colon, missing indentation, unclosed bracket,
+unterminated string, `=` in a condition, Python 2 print) and reports how
+often the analyzer repairs all of them (so short_circuit mode would answer
+without the AI model) and its latency. The same programs with the errors
+injected as brackets in JavaScript-like code time the balancer. No network
+or database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_static --lines 20 200 2000 --errors 1 3
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from app.services.static_analyzer import StaticAnalyzer
+
+BLOCK = [
+    "def step_{i}(values):",
+    "    total = 0",
+    "    for value in values:",
+    "        if value == {i}:",
+    "            print(\"found\", value)",
+    "        total = total + (value * 2)",
+    "    return total",
+    "",
+]
+
+
+def build_program(lines: int) -> List[str]:
+    """At least `lines` lines of whole functions"""
+    out = []
+    i = 0
+    while len(out) < lines:
+        out.extend(line.format(i=i) for line in BLOCK)
+        i += 1
+    return out
+
+
+def inject(lines: List[str], errors: int, rng: random.Random) -> List[str]:
+    """Break `errors` distinct lines with a typical beginner mistake"""
+    out = list(lines)
+    candidates = [i for i, line in enumerate(out) if line.strip()]
+    for i in rng.sample(candidates, min(errors, len(candidates))):
+        line = out[i]
+        if line.endswith(":"):
+            options = ["colon", "indent"] + (["assign"] if "==" in line else [])
+        elif "print(" in line:
+            options = ["print", "quote"]
+        elif line.endswith(")"):
+            options = ["bracket"]
+        else:
+            options = ["indent"]
+
+        kind = rng.choice(options)
+        if kind == "colon":
+            out[i] = line[:-1]
+        elif kind == "assign":
+            out[i] = line.replace("==", "=", 1)
+        elif kind == "print":
+            out[i] = line.replace("print(", "print ", 1)[:-1]
+        elif kind == "quote":
+            out[i] = line.replace('found"', "found", 1)
+        elif kind == "bracket":
+            out[i] = line[:-1]
+        elif kind == "indent" and i + 1 < len(out) and out[i + 1].startswith(" " * 4):
+            out[i + 1] = out[i + 1][4:]
+    return out
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--errors", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analyzer = StaticAnalyzer("short_circuit")
+
+    print(f"samples={args.samples}")
+    print(f"{'lang':>10} {'lines':>6} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8} {'found':>6} {'answered':>9}")
+
+    for lines in args.lines:
+        program = build_program(lines)
+        for errors in args.errors:
+            latencies, found, answered = [], 0, 0
+            for _ in range(args.samples):
+                code = "\n".join(inject(program, errors, rng))
+                start = time.perf_counter()
+                report = analyzer.analyze(code, "python")
+                latencies.append((time.perf_counter() - start) * 1000)
+                found += bool(report.findings)
+                answered += report.short_circuit
+            print(
+                f"{'python':>10} {lines:>6} {errors:>6} {percentile(latencies, 50):>8.2f} "
+                f"{percentile(latencies, 99):>8.2f} {found / args.samples:>6.0%} {answered / args.samples:>9.0%}"
+            )
+
+        # Balancer: same text as brace code with one bracket dropped
+        code = "\n".join(line + (" {" if line.endswith(":") else "") for line in program).replace("(value * 2)", "(value * 2")
+        latencies = []
+        for _ in range(args.samples):
+            start = time.perf_counter()
+            analyzer.analyze(code, "javascript")
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{'javascript':>10} {lines:>6} {'-':>6} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark /api/analysis/user-stats for users with large histories.
+
+Seeds a throwaway user with --rows analyses (10k by default) in the database
+configured by DATABASE_URL, then compares the previous implementation (load
+every CodeAnalysis row, count/sum and compute the streak in Python) against
+the rollup-backed AnalyticsService.get_user_stats.
+
+Usage (from backend/):
+    python -m benchmarks.bench_user_stats --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+
+from app.commands.backfill_rollups import backfill
+from app.database import Base, AsyncSessionLocal, SessionLocal, engine, async_engine
+from app.models.code_analysis import CodeAnalysis
+from app.models.user import User
+from app.services.analytics_service import get_analytics_service
+
+CODE_SAMPLE = "def compute(values):\n    total = 0\n    for v in values:\n        total += v\n    return total\n" * 20
+ERRORS_SAMPLE = [
+    {"type": "Syntax Error", "message": "Line 3: missing colon"},
+    {"type": "Indentation Error", "message": "Line 4: unexpected indent"},
+    {"type": "Logic Error", "message": "Line 5: off-by-one"},
+]
+
+
+def seed(rows: int) -> str:
+    """Create a user with `rows` analyses spread over the last rows/20 days"""
+    Base.metadata.create_all(bind=engine)
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+
+    with SessionLocal() as db:
+        db.add(User(
+            id=user_id,
+            username=f"bench-{user_id[:8]}",
+            email=f"bench-{user_id[:8]}@example.com",
+            hashed_password="x"
+        ))
+        db.flush()
+
+        db.execute(CodeAnalysis.__table__.insert(), [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "code_content": CODE_SAMPLE,
+                "language": "python",
+                "ai_raw_response": CODE_SAMPLE * 2,
+                "corrected_code": CODE_SAMPLE,
+                "errors": ERRORS_SAMPLE,
+                "explanations": [],
+                "recommendations": "",
+                "total_errors": i % 7,
+                "created_at": now - timedelta(days=i // 20)
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+
+    backfill(user_id)
+    return user_id
+
+
+def cleanup(user_id: str) -> None:
+    with SessionLocal() as db:
+        for table in ("user_daily_error_counts", "user_daily_stats", "user_stats_totals", "code_analyses"):
+            db.execute(text(f"DELETE FROM {table} WHERE user_id = :user_id"), {"user_id": user_id})
+        db.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": user_id})
+        db.commit()
+
+
+async def legacy_user_stats(user_id: str, db) -> dict:
+    """Previous implementation: loads every analysis row (twice)"""
+    analyses = (await db.execute(
+        select(CodeAnalysis).where(CodeAnalysis.user_id == user_id).order_by(CodeAnalysis.created_at)
+    )).scalars().all()
+    total_analyses = len(analyses)
+    errors_fixed = sum(a.total_errors for a in analyses)
+
+    analyses = (await db.execute(
+        select(CodeAnalysis).where(CodeAnalysis.user_id == user_id).order_by(CodeAnalysis.created_at)
+    )).scalars().all()
+    dates = sorted({a.created_at.date() for a in analyses}, reverse=True)
+    streak, current = 0, date.today()
+    for d in dates:
+        if d == current:
+            streak += 1
+            current -= timedelta(days=1)
+        elif d < current:
+            break
+
+    return {"total_analyses": total_analyses, "errors_fixed": errors_fixed, "day_streak": streak}
+
+
+async def measure(label: str, fn, user_id: str, repeat: int) -> dict:
+    timings = []
+    result = None
+    tracemalloc.start()
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            result = await fn(user_id, db)
+            timings.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<10} median {statistics.median(timings):9.2f} ms   peak {peak / 1024:10.1f} KiB   {result}")
+    return result
+
+
+async def run(rows: int, repeat: int) -> None:
+    user_id = seed(rows)
+    try:
+        print(f"user-stats over {rows} analyses ({repeat} runs each)")
+        legacy = await measure("legacy", legacy_user_stats, user_id, repeat)
+        rollup = await measure("rollup", get_analytics_service().get_user_stats, user_id, repeat)
+        assert legacy == rollup, "rollup result differs from legacy result"
+    finally:
+        cleanup(user_id)
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
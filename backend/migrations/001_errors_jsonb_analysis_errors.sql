@@ -0,0 +1,40 @@
+-- Migration 001: JSONB errors column and normalized error occurrences
+--
+-- Converts code_analyses.errors from JSON to JSONB and creates
+-- analysis_errors (one row per reported error), backfilled from existing
+-- analyses. New rows are written by the application at insert time.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/001_errors_jsonb_analysis_errors.sql
+-- Then rebuild the rollups: python -m app.commands.backfill_rollups
+
+BEGIN;
+
+ALTER TABLE code_analyses
+    ALTER COLUMN errors TYPE JSONB USING CAST(errors AS JSONB);
+
+CREATE TABLE IF NOT EXISTS analysis_errors (
+    id BIGSERIAL PRIMARY KEY,
+    analysis_id VARCHAR NOT NULL REFERENCES code_analyses(id) ON DELETE CASCADE,
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    error_type VARCHAR NOT NULL,
+    line INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+DELETE FROM analysis_errors;
+
+INSERT INTO analysis_errors (analysis_id, user_id, error_type, line, created_at)
+SELECT
+    analyses.id,
+    analyses.user_id,
+    COALESCE(error->>'type', 'Unknown'),
+    CAST(substring(error->>'message' FROM '(?i)line\s+(\d+)') AS INTEGER),
+    analyses.created_at
+FROM code_analyses AS analyses,
+     jsonb_array_elements(analyses.errors) AS error
+WHERE jsonb_typeof(analyses.errors) = 'array';
+
+CREATE INDEX IF NOT EXISTS idx_analysis_errors_user_type ON analysis_errors(user_id, error_type);
+CREATE INDEX IF NOT EXISTS ix_analysis_errors_analysis_id ON analysis_errors(analysis_id);
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Migration 002: stored code preview and history index
+--
+-- Adds code_analyses.code_preview (filled by the application on insert) and
+-- the (user_id, created_at DESC, id DESC) index used by the keyset-paginated
+-- history endpoint.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/002_history_preview_index.sql
+
+BEGIN;
+
+ALTER TABLE code_analyses ADD COLUMN IF NOT EXISTS code_preview VARCHAR(33);
+
+UPDATE code_analyses
+SET code_preview = LEFT(code_content, 30) || '...'
+WHERE code_preview IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_code_analyses_user_created
+    ON code_analyses(user_id, created_at DESC, id DESC);
+
+COMMIT;
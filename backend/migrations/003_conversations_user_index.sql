@@ -0,0 +1,10 @@
+-- Migration 003: index conversations by user
+--
+-- Serves the chatbot's recent-history lookup and the paginated
+-- /api/chat/history endpoint without scanning the whole table.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/003_conversations_user_index.sql
+-- (CONCURRENTLY cannot run inside a transaction block)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_user_created
+    ON conversations(user_id, created_at, id);
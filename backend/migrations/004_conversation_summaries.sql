@@ -0,0 +1,14 @@
+-- Migration 004: rolling chat summaries
+--
+-- Stores the compressed history of chat messages that no longer fit the
+-- token-budgeted context window (see app/services/chat_context_service.py).
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/004_conversation_summaries.sql
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    user_id VARCHAR PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL,
+    token_count INTEGER NOT NULL DEFAULT 0,
+    summarized_until TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
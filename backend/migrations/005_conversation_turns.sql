@@ -0,0 +1,54 @@
+-- Migration 005: one conversations row per exchange
+--
+-- Conversations used to store two rows per exchange (a 'user' row with an
+-- empty response and an 'assistant' row with an empty message). This folds
+-- each assistant row into the user row before it, adds per-side token
+-- estimates and the model id, and drops the role column. Unpaired rows are
+-- kept as exchanges with an empty side.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/005_conversation_turns.sql
+
+BEGIN;
+
+ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS message_tokens INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS response_tokens INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS model VARCHAR;
+
+-- Both rows of an exchange were often written with the same timestamp,
+-- so the user row is ordered first explicitly
+CREATE TEMPORARY TABLE conversation_pairs ON COMMIT DROP AS
+SELECT id AS user_row_id, next_id AS assistant_row_id, next_response AS response
+FROM (
+    SELECT
+        id,
+        role,
+        LEAD(id) OVER w AS next_id,
+        LEAD(role) OVER w AS next_role,
+        LEAD(response) OVER w AS next_response
+    FROM conversations
+    WINDOW w AS (
+        PARTITION BY user_id
+        ORDER BY created_at, CASE WHEN role = 'user' THEN 0 ELSE 1 END, id
+    )
+) AS ordered
+WHERE role = 'user' AND next_role = 'assistant';
+
+UPDATE conversations
+SET response = pairs.response
+FROM conversation_pairs AS pairs
+WHERE conversations.id = pairs.user_row_id;
+
+DELETE FROM conversations
+USING conversation_pairs AS pairs
+WHERE conversations.id = pairs.assistant_row_id;
+
+-- Same estimate as chat_context_service.estimate_tokens
+UPDATE conversations
+SET message_tokens = CAST(length(message) / 3.5 AS INTEGER) + 1,
+    response_tokens = CAST(length(response) / 3.5 AS INTEGER) + 1,
+    model = COALESCE(model, 'llama-3.3-70b-versatile');
+
+ALTER TABLE conversations DROP COLUMN role;
+
+COMMIT;
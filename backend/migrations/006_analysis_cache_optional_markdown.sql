@@ -0,0 +1,9 @@
+-- Migration 006: structured-only analysis cache entries
+--
+-- Results with structured output are cached without a markdown rendering
+-- (markdown is only generated when something needs it), so
+-- analysis_cache.ai_response becomes optional.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/006_analysis_cache_optional_markdown.sql
+
+ALTER TABLE analysis_cache ALTER COLUMN ai_response DROP NOT NULL;
@@ -0,0 +1,30 @@
+-- Migration 007: async analysis job queue
+--
+-- Durable queue behind POST /api/analyze/jobs (see app/services/job_service.py).
+-- Workers claim the oldest unfinished job through the partial index.
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/007_analysis_jobs.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id VARCHAR PRIMARY KEY,
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    language VARCHAR(50) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    analysis_id VARCHAR REFERENCES code_analyses(id) ON DELETE SET NULL,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_analysis_jobs_user_id ON analysis_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_pending
+    ON analysis_jobs(created_at) WHERE status IN ('queued', 'running');
+
+COMMIT;
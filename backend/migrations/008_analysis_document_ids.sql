@@ -0,0 +1,18 @@
+-- Migration 008: document ids for incremental re-analysis
+--
+-- Adds the optional client-supplied document id of the submitted file to
+-- code_analyses and analysis_jobs, and the partial index used to find the
+-- latest analysis of a document (see app/services/incremental_analyzer.py).
+--
+-- Apply with: psql "$DATABASE_URL" -f migrations/008_analysis_document_ids.sql
+
+BEGIN;
+
+ALTER TABLE code_analyses ADD COLUMN IF NOT EXISTS document_id VARCHAR(128);
+ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS document_id VARCHAR(128);
+
+CREATE INDEX IF NOT EXISTS idx_code_analyses_user_document
+    ON code_analyses(user_id, document_id, created_at DESC)
+    WHERE document_id IS NOT NULL;
+
+COMMIT;
@@ -2,6 +2,14 @@
 -- PostgreSQL
 
 -- Drop existing tables if they exist (for clean setup)
+DROP TABLE IF EXISTS analysis_jobs CASCADE;
+DROP TABLE IF EXISTS analysis_cache CASCADE;
+DROP TABLE IF EXISTS analysis_errors CASCADE;
+DROP TABLE IF EXISTS user_daily_error_counts CASCADE;
+DROP TABLE IF EXISTS user_daily_stats CASCADE;
+DROP TABLE IF EXISTS user_stats_totals CASCADE;
+DROP TABLE IF EXISTS conversation_summaries CASCADE;
+DROP TABLE IF EXISTS conversations CASCADE;
 DROP TABLE IF EXISTS code_analyses CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 
@@ -28,12 +36,14 @@ CREATE TABLE code_analyses (
 
     -- Input data
     code_content TEXT NOT NULL,
+    code_preview VARCHAR(33),  -- First 30 characters + "...", for history lists
     language VARCHAR(50) NOT NULL,
+    document_id VARCHAR(128),  -- Client-supplied id of the submitted file (incremental re-analysis)
 
     -- AI response data
     ai_raw_response TEXT,
     corrected_code TEXT,
-    errors JSON,  -- Dynamic list of errors from AI
+    errors JSONB,  -- Dynamic list of errors from AI
     explanations JSON,  -- List of explanations
     recommendations TEXT,
 
@@ -56,14 +66,124 @@ CREATE TABLE code_analyses (
 -- Create indexes for code_analyses table
 CREATE INDEX idx_code_analyses_user_id ON code_analyses(user_id);
 CREATE INDEX idx_code_analyses_created_at ON code_analyses(created_at);
+CREATE INDEX idx_code_analyses_user_created ON code_analyses(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_code_analyses_user_document ON code_analyses(user_id, document_id, created_at DESC)
+    WHERE document_id IS NOT NULL;
+
+-- Error occurrences, one row per error in code_analyses.errors (written at insert time)
+CREATE TABLE analysis_errors (
+    id BIGSERIAL PRIMARY KEY,
+    analysis_id VARCHAR NOT NULL REFERENCES code_analyses(id) ON DELETE CASCADE,
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    error_type VARCHAR NOT NULL,
+    line INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_analysis_errors_user_type ON analysis_errors(user_id, error_type);
+CREATE INDEX ix_analysis_errors_analysis_id ON analysis_errors(analysis_id);
+
+-- Chatbot exchanges (one row per user message and assistant response)
+CREATE TABLE conversations (
+    id VARCHAR PRIMARY KEY,
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    response TEXT NOT NULL,
+    message_tokens INTEGER NOT NULL DEFAULT 0,  -- Estimated tokens of each side
+    response_tokens INTEGER NOT NULL DEFAULT 0,
+    model VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_conversations_user_created ON conversations(user_id, created_at, id);
+
+-- Rolling summary of chat messages older than the context window
+CREATE TABLE conversation_summaries (
+    user_id VARCHAR PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL,
+    token_count INTEGER NOT NULL DEFAULT 0,
+    summarized_until TIMESTAMP WITH TIME ZONE NOT NULL,  -- Messages up to here are summarized
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Analytics rollups, updated in the same transaction as each analysis insert
+-- (rebuild with: python -m app.commands.backfill_rollups)
+CREATE TABLE user_daily_stats (
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    analysis_count INTEGER NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE user_daily_error_counts (
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    error_type VARCHAR NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day, error_type)
+);
+
+CREATE TABLE user_stats_totals (
+    user_id VARCHAR PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_analyses INTEGER NOT NULL DEFAULT 0,
+    total_errors INTEGER NOT NULL DEFAULT 0,
+    min_errors INTEGER,
+    first_analysis_at TIMESTAMP WITH TIME ZONE,
+    last_analysis_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Content-addressed cache of AI analysis results
+CREATE TABLE analysis_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,  -- sha256(model version, language, normalized code)
+    language VARCHAR(50) NOT NULL,
+    model_version VARCHAR NOT NULL,
+    ai_response TEXT,  -- markdown, only for backends without structured output
+    structured_result JSON,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_analysis_cache_created_at ON analysis_cache(created_at);
+CREATE INDEX idx_analysis_cache_last_hit_at ON analysis_cache(last_hit_at);
+
+-- Async-mode analysis job queue
+CREATE TABLE analysis_jobs (
+    id VARCHAR PRIMARY KEY,
+    user_id VARCHAR NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    language VARCHAR(50) NOT NULL,
+    document_id VARCHAR(128),
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',  -- queued, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    analysis_id VARCHAR REFERENCES code_analyses(id) ON DELETE SET NULL,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX ix_analysis_jobs_user_id ON analysis_jobs(user_id);
+CREATE INDEX idx_analysis_jobs_pending ON analysis_jobs(created_at) WHERE status IN ('queued', 'running');
 
 -- Comments for documentation
 COMMENT ON TABLE users IS 'Stores user accounts for authentication';
+COMMENT ON TABLE conversations IS 'Chatbot exchanges per user';
+COMMENT ON TABLE conversation_summaries IS 'Compressed chat history used as prompt context';
 COMMENT ON TABLE code_analyses IS 'Stores code analysis results from AI with dynamic error types';
+COMMENT ON TABLE analysis_errors IS 'Normalized error occurrences for indexed per-type queries';
+COMMENT ON TABLE user_daily_stats IS 'Rollup: analyses and errors per user per day';
+COMMENT ON TABLE user_daily_error_counts IS 'Rollup: error type occurrences per user per day';
+COMMENT ON TABLE user_stats_totals IS 'Rollup: lifetime analysis totals per user';
+COMMENT ON TABLE analysis_cache IS 'Reusable AI results for repeated submissions of the same code';
+COMMENT ON TABLE analysis_jobs IS 'Durable queue of analyses requested in async mode';
 
-COMMENT ON COLUMN code_analyses.errors IS 'JSON array of error objects from AI, format: [{"type": "Error Name", "message": "description"}]';
+COMMENT ON COLUMN code_analyses.errors IS 'JSONB array of error objects from AI, format: [{"type": "Error Name", "message": "description"}]';
 COMMENT ON COLUMN code_analyses.explanations IS 'JSON array of explanations, format: [{"error_type": "Error Name", "explanation": "detailed explanation"}]';
-COMMENT ON COLUMN code_analyses.ai_raw_response IS 'Raw markdown response from AI model for debugging';
+COMMENT ON COLUMN code_analyses.ai_raw_response IS 'Raw AI model response for debugging (JSON document for structured backends, markdown otherwise)';
 
 -- Example data structure for errors JSON:
 -- [